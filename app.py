@@ -25,42 +25,73 @@ st.title("抖音电商数据分析工具")
 st.markdown("---")
 
 # 导入项目模块 - 放在页面配置后面
-from cleaning.converters import commission_to_float, conversion_to_float, range_mid
-from cleaning.filter_engine import filter_dataframe
+from cleaning.converters import (  # noqa: E402
+    commission_result,
+    conversion_result,
+    range_mid_result,
+)
+from cleaning.threshold_index import ThresholdIndex  # noqa: E402
+from douyin_ecom_analyzer.cleaning.columnar import summarize_errors  # noqa: E402
+from douyin_ecom_analyzer.cleaning.vocab_cache import flush_vocab_cache  # noqa: E402
+from douyin_ecom_analyzer.ingest import read_excel  # noqa: E402
+from douyin_ecom_analyzer.snapshot import content_digest  # noqa: E402
+
+
+def _parse_into(df_clean, col, parse, reports):
+    """批量解析一列，写入 <列名>_错误码 列并记录错误汇总，脏数据不中断清洗"""
+    result = parse(df_clean[col])
+    df_clean[f"{col}_错误码"] = result.errors
+    reports[col] = summarize_errors(df_clean[col], result)
+    if result.failed.any():
+        logger.warning(f"列 {col} 存在无法解析的值: {reports[col]}")
+    return result.values
 
 
-def clean_dataframe(df, cfg=None):
+def clean_dataframe(df, cfg=None, copy=True):
     """
-    数据清洗函数
+    数据清洗函数，不修改 df
 
     Args:
         df: 原始DataFrame
         cfg: 配置参数
+        copy: 是否复制未改写的列。为 False 时结果与 df 共用这些列的数据，
+            修改结果会同时改动 df
 
     Returns:
         DataFrame: 清洗后的DataFrame
     """
-    df_clean = df.copy()
+    # 浅复制：清洗只整列替换或新增列，不改写原列的数据；
+    # 原始数据缓存在会话中，默认复制未改写的列，修改结果不会影响缓存
+    df_clean = df.copy(deep=copy)
+    reports = {}
 
     # 处理销量数据
     if "近7天销量" in df_clean.columns:
-        df_clean["近7天销量_清洗"] = df_clean["近7天销量"].astype(str).apply(range_mid)
+        df_clean["近7天销量_清洗"] = _parse_into(df_clean, "近7天销量", range_mid_result, reports)
         df_clean["近7天销量值"] = df_clean["近7天销量_清洗"]
 
     if "近30天销量" in df_clean.columns:
-        df_clean["近30天销量_清洗"] = df_clean["近30天销量"].astype(str).apply(range_mid)
+        df_clean["近30天销量_清洗"] = _parse_into(
+            df_clean, "近30天销量", range_mid_result, reports
+        )
         df_clean["近30天销量值"] = df_clean["近30天销量_清洗"]
 
     # 处理佣金数据
     if "佣金比例" in df_clean.columns:
-        df_clean["佣金比例_清洗"] = df_clean["佣金比例"].astype(str).apply(commission_to_float)
+        df_clean["佣金比例_清洗"] = _parse_into(df_clean, "佣金比例", commission_result, reports)
         df_clean["佣金比例值"] = df_clean["佣金比例_清洗"]
 
     # 处理转化率
     if "转化率" in df_clean.columns:
-        df_clean["转化率_清洗"] = df_clean["转化率"].astype(str).apply(conversion_to_float)
+        df_clean["转化率_清洗"] = _parse_into(df_clean, "转化率", conversion_result, reports)
         df_clean["转化率值"] = df_clean["转化率_清洗"]
 
+    # 各列解析错误汇总，供页面展示
+    df_clean.attrs["parse_reports"] = reports
+
+    # 解析结果写回词表缓存
+    flush_vocab_cache()
+
     # 确保关联达人列存在
     if "关联达人" in df_clean.columns:
         if df_clean["关联达人"].dtype == "object":
@@ -78,6 +109,92 @@ def clean_dataframe(df, cfg=None):
     return df_clean
 
 
+def _upload_digest(uploaded_file):
+    """
+    上传文件的内容哈希，作为会话缓存的键
+
+    文件名和大小相同的修改后的工作簿也能区分；同一次上传（file_id 相同）
+    在之后的重新运行中不再重复计算。
+    """
+    upload_id = getattr(uploaded_file, "file_id", None)
+    cached = st.session_state.get("upload_digest")
+    if upload_id is None or cached is None or cached[0] != upload_id:
+        cached = st.session_state["upload_digest"] = (upload_id, content_digest(uploaded_file))
+    return cached[1]
+
+
+def _show_results(df_raw, prepared, rules):
+    """
+    按当前阈值显示过滤结果和Top50
+
+    清洗后的数据和阈值索引保存在会话中，拖动滑块重新运行脚本时只在索引上
+    求值，不重新清洗和过滤。
+
+    Args:
+        df_raw: 原始DataFrame
+        prepared: 会话中保存的清洗结果，包含 df_clean 和 index
+        rules: 过滤规则，为None时从文件加载
+    """
+    df_clean = prepared["df_clean"]
+    index = prepared["index"]
+
+    # 提示无法解析的值（已记为空值，不影响后续分析）
+    for col, report in df_clean.attrs.get("parse_reports", {}).items():
+        if report.failures:
+            st.warning(f"⚠️ 列 {col} 有{report.failures}行无法解析: {report}")
+
+    # 显示清洗后的数据预览
+    st.header("3. 清洗后数据预览")
+    st.dataframe(df_clean.head())
+
+    try:
+        # 应用过滤规则
+        start_time = time.perf_counter()
+        result = index.evaluate(rules)
+        kept = int(result.keep.sum())
+        top_count = min(50, kept)  # 防止数据不足50条
+        top50 = index.top(result.keep, top_count)
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+        # 显示过滤结果
+        st.header("4. 过滤结果")
+        st.write(f"原始数据量: {len(df_raw)}行")
+        st.write(f"清洗后数据量: {len(df_clean)}行")
+        st.write(f"过滤后数据量: {kept}行")
+        st.write(f"过滤率: {(1 - kept / max(len(df_clean), 1)) * 100:.2f}%")
+        st.dataframe(
+            pd.DataFrame(
+                {"通过行数": result.pass_counts()}, dtype="int64"
+            ).rename_axis("过滤条件")
+        )
+        st.caption(f"筛选耗时: {elapsed_ms:.1f}毫秒")
+
+        # 检查是否有过滤结果
+        if kept == 0:
+            st.warning("⚠️ 过滤后没有符合条件的数据，请尝试调整过滤规则")
+            return
+
+        # 显示Top50
+        st.header(f"5. Top {top_count} 高价值商品")
+        st.dataframe(top50, height=600)
+
+        # 提供下载
+        towrite = io.BytesIO()
+        top50.to_excel(towrite, index=False, engine="openpyxl")
+        towrite.seek(0)
+
+        st.download_button(
+            f"📥 下载 Top{top_count}",
+            data=towrite.getvalue(),
+            file_name="top_products.xlsx",
+            key="dl-top50",
+        )
+
+    except Exception as e:
+        st.error(f"应用过滤规则时发生错误: {str(e)}")
+        logger.exception("过滤错误")
+
+
 def main():
     """主函数"""
     # 侧边栏配置
@@ -148,8 +265,16 @@ def main():
 
     if uploaded_file is not None:
         try:
-            # 读取Excel文件
-            df_raw = pd.read_excel(uploaded_file)
+            # 读取Excel文件，同一文件只读取一次，拖动滑块重新运行时直接复用
+            file_key = _upload_digest(uploaded_file)
+            raw = st.session_state.get("raw")
+            if raw is None or raw["file"] != file_key:
+                raw = st.session_state["raw"] = {
+                    "file": file_key,
+                    # 流式读取全部列：Top50 下载包含原始数据的所有列
+                    "df": read_excel(uploaded_file),
+                }
+            df_raw = raw["df"]
             st.success(f"成功读取数据: {df_raw.shape[0]}行 x {df_raw.shape[1]}列")
 
             # 显示原始数据预览
@@ -166,80 +291,21 @@ def main():
                 start_time = time.time()
                 status.info("正在清洗数据...")
                 df_clean = clean_dataframe(df_raw)
-                progress.progress(25)
-
-                # 显示清洗后的数据预览
-                st.header("3. 清洗后数据预览")
-                st.dataframe(df_clean.head())
-
-                # 应用过滤规则
-                status.info("正在应用过滤规则...")
-                try:
-                    df_filt = filter_dataframe(df_clean, rules_gui)
-                    progress.progress(50)
-
-                    # 检查是否有过滤结果
-                    if len(df_filt) == 0:
-                        st.warning("⚠️ 过滤后没有符合条件的数据，请尝试调整过滤规则")
-                        # 显示过滤结果统计
-                        st.header("4. 过滤结果")
-                        st.write(f"原始数据量: {len(df_raw)}行")
-                        st.write(f"清洗后数据量: {len(df_clean)}行")
-                        st.write("过滤后数据量: 0行")
-                        st.write("过滤率: 100%")
-                        return
-
-                    # 计算价值分数
-                    status.info("正在计算商品价值分数...")
-                    # 确保所有用于计算的列都是数值类型
-                    df_filt["近30天销量值"] = pd.to_numeric(
-                        df_filt["近30天销量值"], errors="coerce"
-                    ).fillna(0)
-                    df_filt["佣金比例值"] = pd.to_numeric(
-                        df_filt["佣金比例值"], errors="coerce"
-                    ).fillna(0)
-                    df_filt["price"] = pd.to_numeric(df_filt["price"], errors="coerce").fillna(0)
-
-                    df_filt["value_score"] = (
-                        df_filt["近30天销量值"] * df_filt["佣金比例值"] * df_filt["price"]
-                    )
-
-                    # 选择Top50
-                    top_count = min(50, len(df_filt))  # 防止数据不足50条
-                    top50 = df_filt.nlargest(top_count, "value_score").reset_index(drop=True)
-                    progress.progress(75)
-
-                    # 显示过滤结果
-                    st.header("4. 过滤结果")
-                    st.write(f"原始数据量: {len(df_raw)}行")
-                    st.write(f"清洗后数据量: {len(df_clean)}行")
-                    st.write(f"过滤后数据量: {len(df_filt)}行")
-                    st.write(f"过滤率: {(1 - len(df_filt) / len(df_clean)) * 100:.2f}%")
-
-                    # 显示Top50
-                    st.header(f"5. Top {top_count} 高价值商品")
-                    st.dataframe(top50, height=600)
-
-                    # 提供下载
-                    towrite = io.BytesIO()
-                    top50.to_excel(towrite, index=False, engine="openpyxl")
-                    towrite.seek(0)
-
-                    st.download_button(
-                        f"📥 下载 Top{top_count}",
-                        data=towrite.getvalue(),
-                        file_name="top_products.xlsx",
-                        key="dl-top50",
-                    )
-
-                    # 完成
-                    progress.progress(100)
-                    status.success(f"处理完成！总耗时: {time.time() - start_time:.2f}秒")
-
-                except Exception as e:
-                    st.error(f"应用过滤规则时发生错误: {str(e)}")
-                    logger.exception("过滤错误")
-                    status.error("处理过程中出现错误，请检查数据格式或联系技术支持")
+                progress.progress(50)
+
+                # 建立阈值索引，之后拖动滑块只需二分查找，不再重新清洗和过滤
+                status.info("正在建立阈值索引...")
+                st.session_state["prepared"] = {
+                    "file": file_key,
+                    "df_clean": df_clean,
+                    "index": ThresholdIndex(df_clean),
+                }
+                progress.progress(100)
+                status.success(f"清洗完成！耗时: {time.time() - start_time:.2f}秒")
+
+            prepared = st.session_state.get("prepared")
+            if prepared is not None and prepared["file"] == file_key:
+                _show_results(df_raw, prepared, rules_gui)
 
         except Exception as e:
             st.error(f"处理过程中发生错误: {str(e)}")
@@ -0,0 +1,211 @@
+"""
+阈值索引模块：专家模式拖动阈值时不重新清洗和过滤
+
+对清洗后的数据只建一次索引：每个数值规则列按值排好序（argsort），商品名称
+按唯一值去重，黑名单匹配结果按黑名单缓存。之后改变任一阈值只需在排好序的列
+上二分查找，再把各条件的布尔位图求交，结果与 filter_dataframe 相同。
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from cleaning.filter_engine import coerce_columns, load_rules, take_rows
+from douyin_ecom_analyzer.cleaning.binding import (
+    NUMERIC_FIELDS,
+    RATE_FRACTION,
+    bind_columns,
+    rule_rate_unit,
+)
+from douyin_ecom_analyzer.cleaning.keywords import get_keyword_matcher
+
+# 价值分数 = 近30天销量 × 佣金比例（小数） × 价格
+_SCORE_FIELDS = ("sales_30d", "commission", "price")
+# 缓存的黑名单匹配结果个数
+_BLACKLIST_CACHE_SIZE = 8
+
+
+class RuleMasks(NamedTuple):
+    """各条件的求值结果"""
+
+    masks: dict[str, np.ndarray]  # 条件名 → 单独满足该条件的行
+    keep: np.ndarray  # 满足全部条件的行
+
+    def pass_counts(self) -> dict[str, int]:
+        """各条件单独的通过行数"""
+        return {name: int(np.count_nonzero(mask)) for name, mask in self.masks.items()}
+
+
+def _at_least(order: np.ndarray, start: int) -> np.ndarray:
+    """排好序后从 start 起的行为 True，只写较少的一半"""
+    n = len(order)
+    if start > n // 2:
+        mask = np.zeros(n, dtype=bool)
+        mask[order[start:]] = True
+    else:
+        mask = np.ones(n, dtype=bool)
+        mask[order[:start]] = False
+    return mask
+
+
+class ThresholdIndex:
+    """
+    清洗后数据的阈值索引，数据只读，构建一次后可反复按不同阈值求值
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        构建索引
+
+        Args:
+            df: 清洗后的DataFrame，构建后不应再修改
+        """
+        self.df = df
+        self.binding = bind_columns(df.columns)
+        self.columns = coerce_columns(df, self.binding)
+
+        # 字段 → (按值升序的行位置, 升序的值)
+        self._sorted: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        for field in NUMERIC_FIELDS:
+            if field in self.binding:
+                values = self._values(field)
+                order = np.argsort(values, kind="stable")
+                self._sorted[field] = (order, values[order])
+
+        self._zero_rate = None
+        if "commission" in self._sorted:
+            self._zero_rate = self._values("commission") == 0
+
+        # 商品名称去重后的编码和唯一值，黑名单只匹配唯一值
+        self._names = None
+        if "name" in self.binding:
+            self._names = pd.factorize(self._column(self.binding.column("name")))
+        self._blacklisted: dict[tuple[str, ...], np.ndarray] = {}
+
+        # 价值分数及按分数降序的行位置（分数相同的保持原顺序）
+        self.score = None
+        self._rank = np.arange(len(df))
+        if self.binding.has(*_SCORE_FIELDS):
+            sales, commission, price = (
+                pd.to_numeric(self._column(self.binding.column(field)), errors="coerce")
+                .fillna(0).to_numpy(np.float64)
+                for field in _SCORE_FIELDS
+            )
+            self.score = sales * (commission / self.binding.fields["commission"].scale) * price
+            self._rank = np.argsort(-self.score, kind="stable")
+
+    def _column(self, name) -> pd.Series:
+        return self.columns[name] if name in self.columns else self.df[name]
+
+    def _values(self, field: str) -> np.ndarray:
+        return self._column(self.binding.column(field)).to_numpy(dtype=np.float64)
+
+    def at_least(self, field: str, threshold: float, unit: str = RATE_FRACTION) -> np.ndarray:
+        """
+        二分查找字段值不小于阈值的行
+
+        Args:
+            field: 数值字段，见 binding.NUMERIC_FIELDS
+            threshold: 规则中的阈值
+            unit: 比例阈值的单位，见 binding.rule_rate_unit
+
+        Returns:
+            np.ndarray: bool 数组，与 df 的行一一对应
+        """
+        order, values = self._sorted[field]
+        threshold = self.binding.threshold(field, threshold, unit)
+        return _at_least(order, int(np.searchsorted(values, threshold, side="left")))
+
+    def blacklisted(self, blacklist) -> np.ndarray:
+        """
+        求商品名称包含黑名单关键词的行，同一黑名单只匹配一次
+
+        Args:
+            blacklist: 黑名单关键词列表
+
+        Returns:
+            np.ndarray: bool 数组，与 df 的行一一对应
+        """
+        key = tuple(map(str, blacklist))
+        mask = self._blacklisted.get(key)
+        if mask is None:
+            codes, uniques = self._names
+            hits = get_keyword_matcher(key).hits(uniques)
+            mask = np.append(hits, False)[codes]
+            if len(self._blacklisted) >= _BLACKLIST_CACHE_SIZE:
+                self._blacklisted.pop(next(iter(self._blacklisted)))
+            self._blacklisted[key] = mask
+        return mask
+
+    def evaluate(self, rules: dict | None = None) -> RuleMasks:
+        """
+        按规则求各条件和全部条件的结果，条件与 filter_dataframe 一一对应
+
+        Args:
+            rules: 过滤规则，如果为None则从文件加载
+
+        Returns:
+            RuleMasks: (条件名 → 单独满足该条件的行, 满足全部条件的行)
+        """
+        r = rules or load_rules()
+        unit = rule_rate_unit(r, RATE_FRACTION)
+        masks: dict[str, np.ndarray] = {}
+
+        # 销量过滤
+        sales = r.get("sales") or {}
+        if "last_7d_min" in sales and "sales_7d" in self._sorted:
+            masks["近7天销量"] = self.at_least("sales_7d", sales["last_7d_min"])
+        if "last_30d_min" in sales and "sales_30d" in self._sorted:
+            masks["近30天销量"] = self.at_least("sales_30d", sales["last_30d_min"])
+
+        # 佣金和转化率过滤：佣金率高于最低要求 或 零佣金但转化率高
+        commission = r.get("commission")
+        if (
+            commission and "min_rate" in commission and "zero_rate_conversion_min" in commission
+            and "commission" in self._sorted and "conversion" in self._sorted
+        ):
+            masks["佣金"] = self.at_least("commission", commission["min_rate"], unit) | (
+                self._zero_rate
+                & self.at_least("conversion", commission["zero_rate_conversion_min"], unit)
+            )
+
+        # 转化率过滤
+        conversion = r.get("conversion") or {}
+        if "min_rate" in conversion and "conversion" in self._sorted:
+            masks["转化率"] = self.at_least("conversion", conversion["min_rate"], unit)
+
+        # KOL数量过滤
+        influencer = r.get("influencer") or {}
+        if "min_count" in influencer and "influencer" in self._sorted:
+            masks["关联达人"] = self.at_least("influencer", influencer["min_count"])
+
+        # 类别黑名单过滤
+        blacklist = (r.get("categories") or {}).get("blacklist")
+        if blacklist and self._names is not None:
+            masks["类别黑名单"] = ~self.blacklisted(blacklist)
+
+        if masks:
+            keep = np.logical_and.reduce(list(masks.values()))
+        else:
+            keep = np.ones(len(self.df), dtype=bool)
+        return RuleMasks(masks, keep)
+
+    def top(self, keep: np.ndarray, n: int = 50) -> pd.DataFrame:
+        """
+        取满足条件的行中价值分数最高的 n 行
+
+        Args:
+            keep: evaluate 返回的 keep
+            n: 行数
+
+        Returns:
+            pd.DataFrame: 按价值分数降序，含 value_score 列（缺少计算列时按原顺序、不含该列）
+        """
+        positions = self._rank[keep[self._rank]][:n]
+        result = take_rows(self.df, positions, self.columns)
+        if self.score is not None:
+            result["value_score"] = self.score[positions]
+        return result
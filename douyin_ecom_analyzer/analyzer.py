@@ -10,6 +10,11 @@ from datetime import datetime
 import logging
 import io
 
+from douyin_ecom_analyzer.cleaning.themes import ThemeTagger, count_themes, recorded_theme_names
+from douyin_ecom_analyzer.streaming import (
+    COMMISSION_BINS, COMMISSION_LABELS, SALES_BINS, SALES_LABELS
+)
+
 # 设置通用字体支持
 plt.rcParams['font.sans-serif'] = ['DejaVu Sans', 'Bitstream Vera Sans', 'Arial', 'Liberation Sans', 'sans-serif']  # 使用更通用的字体设置
 plt.rcParams['axes.unicode_minus'] = False  # 用来正常显示负号
@@ -20,16 +25,19 @@ logger = logging.getLogger('douyin_analyzer')
 class DouyinAnalyzer:
     """抖音电商数据分析器"""
 
-    def __init__(self, df, output_dir='./output'):
+    def __init__(self, df, output_dir='./output', url_validation=None):
         """
         初始化分析器
 
         Args:
             df: 清洗后的DataFrame
             output_dir: 输出目录
+            url_validation: 后台URL校验任务（见 utils.start_url_validation），
+                在URL有效性分析或生成Excel报表时才等待并合并结果
         """
         self.df = df
         self.output_dir = output_dir
+        self.url_validation = url_validation
 
         # 初始化分析结果属性
         self.category_counts = None
@@ -77,14 +85,11 @@ class DouyinAnalyzer:
             logger.warning("有效销量数据为空，跳过销量分析")
             return None
 
-        # 创建销量区间
-        sales_bins = [0, 1000, 5000, 10000, 50000, 100000, float('inf')]
-        sales_labels = ['<1k', '1k-5k', '5k-1w', '1w-5w', '5w-10w', '>10w']
-
+        # 创建销量区间（与 --stream 模式的分块统计相同）
         self.df['销量区间'] = pd.cut(
             self.df['近30天销量_清洗'],
-            bins=sales_bins,
-            labels=sales_labels
+            bins=SALES_BINS,
+            labels=SALES_LABELS
         )
 
         # 统计各区间商品数量
@@ -127,14 +132,11 @@ class DouyinAnalyzer:
             logger.warning("有效佣金数据为空，跳过佣金分析")
             return None
 
-        # 创建佣金比例区间
-        commission_bins = [0, 0.05, 0.1, 0.15, 0.2, 0.3, 1.0]
-        commission_labels = ['0-5%', '5-10%', '10-15%', '15-20%', '20-30%', '>30%']
-
+        # 创建佣金比例区间（与 --stream 模式的分块统计相同）
         self.df['佣金区间'] = pd.cut(
             self.df['佣金比例_清洗'],
-            bins=commission_bins,
-            labels=commission_labels
+            bins=COMMISSION_BINS,
+            labels=COMMISSION_LABELS
         )
 
         # 统计各区间商品数量
@@ -164,6 +166,36 @@ class DouyinAnalyzer:
             'data': commission_counts
         }
 
+    def theme_analysis(self, themes=None):
+        """
+        按主题统计商品数量，结果写入类别分布
+
+        清洗时已有 theme_id 列（见 ecom_cleaner 的 DataCleaner）时，按清洗时
+        记录的主题名直接按位计数；主题与 themes 不同或未记录主题名时，对商品
+        名称重新标记一次主题。
+
+        Args:
+            themes: 主题名 → 关键词列表，默认沿用清洗时的主题，
+                没有时为 themes.DEFAULT_THEMES
+
+        Returns:
+            dict: 包含各主题商品数的字典
+        """
+        names = recorded_theme_names(self.df)
+        if names is not None and (themes is None or names == list(themes)):
+            self.category_counts = count_themes(self.df['theme_id'].to_numpy(), names)
+        elif '商品名称' in self.df.columns:
+            tagger = ThemeTagger(themes)
+            self.category_counts = tagger.counts(tagger.tag(self.df['商品名称']).ids)
+        else:
+            logger.warning("缺少商品名称，跳过主题分析")
+            return None
+
+        logger.info(f"主题分布: {self.category_counts.to_dict()}")
+        return {
+            'data': self.category_counts
+        }
+
     def correlation_analysis(self):
         """相关性分析"""
         # 获取数值列
@@ -193,8 +225,16 @@ class DouyinAnalyzer:
             'data': corr_matrix
         }
 
+    def _join_url_validation(self):
+        """合并后台URL校验结果（只合并一次）"""
+        if self.url_validation is not None:
+            self.df = self.url_validation.join(self.df)
+            self.url_validation = None
+
     def url_validation_analysis(self):
         """URL有效性分析"""
+        self._join_url_validation()
+
         # 查找URL验证结果列
         url_valid_cols = [col for col in self.df.columns if col.endswith('_有效')]
 
@@ -207,13 +247,19 @@ class DouyinAnalyzer:
         for col in url_valid_cols:
             original_col = col.replace('_有效', '')
             total = self.df[original_col].notna().sum()
+            # 熔断跳过的链接为 <NA>（未知），单独统计，不算作无效
+            unknown = self.df[col].isna().sum()
             valid = self.df[col].sum()
+            checked = total - unknown
 
             if total > 0:
                 valid_rates[original_col] = {
                     '有效数': valid,
+                    '无效数': checked - valid,
+                    '未知数': unknown,
                     '总数': total,
-                    '有效率': valid / total
+                    # 有效率按已校验的链接计算，未知的不计入
+                    '有效率': valid / checked if checked > 0 else np.nan
                 }
 
         if not valid_rates:
@@ -223,7 +269,8 @@ class DouyinAnalyzer:
         # 创建图表
         labels = list(valid_rates.keys())
         valid_counts = [data['有效数'] for data in valid_rates.values()]
-        invalid_counts = [data['总数'] - data['有效数'] for data in valid_rates.values()]
+        invalid_counts = [data['无效数'] for data in valid_rates.values()]
+        unknown_counts = [data['未知数'] for data in valid_rates.values()]
 
         plt.figure(figsize=(12, 6))
 
@@ -232,6 +279,8 @@ class DouyinAnalyzer:
 
         plt.bar(x, valid_counts, width, label='有效链接', color='green')
         plt.bar(x, invalid_counts, width, bottom=valid_counts, label='无效链接', color='red')
+        plt.bar(x, unknown_counts, width, bottom=np.add(valid_counts, invalid_counts),
+                label='未知链接', color='gray')
 
         plt.title('URL有效性分析')
         plt.ylabel('链接数量')
@@ -239,7 +288,9 @@ class DouyinAnalyzer:
         plt.legend()
 
         # 添加百分比标签
-        for i, (label, data) in enumerate(valid_rates.items()):
+        for i, data in enumerate(valid_rates.values()):
+            if pd.isna(data['有效率']):
+                continue
             plt.text(
                 i, data['总数'] / 2,
                 f"{data['有效率']:.1%}",
@@ -260,6 +311,8 @@ class DouyinAnalyzer:
 
     def generate_excel_report(self):
         """生成Excel报表"""
+        self._join_url_validation()
+
         # 创建一个BytesIO对象，保存Excel
         output = io.BytesIO()
 
@@ -300,6 +353,7 @@ class DouyinAnalyzer:
         # 运行各项分析
         results['sales'] = self.sales_analysis()
         results['commission'] = self.commission_analysis()
+        results['theme'] = self.theme_analysis()
         results['correlation'] = self.correlation_analysis()
         results['url_validation'] = self.url_validation_analysis()
 
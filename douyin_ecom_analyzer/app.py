@@ -10,6 +10,8 @@ import streamlit as st
 
 from douyin_ecom_analyzer.analyzer import DouyinAnalyzer
 from douyin_ecom_analyzer.filter_engine import FilterEngine
+from douyin_ecom_analyzer.ingest import read_excel
+from douyin_ecom_analyzer.utils import start_url_validation, structural_validate_urls
 
 # 导入项目模块 - 修改为完整包路径
 from ecom_cleaner.cleaning.cleaner import DataCleaner
@@ -75,7 +77,7 @@ def main():
     # 侧边栏配置
     st.sidebar.header("配置")
     skip_url_check = st.sidebar.checkbox(
-        "跳过URL有效性检查", value=True, help="启用此选项可加快处理速度，但会跳过链接验证"
+        "跳过URL有效性检查", value=True, help="启用此选项可加快处理速度，只离线校验链接结构"
     )
 
     apply_filters = st.sidebar.checkbox(
@@ -96,9 +98,9 @@ def main():
         info = st.empty()
 
         try:
-            # 读取Excel文件
+            # 流式读取Excel文件，读取全部列：原始数据会随分析报告导出
             progress_container.text("正在读取Excel文件...")
-            df = pd.read_excel(uploaded_file)
+            df = read_excel(uploaded_file)
             info.info(f"成功读取数据: {df.shape[0]}行 x {df.shape[1]}列")
             progress_bar.progress(20)
 
@@ -114,6 +116,13 @@ def main():
             cleaner = DataCleaner()
             cleaned_df = cleaner.clean(df)
 
+            # 链接校验：先做离线结构校验，联网检查在后台进行，分析时再合并结果
+            url_columns = [col for col in cleaned_df.columns if "链接" in col]
+            cleaned_df = structural_validate_urls(cleaned_df, url_columns)
+            url_validation = None
+            if url_columns and not skip_url_check:
+                url_validation = start_url_validation(cleaned_df, url_columns)
+
             cleaning_time = time.time() - start_time
             progress_bar.progress(40)
             info.info(f"数据清洗完成，耗时: {cleaning_time:.2f}秒")
@@ -158,7 +167,7 @@ def main():
 
             # 数据分析
             progress_container.text("正在分析数据...")
-            analyzer = DouyinAnalyzer(filtered_df, output_dir)
+            analyzer = DouyinAnalyzer(filtered_df, output_dir, url_validation=url_validation)
             results = analyzer.run_all_analyses()
             progress_bar.progress(90)
 
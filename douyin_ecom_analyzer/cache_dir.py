@@ -0,0 +1,27 @@
+"""
+本地缓存目录
+"""
+
+import os
+from pathlib import Path
+
+# 可通过环境变量覆盖缓存根目录
+CACHE_DIR_ENV = "DOUYIN_ANALYZER_CACHE_DIR"
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "douyin_ecom_analyzer"
+
+
+def get_cache_dir(*parts: str) -> Path:
+    """
+    获取（并创建）缓存目录
+
+    Args:
+        parts: 缓存根目录下的子目录
+
+    Returns:
+        Path: 缓存目录路径
+    """
+    root = Path(os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR)
+    path = root.joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -0,0 +1,164 @@
+"""
+列绑定模块：把过滤规则用到的逻辑字段解析为数据框中的实际列
+
+各清洗流程产出的数值列后缀不同：
+
+- 值、_清洗：根目录 app 和 douyin_ecom_analyzer.utils，比例为 0-1 小数
+- _num：旧版清洗，比例为 0-1 小数
+- _val：ecom_cleaner 的 DataCleaner，比例为百分点（36% → 36.0）
+
+绑定只依赖列名，按列名元组（数据框的模式指纹）解析一次并缓存，过滤时不再
+逐条规则探测 in df.columns。规则中的比例阈值按规则的单位（规则顶层的 unit
+键，没有时为各过滤引擎的约定，见 rule_rate_unit）换算为小数，再按所绑定列
+的单位换算，不生成换算后的新列；缺列的字段不绑定，引用它的规则直接跳过。
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Hashable, Iterable, Mapping, NamedTuple
+
+# 逻辑字段 → 候选列，按优先级排列
+FIELDS: dict[str, tuple[str, ...]] = {
+    "sales_7d": ("近7天销量_num", "近7天销量值", "近7天销量_清洗", "近7天销量_val"),
+    "sales_30d": ("近30天销量_num", "近30天销量值", "近30天销量_清洗", "近30天销量_val"),
+    "commission": ("佣金比例_num", "佣金比例值", "佣金比例_清洗", "佣金比例_val"),
+    "conversion": ("转化率_num", "转化率值", "转化率_清洗", "转化率_val"),
+    "influencer": ("关联达人",),
+    "price": ("price", "价格"),
+    "name": ("商品名称",),
+    "festival": ("is_festival",),
+}
+
+# 数值字段：过滤前统一转为数值，无法转换的记为 0
+NUMERIC_FIELDS = ("sales_7d", "sales_30d", "commission", "conversion", "influencer")
+
+# 比例字段，以及按百分点存储比例的列后缀
+RATE_FIELDS = ("commission", "conversion")
+_PERCENT_SUFFIX = "_val"
+
+# 规则中比例阈值的单位：0-1 小数或百分点（20 表示 20%）
+RATE_FRACTION = "fraction"
+RATE_PERCENT = "percent"
+_RATE_SCALE = {RATE_FRACTION: 1.0, RATE_PERCENT: 100.0}
+
+
+class BoundColumn(NamedTuple):
+    """绑定到逻辑字段的列"""
+
+    column: Hashable
+    scale: float  # 小数形式的比例 × scale = 列单位下的值
+
+
+def rule_rate_unit(rules: Mapping, default: str) -> str:
+    """
+    规则中比例阈值的单位：规则顶层的 unit 键，没有时为过滤引擎约定的 default
+
+    单位不按阈值大小推断：1 在百分点规则中是 1%，在小数规则中是 100%。
+
+    Args:
+        rules: 过滤规则
+        default: 过滤引擎约定的单位，RATE_FRACTION 或 RATE_PERCENT
+
+    Returns:
+        str: RATE_FRACTION 或 RATE_PERCENT
+
+    Raises:
+        ValueError: unit 不是 fraction 或 percent
+    """
+    unit = rules.get("unit", default)
+    if unit not in _RATE_SCALE:
+        raise ValueError(f"未知的比例单位: {unit}，可选: {tuple(_RATE_SCALE)}")
+    return unit
+
+
+def as_fraction(rate: float, unit: str) -> float:
+    """
+    把比例阈值换算为 0-1 小数
+
+    Examples:
+        >>> as_fraction(20, RATE_PERCENT), as_fraction(0.2, RATE_FRACTION)
+        (0.2, 0.2)
+    """
+    return rate / _RATE_SCALE[unit]
+
+
+class ColumnBinding:
+    """
+    一种数据框模式下逻辑字段到实际列的绑定，由 bind_columns 创建并缓存
+    """
+
+    def __init__(self, columns: tuple[Hashable, ...]):
+        """
+        解析绑定
+
+        Args:
+            columns: 数据框的列名
+        """
+        present = set(columns)
+        self.columns = columns
+        self.fields: dict[str, BoundColumn] = {}
+        for field, candidates in FIELDS.items():
+            column = next((c for c in candidates if c in present), None)
+            if column is not None:
+                percent = field in RATE_FIELDS and column.endswith(_PERCENT_SUFFIX)
+                self.fields[field] = BoundColumn(column, 100.0 if percent else 1.0)
+
+    def __contains__(self, field: str) -> bool:
+        return field in self.fields
+
+    def has(self, *fields: str) -> bool:
+        """全部字段都已绑定"""
+        return all(field in self.fields for field in fields)
+
+    def column(self, field: str) -> Hashable:
+        """字段绑定的列名"""
+        return self.fields[field].column
+
+    def threshold(self, field: str, value: float, unit: str = RATE_FRACTION) -> float:
+        """
+        把规则阈值换算到所绑定列的单位
+
+        Args:
+            field: 逻辑字段
+            value: 规则中的阈值
+            unit: 比例字段阈值的单位，RATE_FRACTION 或 RATE_PERCENT
+
+        Returns:
+            float: 可直接与列比较的阈值
+
+        Examples:
+            >>> binding = bind_columns(["佣金比例_val"])
+            >>> binding.threshold("commission", 0.2), binding.threshold("commission", 1, "percent")
+            (20.0, 1.0)
+        """
+        if field not in RATE_FIELDS:
+            return value
+        # 取整去掉 0.2 × 100 之类的浮点误差
+        return round(as_fraction(value, unit) * self.fields[field].scale, 12)
+
+    def numeric_columns(self) -> list[Hashable]:
+        """已绑定的数值字段的列"""
+        return [self.fields[f].column for f in NUMERIC_FIELDS if f in self.fields]
+
+    def __repr__(self) -> str:
+        bound = ", ".join(f"{field}={bound.column}" for field, bound in self.fields.items())
+        return f"ColumnBinding({bound})"
+
+
+@lru_cache(maxsize=64)
+def _cached_binding(columns: tuple[Hashable, ...]) -> ColumnBinding:
+    return ColumnBinding(columns)
+
+
+def bind_columns(columns: Iterable[Hashable]) -> ColumnBinding:
+    """
+    获取列名对应的绑定，同一组列名只解析一次
+
+    Args:
+        columns: 数据框的列名，一般为 df.columns
+
+    Returns:
+        ColumnBinding: 缓存的绑定
+    """
+    return _cached_binding(tuple(columns))
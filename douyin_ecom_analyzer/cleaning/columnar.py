@@ -0,0 +1,480 @@
+"""
+列式解析模块：整列解析销量等脏数据字段，避免逐行调用 Python 函数
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from functools import partial
+from typing import Callable, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from douyin_ecom_analyzer.cleaning.vocab_cache import converter_version, get_vocab_cache
+
+# 单位换算表（统一小写）
+_UNIT_SCALE = {"w": 1e4, "万": 1e4, "k": 1e3, "千": 1e3}
+
+# 视为缺失值的文本（astype(str) 之后的 NaN/None 等）
+_MISSING_TOKENS = {"", "nan", "none", "null", "nat", "<na>"}
+
+# 区间取值策略
+RANGE_POLICIES = ("mean", "lower")
+
+# 百分比输出单位与不带 % 的裸数字的解释方式
+PERCENT_UNITS = ("fraction", "percent")
+
+_NUM = r"\d+(?:\.\d+)?|\.\d+"
+_UNIT = r"[wk万千]"
+_SEP = r"[~～\-—至到,]"
+
+# 整格匹配时允许的前后缀：'约5000'、'5000+'、'1w以上'
+_PREFIX = r"^\s*约?\s*"
+_SUFFIX = r"\s*(?:\+|以上)?\s*$"
+
+# '7.5w~10w'、'3k-5k'、'1.2万'、'约5000+' 等，必须匹配整格，
+# 多余的文本（'第3名'、'2023-05-01'、'1.2.3w'）不解析
+_SALES_PAT = re.compile(
+    rf"{_PREFIX}(?P<lo>{_NUM})\s*(?P<lo_unit>{_UNIT})?"
+    rf"(?:\s*{_SEP}\s*(?P<hi>{_NUM})\s*(?P<hi_unit>{_UNIT})?)?{_SUFFIX}",
+    re.I,
+)
+
+# '20.00%'、'10%~15%'、'5-10%'、'12'，同样必须匹配整格（'约1成' 不解析）
+_PERCENT_PAT = re.compile(
+    rf"{_PREFIX}(?P<lo>{_NUM})\s*%?(?:\s*[~～\-—至到]\s*(?P<hi>{_NUM})\s*%?)?{_SUFFIX}"
+)
+
+# 列格式嗅探：格式名 → 整格匹配的正则（只在抽样上使用）
+FORMAT_NUMERIC = "numeric"  # 数值类型列，如 Excel 读出的 float
+FORMAT_MIXED = "mixed"  # 没有占绝对多数的格式，走通用解析
+_SALES_FORMATS = {
+    "plain": re.compile(rf"{_NUM}"),
+    "unit": re.compile(rf"(?:{_NUM})\s*{_UNIT}?", re.I),
+    "range": re.compile(rf"(?:{_NUM})\s*{_UNIT}?\s*[~\-]\s*(?:{_NUM})\s*{_UNIT}?", re.I),
+}
+_PERCENT_FORMATS = {
+    "plain": re.compile(rf"{_NUM}"),
+    "percent": re.compile(rf"(?:{_NUM})\s*%?"),
+    "percent_range": re.compile(rf"(?:{_NUM})\s*%?\s*[~\-]\s*(?:{_NUM})\s*%"),
+}
+_FORMATS = {"sales": _SALES_FORMATS, "percent": _PERCENT_FORMATS}
+_PERCENT_SUFFIX = {"%": 1.0}
+
+# 千分位逗号：'3,500' → '3500'，'2000,3000' 保留为区间
+_THOUSANDS_PAT = re.compile(r"(?<=\d),(?=\d{3}(?!\d))")
+
+
+# 逐行错误码（uint8）
+PARSE_OK = 0
+PARSE_MISSING = 1  # 空值，或 'nan'、'null' 等空值文本
+PARSE_PLACEHOLDER = 2  # 不含数字的占位文本，如 '--'、'暂无'
+PARSE_INVALID = 3  # 含数字但无法解析
+ERROR_LABELS = {
+    PARSE_OK: "正常",
+    PARSE_MISSING: "缺失",
+    PARSE_PLACEHOLDER: "占位符",
+    PARSE_INVALID: "无法解析",
+}
+
+
+class ColumnParseResult(NamedTuple):
+    """整列解析结果"""
+
+    values: np.ndarray  # float64，解析失败或缺失为 NaN
+    failed: np.ndarray  # bool，非缺失但无法解析的行
+    errors: np.ndarray  # uint8，逐行错误码，见 ERROR_LABELS
+
+
+class ParseReport(NamedTuple):
+    """整列解析的错误汇总"""
+
+    rows: int  # 总行数
+    counts: dict[str, int]  # 错误类别 → 行数，不含正常行
+    top_tokens: list[tuple[str, int]]  # 最常见的无法解析文本及其行数
+
+    @property
+    def failures(self) -> int:
+        return sum(n for label, n in self.counts.items() if label != ERROR_LABELS[PARSE_MISSING])
+
+    def __str__(self) -> str:
+        counts = ", ".join(f"{label}{n}" for label, n in self.counts.items()) or "无错误"
+        tokens = ", ".join(f"{token!r}×{n}" for token, n in self.top_tokens)
+        return f"{self.rows}行, {counts}" + (f", 常见无法解析值: {tokens}" if tokens else "")
+
+
+def _make_result(values: np.ndarray, errors: np.ndarray) -> ColumnParseResult:
+    return ColumnParseResult(values, errors >= PARSE_PLACEHOLDER, errors)
+
+
+def summarize_errors(series: pd.Series, result: ColumnParseResult, top: int = 5) -> ParseReport:
+    """
+    汇总整列解析的错误码和最常见的无法解析文本
+
+    只对失败行做 value_counts，干净的列几乎没有额外开销。
+
+    Args:
+        series: 原始列
+        result: 对该列的解析结果
+        top: 返回的无法解析文本个数
+
+    Returns:
+        ParseReport: 错误汇总
+
+    Examples:
+        >>> s = pd.Series(["1w", "暂无", "暂无", None])
+        >>> str(summarize_errors(s, parse_sales_column(s)))
+        "4行, 缺失1, 占位符2, 常见无法解析值: '暂无'×2"
+    """
+    counts = np.bincount(result.errors, minlength=len(ERROR_LABELS))
+    bad = series[result.failed]
+    return ParseReport(
+        rows=len(series),
+        counts={ERROR_LABELS[code]: int(n) for code, n in enumerate(counts) if code and n},
+        top_tokens=list(bad.astype(str).value_counts().head(top).items()),
+    )
+
+
+def merge_reports(reports: list[ParseReport], top: int = 5) -> ParseReport:
+    """
+    合并分块（或分区）解析的错误汇总
+
+    行数和各类错误行数精确相加；每块只保留了最常见的几个无法解析文本，
+    合并后的 top_tokens 是近似结果。
+
+    Args:
+        reports: 各块的 ParseReport
+        top: 返回的无法解析文本个数
+
+    Returns:
+        ParseReport: 合并后的错误汇总
+    """
+    counts = dict.fromkeys(ERROR_LABELS.values(), 0)
+    tokens: Counter = Counter()
+    for report in reports:
+        for label, n in report.counts.items():
+            counts[label] += n
+        tokens.update(dict(report.top_tokens))
+    return ParseReport(
+        rows=sum(report.rows for report in reports),
+        counts={label: n for label, n in counts.items() if n},
+        top_tokens=tokens.most_common(top),
+    )
+
+
+def _check_policy(how: str) -> None:
+    if how not in RANGE_POLICIES:
+        raise ValueError(f"未知的区间取值策略: {how}，可选: {RANGE_POLICIES}")
+
+
+def _check_percent_unit(name: str, value: str) -> None:
+    if value not in PERCENT_UNITS:
+        raise ValueError(f"未知的{name}: {value}，可选: {PERCENT_UNITS}")
+
+
+def _unit_multiplier(units: pd.Series) -> np.ndarray:
+    """把单位列映射为乘数数组，无单位为 1"""
+    return units.str.lower().map(_UNIT_SCALE).fillna(1.0).to_numpy(dtype="float64")
+
+
+def _is_numeric(series: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def _numeric_fast_path(series: pd.Series) -> tuple[np.ndarray, np.ndarray] | None:
+    """纯数值列直接返回，不做字符串解析"""
+    if _is_numeric(series):
+        values = series.to_numpy(dtype="float64", na_value=np.nan, copy=True)
+        return values, np.where(np.isnan(values), PARSE_MISSING, PARSE_OK).astype(np.uint8)
+    return None
+
+
+def _unique_errors(uniques: pd.Series, values: np.ndarray, missing: np.ndarray) -> np.ndarray:
+    """唯一值的错误码：解析失败的文本按是否含数字区分占位符和无法解析（如 '第3名'）"""
+    errors = np.where(missing, PARSE_MISSING, PARSE_OK).astype(np.uint8)
+    bad = np.isnan(values) & ~missing
+    if bad.any():
+        has_digit = uniques[bad].astype(str).str.contains(r"\d").to_numpy(dtype=bool)
+        errors[bad] = np.where(has_digit, PARSE_INVALID, PARSE_PLACEHOLDER)
+    return errors
+
+
+def _broadcast(codes: np.ndarray, values: np.ndarray, errors: np.ndarray) -> ColumnParseResult:
+    """把唯一值的解析结果按 factorize 编码广播回整列，编码 -1 为缺失"""
+    values = np.append(values, np.nan)[codes]
+    errors = np.append(errors, np.uint8(PARSE_MISSING))[codes]
+    return _make_result(values, errors)
+
+
+def sniff_format(
+    series: pd.Series, kind: str, sample_size: int = 200, min_share: float = 0.8
+) -> str:
+    """
+    抽样判断列的主要格式
+
+    Args:
+        series: 原始列
+        kind: 'sales' 或 'percent'
+        sample_size: 抽样行数（等距抽样）
+        min_share: 主要格式在样本中的最低占比，低于该值判为 'mixed'
+
+    Returns:
+        str: 'numeric'、'mixed' 或 _SALES_FORMATS / _PERCENT_FORMATS 中的格式名，
+            多个格式占比相同时取靠前的（更简单的）格式
+    """
+    formats = _FORMATS[kind]
+    if _is_numeric(series):
+        return FORMAT_NUMERIC
+
+    sample = series.dropna()
+    sample = sample.iloc[:: max(1, len(sample) // sample_size)].astype(str).str.strip()
+    if sample.empty:
+        return FORMAT_MIXED
+
+    shares = {name: sample.str.fullmatch(pat).mean() for name, pat in formats.items()}
+    best = max(shares, key=shares.get)
+    return best if shares[best] >= min_share else FORMAT_MIXED
+
+
+def _bound_values(parts: pd.Series, suffixes: dict[str, float]) -> np.ndarray:
+    """
+    解析 '7.5w'、'20%'、'5000' 这类单个边界值，不用正则
+
+    末尾字符在 suffixes 中则作为单位，剩余部分必须是普通小数，否则为 NaN
+    （交由通用解析处理）。
+    """
+    parts = parts.fillna("").str.strip()
+    scale = parts.str[-1:].str.lower().map(suffixes)
+    num = parts.where(scale.isna(), parts.str[:-1]).str.strip()
+    valid = num.str.replace(".", "", n=1, regex=False).str.isdigit() & ~num.str.endswith(".")
+    values = pd.to_numeric(num.where(valid), errors="coerce").to_numpy(dtype="float64")
+    return values * scale.fillna(1.0).to_numpy(dtype="float64")
+
+
+def _range_kernel(text: pd.Series, suffixes: dict[str, float], how: str) -> np.ndarray:
+    """单一 'a~b' / 'a-b' 区间格式的专用解析，不匹配的行为 NaN"""
+    parts = text.str.replace("-", "~", regex=False).str.split("~", n=1, expand=True)
+    if parts.shape[1] < 2:
+        return np.full(len(text), np.nan)
+    lo = _bound_values(parts[0], suffixes)
+    hi = _bound_values(parts[1], suffixes)
+    values = lo if how == "lower" else (lo + hi) / 2
+    return np.where(np.isnan(hi), np.nan, values)
+
+
+def _with_fallback(
+    text: pd.Series, kernel_values: np.ndarray, general: Callable[[pd.Series], np.ndarray]
+) -> np.ndarray:
+    """专用解析失败的行交给通用解析"""
+    bad = np.isnan(kernel_values)
+    if bad.any():
+        kernel_values[bad] = general(text[bad])
+    return kernel_values
+
+
+def _cached_parse(
+    owner: Callable, option: str, text: pd.Series, parse: Callable[[pd.Series], np.ndarray]
+) -> np.ndarray:
+    """先查跨运行词表缓存，只解析未命中的文本并记录结果"""
+    cache = get_vocab_cache()
+    if cache is None or text.empty:
+        return parse(text)
+
+    namespace = f"{owner.__name__}:{option}"
+    version = converter_version(owner, option)
+    tokens = text.tolist()
+    cached, hit = cache.lookup(namespace, version, tokens)
+    values = np.array(cached, dtype="float64")
+
+    miss = ~hit
+    if miss.any():
+        parsed = parse(text[miss])
+        values[miss] = parsed
+        cache.record(namespace, version, text[miss].tolist(), parsed)
+    return values
+
+
+def _split_blank(
+    uniques: pd.Series, values: np.ndarray
+) -> tuple[pd.Series, np.ndarray, np.ndarray]:
+    """取出 to_numeric 未能转换的文本，并标记其中的空值文本"""
+    todo = np.isnan(values)
+    text = uniques[todo].astype(str).str.strip()
+    missing = np.zeros(len(values), dtype=bool)
+    missing[todo] = text.str.lower().isin(_MISSING_TOKENS).to_numpy()
+    return text[~missing[todo]], todo & ~missing, missing
+
+
+def _parse_sales_regex(text: pd.Series, how: str) -> np.ndarray:
+    """用整列正则解析销量文本（通用解析）"""
+    text = text.str.replace("，", ",", regex=False).str.replace(_THOUSANDS_PAT, "", regex=True)
+    parts = text.str.extract(_SALES_PAT)
+
+    lo = pd.to_numeric(parts["lo"], errors="coerce").to_numpy(dtype="float64")
+    lo *= _unit_multiplier(parts["lo_unit"])
+    if how == "lower":
+        return lo
+    hi = pd.to_numeric(parts["hi"], errors="coerce").to_numpy(dtype="float64")
+    hi *= _unit_multiplier(parts["hi_unit"])
+    return np.where(np.isnan(hi), lo, (lo + hi) / 2)
+
+
+def _parse_sales_text(text: pd.Series, how: str, fmt: str | None) -> np.ndarray:
+    """解析销量文本：已知格式先走专用解析，不匹配的行再用通用解析"""
+    general = partial(_parse_sales_regex, how=how)
+    if fmt == "unit":
+        kernel = _bound_values(text, _UNIT_SCALE)
+    elif fmt == "range":
+        kernel = _range_kernel(text, _UNIT_SCALE, how)
+    else:
+        return general(text)
+    return _with_fallback(text, kernel, general)
+
+
+def _parse_sales_uniques(
+    uniques: pd.Series, how: str, fmt: str | None
+) -> tuple[np.ndarray, np.ndarray]:
+    """解析去重后的销量值"""
+    values = pd.to_numeric(uniques, errors="coerce").to_numpy(
+        dtype="float64", na_value=np.nan, copy=True
+    )
+    text, todo, missing = _split_blank(uniques, values)
+    if todo.any():
+        values[todo] = _cached_parse(
+            parse_sales_column, how, text, partial(_parse_sales_text, how=how, fmt=fmt)
+        )
+    return values, _unique_errors(uniques, values, missing)
+
+
+def parse_sales_column(
+    series: pd.Series, how: str = "mean", fmt: str | None = None
+) -> ColumnParseResult:
+    """
+    整列解析销量字段
+
+    先 factorize 去重，只解析唯一值：纯数字用 pd.to_numeric 一次性转换，
+    其余文本用整列正则整格匹配数字、单位和区间上下限（有多余文本的记为无法
+    解析），再用 NumPy 完成单位换算和区间取值，最后按编码广播回整列。
+
+    Args:
+        series: 原始销量列，如 '7.5w~10w'、'3k-5k'、'1.2万'、5000
+        how: 区间取值策略，'mean' 取均值，'lower' 取下限
+        fmt: sniff_format 得到的列格式，给出时先用该格式的专用解析，
+            不匹配的行再用通用解析；None 时直接用通用解析
+
+    Returns:
+        ColumnParseResult: (values, failed, errors)，values 为 float64 数组，
+            脏数据不会抛出异常，只记为 NaN 并写入逐行错误码
+
+    Examples:
+        >>> parse_sales_column(pd.Series(["7.5w~10w", "3k-5k", "暂无"])).values
+        array([87500.,  4000.,    nan])
+    """
+    _check_policy(how)
+    fast = _numeric_fast_path(series)
+    if fast is not None:
+        return _make_result(*fast)
+
+    codes, uniques = pd.factorize(series)
+    values, errors = _parse_sales_uniques(pd.Series(uniques, dtype=object), how, fmt)
+    return _broadcast(codes, values, errors)
+
+
+def _parse_percent_regex(text: pd.Series, how: str) -> np.ndarray:
+    """用整列正则解析百分比文本（通用解析），返回百分点"""
+    parts = text.str.extract(_PERCENT_PAT)
+    lo = pd.to_numeric(parts["lo"], errors="coerce").to_numpy(dtype="float64")
+    if how == "lower":
+        return lo
+    hi = pd.to_numeric(parts["hi"], errors="coerce").to_numpy(dtype="float64")
+    return np.where(np.isnan(hi), lo, (lo + hi) / 2)
+
+
+def _parse_percent_text(text: pd.Series, how: str, bare: str, fmt: str | None) -> np.ndarray:
+    """解析百分比文本，返回百分点"""
+    general = partial(_parse_percent_regex, how=how)
+    if fmt == "percent":
+        points = _with_fallback(text, _bound_values(text, _PERCENT_SUFFIX), general)
+    elif fmt == "percent_range":
+        points = _with_fallback(text, _range_kernel(text, _PERCENT_SUFFIX, how), general)
+    else:
+        points = general(text)
+
+    # 不带 % 的裸数字按 bare 解释
+    if bare == "fraction":
+        has_sign = text.str.contains("%", regex=False).to_numpy()
+        points = np.where(has_sign, points, points * 100)
+    return points
+
+
+def _parse_percent_uniques(
+    uniques: pd.Series, how: str, bare: str, fmt: str | None
+) -> tuple[np.ndarray, np.ndarray]:
+    """解析去重后的百分比值，统一返回百分点（'20%' → 20.0）"""
+    points = pd.to_numeric(uniques, errors="coerce").to_numpy(
+        dtype="float64", na_value=np.nan, copy=True
+    )
+    if bare == "fraction":
+        points *= 100
+    text, todo, missing = _split_blank(uniques, points)
+    if todo.any():
+        points[todo] = _cached_parse(
+            parse_percent_column,
+            f"{how}/{bare}",
+            text,
+            partial(_parse_percent_text, how=how, bare=bare, fmt=fmt),
+        )
+    return points, _unique_errors(uniques, points, missing)
+
+
+def parse_percent_column(
+    series: pd.Series,
+    how: str = "mean",
+    unit: str = "fraction",
+    bare: str = "percent",
+    fmt: str | None = None,
+) -> ColumnParseResult:
+    """
+    整列解析佣金比例、转化率等百分比字段
+
+    与 parse_sales_column 相同，先 factorize 去重再用整列正则抽取区间上下限，
+    不对单元格逐个调用 float()，也不会因为脏数据抛出异常。
+
+    Args:
+        series: 原始百分比列，如 '20.00%'、'10%~15%'、'5-10%'、12
+        how: 区间取值策略，'mean' 取均值，'lower' 取下限
+        unit: 输出单位，'fraction' 为 0-1 小数，'percent' 为百分点
+        bare: 不带 % 的数字如何解释，'percent' 视为百分点（12 → 12%），
+            'fraction' 视为小数（0.12 → 12%）
+        fmt: sniff_format 得到的列格式，含义同 parse_sales_column
+
+    Returns:
+        ColumnParseResult: (values, failed, errors)，values 为 float64 数组，
+            脏数据不会抛出异常，只记为 NaN 并写入逐行错误码
+
+    Examples:
+        >>> parse_percent_column(pd.Series(["20.00%", "10%~15%", "5-10%"])).values
+        array([0.2  , 0.125, 0.075])
+        >>> parse_percent_column(pd.Series(["10%~15%"]), how="lower", unit="percent").values
+        array([10.])
+    """
+    _check_policy(how)
+    _check_percent_unit("输出单位", unit)
+    _check_percent_unit("裸数字解释方式", bare)
+
+    fast = _numeric_fast_path(series)
+    if fast is not None:
+        points, errors = fast
+        if bare == "fraction":
+            points *= 100
+    else:
+        codes, uniques = pd.factorize(series)
+        points, errors = _parse_percent_uniques(
+            pd.Series(uniques, dtype=object), how, bare, fmt
+        )
+        points, _, errors = _broadcast(codes, points, errors)
+
+    values = points / 100 if unit == "fraction" else points
+    return _make_result(values, errors)
@@ -2,6 +2,13 @@ import re
 from typing import Union
 
 import numpy as np
+import pandas as pd
+
+from douyin_ecom_analyzer.cleaning.columnar import (
+    ColumnParseResult,
+    parse_percent_column,
+    parse_sales_column,
+)
 
 
 def _to_num(token: str) -> float:
@@ -18,6 +25,11 @@ def range_mid(text: str) -> float:
     return float(np.mean(nums))
 
 
+def range_mid_result(series: pd.Series) -> ColumnParseResult:
+    """整列版 range_mid 的批量模式：不抛异常，返回逐行错误码"""
+    return parse_sales_column(series, how="mean")
+
+
 # 佣金比例转换（百分比转小数）
 def commission_to_float(text: str) -> float:
     """'20.00%' → 0.2；'10%~15%' → 0.125"""
@@ -40,3 +52,13 @@ def conversion_to_float(text: Union[str, float]) -> float:
     if isinstance(text, str) and "%" in text:
         return float(text.replace("%", "")) / 100
     return float(text)
+
+
+def commission_result(series: pd.Series) -> ColumnParseResult:
+    """整列版 commission_to_float 的批量模式：不抛异常，返回逐行错误码"""
+    return parse_percent_column(series, how="mean", unit="fraction", bare="percent")
+
+
+def conversion_result(series: pd.Series) -> ColumnParseResult:
+    """整列版 conversion_to_float 的批量模式：不抛异常，返回逐行错误码"""
+    return parse_percent_column(series, how="mean", unit="fraction", bare="fraction")
@@ -1,13 +1,27 @@
 """
 过滤引擎模块：用于根据规则过滤数据框
+
+规则中的列通过逻辑字段引用，按数据框的列名绑定到 值、_num、_清洗 或 _val
+列（见 binding），各清洗流程的结果都可以直接过滤。
 """
 from __future__ import annotations
-import re
+import hashlib
+from collections import OrderedDict
+import json
 import yaml
 import pandas as pd
 import numpy as np
 from pathlib import Path
 from functools import lru_cache
+from typing import Any, Callable, NamedTuple
+
+from douyin_ecom_analyzer.cleaning.binding import (
+    RATE_FRACTION,
+    ColumnBinding,
+    bind_columns,
+    rule_rate_unit,
+)
+from douyin_ecom_analyzer.cleaning.keywords import get_keyword_matcher
 
 _RULE_PATH = Path("filter_rules.yaml")
 
@@ -35,10 +49,287 @@ def load_rules() -> dict:
     """
     return _load_rules(_RULE_PATH.stat().st_mtime)
 
+# 谓词单行的相对代价：正则匹配远比数值比较慢
+_NUMERIC_COST = 1.0
+_TEXT_COST = 25.0
+
+# 首次执行时估计选择率的抽样行数，以及后续用实测通过率更新估计的权重
+_SAMPLE_ROWS = 2000
+_SELECTIVITY_ALPHA = 0.5
+
+
+class _Predicate(NamedTuple):
+    """编译后的单条过滤条件"""
+
+    name: str
+    func: Callable[[Callable[[str], pd.Series]], Any]  # 传入按存活行取列的函数，返回布尔列
+    cost: float
+
+
+def _compile_predicates(r: dict, binding: ColumnBinding) -> list[_Predicate]:
+    """
+    把规则字典编译为谓词列表，列名和比例阈值的单位按绑定确定
+
+    规则引用的字段没有绑定到列时跳过该规则，不补默认列。比例阈值默认为 0-1
+    小数（filter_rules.yaml），规则可用 unit: percent 声明为百分点。
+    """
+    predicates: list[_Predicate] = []
+    unit = rule_rate_unit(r, RATE_FRACTION)
+
+    # 销量过滤
+    if "sales" in r and "last_7d_min" in r["sales"] and "sales_7d" in binding:
+        c7, v7 = binding.column("sales_7d"), r["sales"]["last_7d_min"]
+        predicates.append(
+            _Predicate("近7天销量", lambda col: col(c7) >= v7, _NUMERIC_COST)
+        )
+    if "sales" in r and "last_30d_min" in r["sales"] and "sales_30d" in binding:
+        c30, v30 = binding.column("sales_30d"), r["sales"]["last_30d_min"]
+        predicates.append(
+            _Predicate("近30天销量", lambda col: col(c30) >= v30, _NUMERIC_COST)
+        )
+
+    # 佣金和转化率过滤：佣金率高于最低要求 或 零佣金但转化率高
+    commission = r.get("commission")
+    if (
+        commission and "min_rate" in commission and "zero_rate_conversion_min" in commission
+        and binding.has("commission", "conversion")
+    ):
+        rate_col, conv_col = binding.column("commission"), binding.column("conversion")
+        min_rate = binding.threshold("commission", commission["min_rate"], unit)
+        zero_min = binding.threshold("conversion", commission["zero_rate_conversion_min"], unit)
+
+        def commission_ok(col):
+            rate = col(rate_col)
+            return (rate >= min_rate) | ((rate == 0) & (col(conv_col) >= zero_min))
+
+        predicates.append(_Predicate("佣金", commission_ok, 2 * _NUMERIC_COST))
+
+    # 转化率过滤
+    if "conversion" in r and "min_rate" in r["conversion"] and "conversion" in binding:
+        conv_col = binding.column("conversion")
+        conv = binding.threshold("conversion", r["conversion"]["min_rate"], unit)
+        predicates.append(
+            _Predicate("转化率", lambda col: col(conv_col) >= conv, _NUMERIC_COST)
+        )
+
+    # KOL数量过滤
+    if "influencer" in r and "min_count" in r["influencer"] and "influencer" in binding:
+        kol_col, kol = binding.column("influencer"), r["influencer"]["min_count"]
+        predicates.append(
+            _Predicate("关联达人", lambda col: col(kol_col) >= kol, _NUMERIC_COST)
+        )
+
+    # 类别黑名单过滤：排除包含黑名单关键词的商品（按字面匹配，不区分大小写）
+    if (
+        "categories" in r and "blacklist" in r["categories"] and r["categories"]["blacklist"]
+        and "name" in binding
+    ):
+        name_col = binding.column("name")
+        matcher = get_keyword_matcher(map(str, r["categories"]["blacklist"]))
+        predicates.append(_Predicate(
+            "类别黑名单", lambda col: ~matcher.contains(col(name_col)), _TEXT_COST
+        ))
+
+    return predicates
+
+
+class FilterPlan:
+    """
+    编译后的过滤计划
+
+    规则按数据框的列绑定编译，同一规则、同一模式只编译一次。执行时按选择率
+    从高到低（淘汰行多、代价低的条件在前）依次求值，后面的条件只在仍然存活
+    的行上计算。选择率首次执行时抽样估计，之后用每次执行的实测通过率更新，
+    同一规则的后续调用复用这些统计。
+    """
+
+    def __init__(self, rules: dict, rules_hash: str = ""):
+        """
+        初始化过滤计划
+
+        Args:
+            rules: 过滤规则字典
+            rules_hash: 规则内容哈希，见 compile_rules
+        """
+        self.rules = rules
+        self.rules_hash = rules_hash
+        # 列绑定 → 编译后的谓词（绑定按列名缓存，同一模式是同一个对象）
+        self._compiled: dict[ColumnBinding, list[_Predicate]] = {}
+        # 谓词名 → 估计的通过率
+        self.selectivity: dict[str, float] = {}
+
+    def predicates(self, binding: ColumnBinding) -> list[_Predicate]:
+        """按列绑定编译的谓词，缺列的规则已跳过"""
+        predicates = self._compiled.get(binding)
+        if predicates is None:
+            predicates = self._compiled[binding] = _compile_predicates(self.rules, binding)
+        return predicates
+
+    def _order(self, predicates: list[_Predicate]) -> list[_Predicate]:
+        # 经典的谓词排序：按 代价 / 淘汰率 从小到大
+        def rank(p: _Predicate) -> float:
+            return p.cost / max(1.0 - self.selectivity.get(p.name, 0.5), 1e-3)
+
+        return sorted(predicates, key=rank)
+
+    def _estimate(self, column, n: int, predicates: list[_Predicate]) -> None:
+        sample = np.unique(np.linspace(0, n - 1, min(n, _SAMPLE_ROWS)).astype(np.int64))
+        for p in predicates:
+            if p.name not in self.selectivity:
+                keep = p.func(lambda name: column(name).iloc[sample])
+                self.selectivity[p.name] = float(np.mean(np.asarray(keep, dtype=bool)))
+
+    def mask_positions(self, df: pd.DataFrame, columns: dict | None = None) -> np.ndarray:
+        """
+        求满足全部条件的行位置，不修改也不复制 df
+
+        Args:
+            df: 要过滤的数据框，只读
+            columns: coerce_columns 的结果，为 None 时现算
+
+        Returns:
+            np.ndarray: 满足条件的行位置（升序）
+        """
+        binding = bind_columns(df.columns)
+        if columns is None:
+            columns = coerce_columns(df, binding)
+
+        def column(name: str) -> pd.Series:
+            return columns[name] if name in columns else df[name]
+
+        alive = np.arange(len(df))
+        active = self.predicates(binding)
+        if not active or not len(df):
+            return alive
+
+        self._estimate(column, len(df), active)
+        for p in self._order(active):
+            keep = np.asarray(
+                p.func(lambda name, rows=alive: column(name).iloc[rows]), dtype=bool
+            )
+            rate = float(keep.mean())
+            self.selectivity[p.name] = (
+                _SELECTIVITY_ALPHA * rate + (1 - _SELECTIVITY_ALPHA) * self.selectivity[p.name]
+            )
+            alive = alive[keep]
+            if not len(alive):
+                break
+        return alive
+
+    def mask(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        求满足全部条件的行，不修改也不复制 df
+
+        Args:
+            df: 要过滤的数据框，只读
+
+        Returns:
+            np.ndarray: bool 数组，与 df 的行一一对应
+        """
+        keep = np.zeros(len(df), dtype=bool)
+        keep[self.mask_positions(df)] = True
+        return keep
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        执行过滤
+
+        Args:
+            df: 要过滤的数据框
+
+        Returns:
+            pd.DataFrame: 过滤后的数据框，与 filter_dataframe 的结果相同
+        """
+        columns = coerce_columns(df)
+        return take_rows(df, self.mask_positions(df, columns), columns)
+
+
+# 规则内容哈希 → 过滤计划，超过上限时淘汰最久未使用的
+_PLAN_CACHE: OrderedDict[str, FilterPlan] = OrderedDict()
+_PLAN_CACHE_SIZE = 32
+
+
+def compile_rules(rules: dict) -> FilterPlan:
+    """
+    按规则内容哈希编译并缓存过滤计划，内容相同的规则复用同一个计划
+
+    Args:
+        rules: 过滤规则字典
+
+    Returns:
+        FilterPlan: 过滤计划
+    """
+    rules_json = json.dumps(rules, sort_keys=True, ensure_ascii=False, default=str)
+    rules_hash = hashlib.sha1(rules_json.encode("utf-8")).hexdigest()
+    plan = _PLAN_CACHE.get(rules_hash)
+    if plan is not None:
+        _PLAN_CACHE.move_to_end(rules_hash)
+        return plan
+    if len(_PLAN_CACHE) >= _PLAN_CACHE_SIZE:
+        _PLAN_CACHE.popitem(last=False)
+    plan = _PLAN_CACHE[rules_hash] = FilterPlan(rules, rules_hash)
+    return plan
+
+
+def coerce_columns(df: pd.DataFrame, binding: ColumnBinding | None = None) -> dict[str, pd.Series]:
+    """
+    求过滤所需列统一类型后的值，不修改也不复制 df
+
+    写时复制：绑定的数值列无法转换的值记为 0、商品名称转为字符串，只有确实
+    需要转换的列才生成新列，已经是数值且无空值的列、已经全是字符串的商品名称
+    直接使用原列。
+
+    Args:
+        df: 原始数据框，只读
+        binding: df 的列绑定，为 None 时按 df.columns 获取
+
+    Returns:
+        dict: 列名 → 转换后的列，只包含需要转换的列
+    """
+    binding = binding or bind_columns(df.columns)
+    columns: dict[str, pd.Series] = {}
+
+    # 确保数值列是数值类型
+    for col in binding.numeric_columns():
+        values = df[col]
+        if not (pd.api.types.is_numeric_dtype(values) and not values.hasnans):
+            columns[col] = pd.to_numeric(values, errors='coerce').fillna(0)
+
+    # 确保商品名称列是字符串类型
+    if "name" in binding:
+        col = binding.column("name")
+        names = df[col]
+        if not (names.dtype == object and pd.api.types.infer_dtype(names) == "string"
+                and not names.hasnans):
+            columns[col] = names.astype(str)
+    return columns
+
+
+def take_rows(df: pd.DataFrame, positions: np.ndarray, columns: dict | None = None) -> pd.DataFrame:
+    """
+    取出指定行并写回转换后的列，只复制被取出的行
+
+    Args:
+        df: 原始数据框
+        positions: 行位置，如 FilterPlan.mask_positions 的结果
+        columns: coerce_columns 的结果
+
+    Returns:
+        pd.DataFrame: 新的数据框，索引从 0 开始
+    """
+    result = df.take(positions)
+    result.index = pd.RangeIndex(len(result))
+    for col, values in (columns or {}).items():
+        result[col] = values.iloc[positions].array
+    return result
+
+
 def filter_dataframe(df: pd.DataFrame, rules: dict | None = None) -> pd.DataFrame:
     """
     根据规则过滤数据框
 
+    规则编译为 FilterPlan 并按内容哈希缓存，见 compile_rules。
+
     Args:
         df: 要过滤的数据框
         rules: 过滤规则，如果为None则从文件加载
@@ -46,66 +337,35 @@ def filter_dataframe(df: pd.DataFrame, rules: dict | None = None) -> pd.DataFram
     Returns:
         pd.DataFrame: 过滤后的数据框
     """
-    r = rules or load_rules()
+    return compile_rules(rules or load_rules()).apply(df)
 
-    # 创建副本避免修改原始数据
-    df_copy = df.copy()
 
-    # 确保数值列是数值类型
-    numeric_cols = ["近7天销量值", "近30天销量值", "佣金比例值", "转化率值", "关联达人"]
-    for col in numeric_cols:
-        if col in df_copy.columns:
-            df_copy[col] = pd.to_numeric(df_copy[col], errors='coerce').fillna(0)
+def filter_mask(df: pd.DataFrame, rules: dict | None = None) -> np.ndarray:
+    """
+    求满足规则的行，不复制数据框，需要时再用 df[mask] 或 take_rows 取出
 
-    # 确保商品名称列是字符串类型
-    if "商品名称" in df_copy.columns:
-        df_copy["商品名称"] = df_copy["商品名称"].astype(str)
-
-    # 构建过滤条件
-    cond = pd.Series(True, index=df_copy.index)
-
-    # 销量过滤 - 优先使用_num列
-    if "近7天销量_num" in df_copy.columns and "sales" in r and "last_7d_min" in r["sales"]:
-        cond &= df_copy["近7天销量_num"] >= r["sales"]["last_7d_min"]
-    elif "近7天销量值" in df_copy.columns and "sales" in r and "last_7d_min" in r["sales"]:
-        cond &= df_copy["近7天销量值"] >= r["sales"]["last_7d_min"]
-
-    if "近30天销量_num" in df_copy.columns and "sales" in r and "last_30d_min" in r["sales"]:
-        cond &= df_copy["近30天销量_num"] >= r["sales"]["last_30d_min"]
-    elif "近30天销量值" in df_copy.columns and "sales" in r and "last_30d_min" in r["sales"]:
-        cond &= df_copy["近30天销量值"] >= r["sales"]["last_30d_min"]
-
-    # 佣金和转化率过滤 - 优先使用_num列
-    if "佣金比例_num" in df_copy.columns and "commission" in r:
-        if "min_rate" in r["commission"] and "转化率_num" in df_copy.columns and "zero_rate_conversion_min" in r["commission"]:
-            # 佣金率高于最低要求 或 零佣金但转化率高
-            cond &= (
-                (df_copy["佣金比例_num"] >= r["commission"]["min_rate"]) |
-                ((df_copy["佣金比例_num"] == 0) & (df_copy["转化率_num"] >= r["commission"]["zero_rate_conversion_min"]))
-            )
-    elif "佣金比例值" in df_copy.columns and "commission" in r:
-        if "min_rate" in r["commission"] and "转化率值" in df_copy.columns and "zero_rate_conversion_min" in r["commission"]:
-            # 佣金率高于最低要求 或 零佣金但转化率高
-            cond &= (
-                (df_copy["佣金比例值"] >= r["commission"]["min_rate"]) |
-                ((df_copy["佣金比例值"] == 0) & (df_copy["转化率值"] >= r["commission"]["zero_rate_conversion_min"]))
-            )
+    Args:
+        df: 要过滤的数据框，只读
+        rules: 过滤规则，如果为None则从文件加载
+
+    Returns:
+        np.ndarray: bool 数组，与 df 的行一一对应
+    """
+    return compile_rules(rules or load_rules()).mask(df)
 
-    # 转化率过滤 - 优先使用_num列
-    if "转化率_num" in df_copy.columns and "conversion" in r and "min_rate" in r["conversion"]:
-        cond &= df_copy["转化率_num"] >= r["conversion"]["min_rate"]
-    elif "转化率值" in df_copy.columns and "conversion" in r and "min_rate" in r["conversion"]:
-        cond &= df_copy["转化率值"] >= r["conversion"]["min_rate"]
 
-    # KOL数量过滤
-    if "关联达人" in df_copy.columns and "influencer" in r and "min_count" in r["influencer"]:
-        cond &= df_copy["关联达人"] >= r["influencer"]["min_count"]
+def blacklist_matches(df: pd.DataFrame, rules: dict | None = None) -> pd.Series:
+    """
+    求每行命中的类别黑名单关键词，用于说明商品被排除的原因
 
-    # 类别黑名单过滤
-    if "商品名称" in df_copy.columns and "categories" in r and "blacklist" in r["categories"] and r["categories"]["blacklist"]:
-        blacklist_pattern = "|".join(r["categories"]["blacklist"])
-        # 黑名单模式：排除包含黑名单关键词的商品
-        cond &= ~df_copy["商品名称"].str.contains(blacklist_pattern, case=False, na=False)
+    Args:
+        df: 包含商品名称列的数据框
+        rules: 过滤规则，如果为None则从文件加载
 
-    # 应用过滤条件并返回结果
-    return df_copy.loc[cond].reset_index(drop=True)
+    Returns:
+        pd.Series: 命中的关键词，未命中为 None
+    """
+    r = rules or load_rules()
+    blacklist = r.get("categories", {}).get("blacklist") or []
+    names = df["商品名称"].astype(str)
+    return get_keyword_matcher(map(str, blacklist)).match(names)
@@ -0,0 +1,208 @@
+"""
+多关键词匹配模块：Aho-Corasick 自动机，一次扫描同时匹配全部关键词
+
+关键词按字面匹配（不是正则），含 ( ) + * 等字符的类目名也能正确匹配。
+每个文本只扫描一遍，耗时与文本长度成正比，不随关键词个数增长。
+
+CPython 的正则引擎是 C 实现，关键词少时转义后的正则分支比纯 Python 的
+自动机更快；分支匹配的耗时随关键词个数线性增长，实测 200~300 个时两者持平。
+因此关键词不超过 REGEX_MAX_KEYWORDS 个时用预编译正则，否则用自动机，
+两种方式的匹配结果相同。
+"""
+
+from __future__ import annotations
+
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Any, Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+# 关键词不超过该个数时用转义后的预编译正则匹配
+REGEX_MAX_KEYWORDS = 200
+
+
+class KeywordMatcher:
+    """
+    关键词自动机，构建一次后可反复匹配
+    """
+
+    def __init__(self, keywords: Iterable[str], case: bool = False):
+        """
+        构建自动机
+
+        Args:
+            keywords: 关键词，空字符串和非字符串会被忽略
+            case: 是否区分大小写
+        """
+        self.case = case
+        self.keywords = list(dict.fromkeys(k for k in keywords if isinstance(k, str) and k))
+        # 统一大小写后的关键词 → 原始写法
+        self._by_folded = {}
+        for keyword in self.keywords:
+            self._by_folded.setdefault(self._fold(keyword), keyword)
+
+        self._regex = None
+        if len(self._by_folded) <= REGEX_MAX_KEYWORDS:
+            # 长的在前，同一位置优先匹配较长的关键词
+            folded = sorted(self._by_folded, key=len, reverse=True)
+            self._regex = re.compile("|".join(map(re.escape, folded))) if folded else None
+
+        # 字典树：goto[状态] 为 字符 → 下一状态，word[状态] 为在该状态结束的关键词，
+        # depth[状态] 为从根到该状态的字符数
+        goto: list[dict[str, int]] = [{}]
+        word: list[str | None] = [None]
+        depth = [0]
+        for folded, keyword in self._by_folded.items() if self._regex is None else ():
+            state = 0
+            for ch in folded:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto.append({})
+                    word.append(None)
+                    depth.append(depth[state] + 1)
+                    goto[state][ch] = nxt
+                state = nxt
+            word[state] = keyword
+
+        # 按层遍历设置失败指针；输出指针指向失败链上最近的关键词结束状态，
+        # 用于找出在同一位置结束的较短关键词
+        fail = [0] * len(goto)
+        output = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                if state:  # 第一层的失败指针为根
+                    f = fail[state]
+                    while f and ch not in goto[f]:
+                        f = fail[f]
+                    fail[nxt] = goto[f].get(ch, 0)
+                f = fail[nxt]
+                output[nxt] = f if word[f] is not None else output[f]
+                queue.append(nxt)
+
+        self._goto = goto
+        self._fail = fail
+        self._word = word
+        self._depth = depth
+        self._output = output
+        self._max_len = max(depth)
+
+    def _fold(self, text: str) -> str:
+        return text if self.case else text.lower()
+
+    def find(self, text: Any) -> str | None:
+        """
+        返回文本中最靠左的关键词，同一位置有多个时取最长的
+
+        Args:
+            text: 待匹配文本，非字符串视为不匹配
+
+        Returns:
+            str | None: 匹配到的关键词（原始写法），未匹配返回 None
+
+        Examples:
+            >>> KeywordMatcher(["库洛米", "HelloKitty"]).find("hellokitty 水杯")
+            'HelloKitty'
+        """
+        if not isinstance(text, str) or not self.keywords:
+            return None
+        if self._regex is not None:
+            m = self._regex.search(self._fold(text))
+            return self._by_folded[m.group(0)] if m else None
+        goto, fail, word, depth, output = (
+            self._goto, self._fail, self._word, self._depth, self._output
+        )
+        state = 0
+        best_start, best_len, best = -1, 0, None
+        for i, ch in enumerate(self._fold(text)):
+            nxt = goto[state].get(ch)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto[state].get(ch)
+            state = nxt or 0
+
+            # 取最靠左、同一起点最长的关键词，与正则分支按长度降序匹配的结果一致
+            s = state if word[state] is not None else output[state]
+            while s:
+                start = i - depth[s] + 1
+                if best is None or start < best_start or (
+                    start == best_start and depth[s] > best_len
+                ):
+                    best_start, best_len, best = start, depth[s], word[s]
+                s = output[s]
+            # 更靠左的关键词最晚在这里结束
+            if best is not None and i >= best_start + self._max_len - 1:
+                break
+        return best
+
+    def match(self, series: pd.Series) -> pd.Series:
+        """
+        整列匹配，返回每行匹配到的关键词
+
+        先 factorize 去重，每个唯一文本只扫描一次。
+
+        Args:
+            series: 文本列
+
+        Returns:
+            Series: 匹配到的关键词，未匹配和空值为 None
+        """
+        codes, uniques = pd.factorize(series)
+        found = np.array([self.find(text) for text in uniques] + [None], dtype=object)
+        return pd.Series(found[codes], index=series.index, name=series.name)
+
+    def hits(self, texts: Sequence[Any]) -> np.ndarray:
+        """
+        逐个判断文本是否包含任一关键词，不去重，适合已经去重的唯一值
+
+        Args:
+            texts: 文本序列，非字符串视为不匹配
+
+        Returns:
+            np.ndarray: bool 数组
+        """
+        if self._regex is not None:
+            search, fold = self._regex.search, self._fold
+            return np.fromiter(
+                (isinstance(t, str) and search(fold(t)) is not None for t in texts),
+                dtype=bool,
+                count=len(texts),
+            )
+        return np.fromiter((self.find(t) is not None for t in texts), dtype=bool, count=len(texts))
+
+    def contains(self, series: pd.Series) -> np.ndarray:
+        """
+        整列判断是否包含任一关键词
+
+        Args:
+            series: 文本列
+
+        Returns:
+            np.ndarray: bool 数组，空值为 False
+        """
+        codes, uniques = pd.factorize(series)
+        return np.append(self.hits(uniques), False)[codes]
+
+
+@lru_cache(maxsize=32)
+def _cached_matcher(keywords: tuple[str, ...], case: bool) -> KeywordMatcher:
+    return KeywordMatcher(keywords, case)
+
+
+def get_keyword_matcher(keywords: Iterable[str], case: bool = False) -> KeywordMatcher:
+    """
+    获取关键词自动机，同一组关键词只构建一次
+
+    Args:
+        keywords: 关键词列表，如 filter_rules.yaml 中的 categories.blacklist
+        case: 是否区分大小写
+
+    Returns:
+        KeywordMatcher: 缓存的自动机
+    """
+    return _cached_matcher(tuple(keywords), case)
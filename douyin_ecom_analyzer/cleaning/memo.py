@@ -0,0 +1,153 @@
+"""
+去重记忆化转换模块：按唯一值调用标量转换函数，再按编码广播回整列
+"""
+
+from __future__ import annotations
+
+import logging
+import operator
+from typing import Any, Callable, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from douyin_ecom_analyzer.cleaning.vocab_cache import converter_version, get_vocab_cache
+
+logger = logging.getLogger("data_cleaner")
+
+# 标量转换函数在脏数据上可能抛出的异常
+CONVERTER_ERRORS = (ValueError, TypeError, AttributeError)
+
+
+class ConversionStats(NamedTuple):
+    """去重转换统计"""
+
+    rows: int  # 总行数
+    non_null: int  # 非空行数
+    cardinality: int  # 唯一值个数，即实际调用转换函数的次数
+    failures: int  # 转换失败的唯一值个数
+    hit_ratio: float  # 由已解析唯一值直接复用的行占比
+    cache_hits: int = 0  # 由跨运行词表缓存直接得到的唯一值个数
+
+    def __str__(self) -> str:
+        return (
+            f"{self.rows}行, 非空{self.non_null}, 唯一值{self.cardinality}, "
+            f"失败{self.failures}, 命中率{self.hit_ratio:.2%}, 词表缓存命中{self.cache_hits}"
+        )
+
+
+def _converter_name(converter: Callable) -> str:
+    """转换函数名称，兼容 functools.partial"""
+    func = getattr(converter, "func", converter)
+    return getattr(func, "__name__", repr(converter))
+
+
+def factorize_exact(series: pd.Series) -> tuple[np.ndarray, list]:
+    """
+    object 列去重编码，类型不同的值不合并
+
+    pd.factorize 按 == 去重，True 与 1、1 与 1.0 会合并为同一个值；出现这种
+    情况时按 (类型, 值) 重新编码，uniques[codes] 与原列逐个相同（含类型）。
+
+    Args:
+        series: 待编码的列
+
+    Returns:
+        tuple: (编码数组，空值为 -1；唯一值列表)
+
+    Examples:
+        >>> factorize_exact(pd.Series([1, True, 1]))
+        (array([0, 1, 0]), [1, True])
+    """
+    codes, uniques = pd.factorize(series)
+    present = codes >= 0
+    original = series.to_numpy()[present]
+    restored = uniques.to_numpy()[codes[present]] if len(uniques) else original
+    if all(map(operator.is_, map(type, original), map(type, restored))):
+        return codes, list(uniques)
+    codes, pairs = pd.factorize(
+        pd.Series([(type(v), v) for v in original], dtype=object)
+    )
+    full = np.full(len(series), -1, dtype=codes.dtype)
+    full[present] = codes
+    return full, [v for _, v in pairs]
+
+
+def convert_unique(
+    series: pd.Series,
+    converter: Callable[[Any], Any],
+    errors: str = "raise",
+    persist: bool = False,
+) -> tuple[pd.Series, ConversionStats]:
+    """
+    用任意标量转换函数转换整列，每个唯一值只调用一次
+
+    先 pd.factorize 得到唯一值和编码数组，只对唯一值调用 converter，
+    再通过编码数组把结果广播回原列。空值不调用 converter，结果为 NaN。
+
+    Args:
+        series: 待转换的列
+        converter: 标量转换函数，如 range_to_mean、percent_to_float
+        errors: 'raise' 时转换异常直接抛出，'coerce' 时该值记为 NaN
+        persist: 是否使用跨运行词表缓存（仅缓存字符串唯一值），
+            只适用于结果仅取决于输入的模块级函数
+
+    Returns:
+        tuple: (转换后的Series, ConversionStats)
+
+    Examples:
+        >>> values, stats = convert_unique(pd.Series(["1k~2k", "1k~2k"]), range_to_mean)
+        >>> values.tolist(), stats.cardinality
+        ([1500.0, 1500.0], 1)
+    """
+    if errors not in ("raise", "coerce"):
+        raise ValueError(f"errors 只能为 'raise' 或 'coerce'，而不是 {errors!r}")
+
+    codes, uniques = pd.factorize(series)
+    cache = get_vocab_cache() if persist else None
+    cached: dict[str, Any] = {}
+    if cache is not None:
+        namespace = _converter_name(converter)
+        version = converter_version(converter)
+        tokens = [value for value in uniques if isinstance(value, str)]
+        found, hit = cache.lookup(namespace, version, tokens)
+        cached = {token: value for token, value, ok in zip(tokens, found, hit, strict=True) if ok}
+
+    results = []
+    fresh: dict[str, Any] = {}
+    failures = 0
+    for value in uniques:
+        if value in cached:
+            results.append(np.nan if cached[value] is None else cached[value])
+            continue
+        try:
+            result = converter(value)
+        except CONVERTER_ERRORS:
+            if errors == "raise":
+                raise
+            result = np.nan
+            failures += 1
+        results.append(result)
+        if cache is not None and isinstance(value, str):
+            fresh[value] = result
+
+    if fresh:
+        try:
+            cache.record(namespace, version, fresh.keys(), fresh.values())
+        except TypeError as e:
+            logger.warning(f"转换结果无法写入词表缓存: {e}")
+
+    unique_results = pd.Series(results, dtype=None if results else "float64").to_numpy()
+    values = pd.api.extensions.take(unique_results, codes, allow_fill=True)
+
+    non_null = int((codes >= 0).sum())
+    stats = ConversionStats(
+        rows=len(series),
+        non_null=non_null,
+        cardinality=len(uniques),
+        failures=failures,
+        hit_ratio=1 - len(uniques) / non_null if non_null else 0.0,
+        cache_hits=len(cached),
+    )
+    logger.info(f"去重转换 {_converter_name(converter)}: {stats}")
+    return pd.Series(values, index=series.index, name=series.name), stats
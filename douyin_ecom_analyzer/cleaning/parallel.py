@@ -0,0 +1,239 @@
+"""
+并行清洗模块：按行分区，在多个进程中清洗，结果按原顺序拼接
+
+清洗函数逐行独立（各列的解析、主题标记都只看本行），把数据按行切成若干
+分区分别清洗再拼接，结果与整体清洗相同。
+
+分区不以 DataFrame 形式序列化：数值列直接传 NumPy 数组，object 列先在
+本进程去重编码，只传 int32 编码和唯一值（见 memo.factorize_exact）。子进程
+只传回新增或修改过的列，同样按数组或编码传输；未修改的列直接使用原数据。
+
+进程池在首次使用时创建并在之后复用；行数较少时进程启动和传输的开销大于
+收益，直接在本进程清洗（见 choose_workers）。子进程以 forkserver/spawn 方式
+启动，会重新导入主模块，脚本入口需放在 if __name__ == "__main__" 之下。
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Hashable
+
+import numpy as np
+import pandas as pd
+
+from douyin_ecom_analyzer.cleaning.memo import factorize_exact
+
+logger = logging.getLogger("parallel_clean")
+
+# 每个进程至少清洗的行数
+MIN_PARTITION_ROWS = 50_000
+
+# 列的传输形式
+_ARRAY = "array"  # NumPy 数组
+_CODES = "codes"  # (编码, 唯一值)
+_VALUES = "values"  # 扩展类型的数组，直接序列化
+_SAME = "same"  # 与输入相同，不传输
+
+_executor: ProcessPoolExecutor | None = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def available_cpus() -> int:
+    """本进程可用的 CPU 核数"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def choose_workers(rows: int, max_workers: int | None = None) -> int:
+    """
+    按行数选择进程数：每个进程至少 MIN_PARTITION_ROWS 行，不超过可用核数
+
+    Args:
+        rows: 总行数
+        max_workers: 进程数上限，None 表示可用核数
+
+    Returns:
+        int: 进程数，1 表示在本进程清洗
+
+    Examples:
+        >>> choose_workers(10_000)
+        1
+    """
+    limit = max_workers or available_cpus()
+    return max(1, min(limit, rows // MIN_PARTITION_ROWS))
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    """获取共享进程池，进程数不够时重建"""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers < workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            # forkserver 不继承父进程的线程和锁（如 URL 后台校验、Streamlit），
+            # 不可用时（Windows）使用 spawn
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context(
+                "forkserver" if "forkserver" in methods else "spawn"
+            )
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _executor_workers = workers
+            logger.info(f"启动清洗进程池: {workers}个进程")
+        return _executor
+
+
+def _discard_executor(executor: ProcessPoolExecutor) -> None:
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is executor:
+            _executor, _executor_workers = None, 0
+    executor.shutdown(wait=False)
+
+
+def _encode(series: pd.Series) -> tuple:
+    """列 → 传输形式"""
+    if series.dtype == object:
+        codes, uniques = factorize_exact(series)
+        codes = codes.astype(np.int32)
+        missing = codes < 0
+        if missing.any():
+            # 空值（None、NaN、NaT 等）按类型各编一个码，还原后与原列逐个相同
+            nulls = series.to_numpy()[missing]
+            kinds, _ = pd.factorize(pd.Series([type(v) for v in nulls], dtype=object))
+            _, first = np.unique(kinds, return_index=True)
+            codes[missing] = len(uniques) + kinds
+            uniques = list(uniques) + list(nulls[first])
+        values = np.empty(len(uniques), dtype=object)
+        values[:] = uniques
+        return _CODES, codes, values
+    if isinstance(series.dtype, np.dtype):
+        return _ARRAY, series.to_numpy()
+    return _VALUES, series.array
+
+
+def _values(series: pd.Series) -> Any:
+    """列的底层数组，NumPy 类型不转换"""
+    return series.to_numpy() if isinstance(series.dtype, np.dtype) else series.array
+
+
+def _decode(encoded: tuple) -> Any:
+    """传输形式 → 列的值"""
+    kind = encoded[0]
+    if kind == _CODES:
+        _, codes, uniques = encoded
+        return uniques[codes]
+    return encoded[1]
+
+
+def _frame(names: list[Hashable], arrays: list, index: pd.Index) -> pd.DataFrame:
+    df = pd.DataFrame(dict(enumerate(arrays)), index=index, copy=False)
+    df.columns = pd.Index(names) if names else df.columns
+    return df
+
+
+def _clean_partition(func: Callable, names: list[Hashable], columns: list[tuple],
+                     index: pd.Index, with_state: bool) -> tuple:
+    """子进程：还原分区、清洗，返回各列的传输形式（未修改的列标记为 _SAME）"""
+    arrays = [_decode(encoded) for encoded in columns]
+    part = _frame(names, arrays, index)
+    output = func(part)
+    state = None
+    if with_state:
+        output, state = output
+
+    inputs = dict(zip(names, arrays, strict=True))
+    result = []
+    for j, name in enumerate(output.columns):
+        series = output.iloc[:, j]
+        source = inputs.get(name)
+        values = series.to_numpy() if isinstance(series.dtype, np.dtype) else None
+        if (
+            source is not None and values is not None and values.dtype == source.dtype
+            and np.may_share_memory(values, source)
+        ):
+            result.append((name, (_SAME,)))
+        else:
+            result.append((name, _encode(series)))
+    return result, state
+
+
+def parallel_clean(
+    df: pd.DataFrame,
+    func: Callable[[pd.DataFrame], Any],
+    workers: int | None = None,
+    with_state: bool = False,
+    copy: bool = False,
+) -> Any:
+    """
+    按行分区在多个进程中清洗，结果按原顺序拼接，与 func(df) 相同
+
+    Args:
+        df: 待清洗的DataFrame
+        func: 逐行独立的清洗函数，需可被 pickle（模块级函数、functools.partial
+            或可序列化对象的方法）；只能整列替换或新增列，不能原地修改
+        workers: 进程数，None 时按行数自动选择（见 choose_workers）
+        with_state: 为 True 时 func 返回 (DataFrame, 状态)，如解析错误汇总
+        copy: 结果中未修改的列是否复制。为 False 时与 df 共用数据；多进程时
+            只复制整列未修改的列，不必先复制整个 df
+
+    Returns:
+        DataFrame，或 with_state 时为 (DataFrame, 各分区状态列表)
+
+    Examples:
+        >>> cleaned = parallel_clean(df, functools.partial(clean_dataframe, url_check=False))
+    """
+    workers = choose_workers(len(df)) if workers is None else workers
+    workers = max(1, min(workers, len(df)))
+    if workers == 1:
+        output = func(df.copy() if copy else df)
+        return (output[0], [output[1]]) if with_state else output
+
+    bounds = np.linspace(0, len(df), workers + 1).astype(int)
+    names = list(df.columns)
+    executor = _get_executor(workers)
+    futures = []
+    for start, stop in zip(bounds[:-1], bounds[1:], strict=True):
+        part = df.iloc[start:stop]
+        columns = [_encode(part.iloc[:, i]) for i in range(len(names))]
+        futures.append(executor.submit(
+            _clean_partition, func, names, columns, part.index, with_state
+        ))
+    try:
+        outputs = [future.result() for future in futures]
+    except BrokenProcessPool:
+        # 子进程异常退出后进程池不可再用，下次重新创建
+        _discard_executor(executor)
+        raise
+    logger.info(f"并行清洗完成: {len(df)}行，{workers}个进程")
+
+    # 按第一个分区的列顺序拼接；某分区未修改的列取原数据的对应行
+    result_names = [name for name, _ in outputs[0][0]]
+    position = {name: i for i, name in enumerate(names)}
+    arrays = []
+    for j, name in enumerate(result_names):
+        encoded = [columns[j][1] for columns, _ in outputs]
+        if all(e[0] == _SAME for e in encoded):
+            values = _values(df.iloc[:, position[name]])
+            arrays.append(values.copy() if copy else values)
+            continue
+        pieces = []
+        for e, start, stop in zip(encoded, bounds[:-1], bounds[1:], strict=True):
+            if e[0] == _SAME:
+                pieces.append(_values(df.iloc[start:stop, position[name]]))
+            else:
+                pieces.append(_decode(e))
+        if all(isinstance(p, np.ndarray) for p in pieces):
+            arrays.append(np.concatenate(pieces))
+        else:
+            arrays.append(pd.concat([pd.Series(p) for p in pieces], ignore_index=True).array)
+    cleaned = _frame(result_names, arrays, df.index)
+    if with_state:
+        return cleaned, [state for _, state in outputs]
+    return cleaned
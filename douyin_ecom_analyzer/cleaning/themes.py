@@ -0,0 +1,169 @@
+"""
+主题标记模块：按商品名称中的关键词给商品打上节日、IP 等主题标签
+
+每个主题一组关键词，一个商品可以同时属于多个主题。结果为紧凑的主题位掩码
+列（每个主题一位），是否属于任一主题和各主题的商品数都由它直接得到。
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Mapping, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from douyin_ecom_analyzer.cleaning.keywords import get_keyword_matcher
+
+# 默认主题及关键词，按字面匹配，不区分大小写
+DEFAULT_THEMES: dict[str, list[str]] = {
+    "端午": ["端午", "艾草", "菖蒲", "粽子", "龙舟"],
+    "儿童节": ["儿童节", "六一", "61", "童趣", "礼盒"],
+    "IP角色": ["库洛米", "HelloKitty", "蜡笔小新"],
+}
+
+_ID_DTYPES = (np.uint8, np.uint16, np.uint32, np.uint64)
+
+# DataFrame.attrs 中记录 theme_id 各位对应主题名的键（见 DataCleaner.clean）
+THEME_NAMES_ATTR = "theme_names"
+
+
+class ThemeTags(NamedTuple):
+    """主题标记结果"""
+
+    ids: np.ndarray  # 主题位掩码，第 i 位对应 ThemeTagger.themes[i]
+    flags: np.ndarray  # 是否属于任一主题
+
+
+class ThemeTagger:
+    """
+    主题标记器，关键词自动机按主题构建一次并缓存
+    """
+
+    def __init__(self, themes: Mapping[str, Iterable[str]] | None = None, case: bool = False):
+        """
+        初始化主题标记器
+
+        Args:
+            themes: 主题名 → 关键词列表，默认为 DEFAULT_THEMES，最多 64 个主题
+            case: 是否区分大小写
+
+        Raises:
+            ValueError: 主题超过 64 个
+        """
+        themes = DEFAULT_THEMES if themes is None else themes
+        if len(themes) > 64:
+            raise ValueError(f"主题最多 64 个，当前为 {len(themes)} 个")
+        self.case = case
+        self.themes = list(themes)
+        self.dtype = next(dt for dt in _ID_DTYPES if len(self.themes) <= np.iinfo(dt).bits)
+        # 名称只统一大小写一次，自动机按区分大小写构建
+        folded = [tuple(self._fold(str(kw)) for kw in keywords) for keywords in themes.values()]
+        self._matchers = [get_keyword_matcher(keywords, case=True) for keywords in folded]
+        # 全部主题的关键词合成一个匹配器，先筛出命中任一主题的名称
+        self._any = get_keyword_matcher(tuple(kw for keywords in folded for kw in keywords), True)
+
+    def _fold(self, text: str) -> str:
+        return text if self.case else text.lower()
+
+    def tag(self, names: pd.Series) -> ThemeTags:
+        """
+        整列标记主题
+
+        先 factorize 去重，唯一名称只统一一次大小写。全部关键词合成的匹配器
+        扫描一遍唯一值，只有命中的名称再按主题区分，最后按编码广播回整列。
+        非字符串按 str() 后的文本匹配，空值不属于任何主题。
+
+        Args:
+            names: 商品名称列
+
+        Returns:
+            ThemeTags: (主题位掩码, 是否属于任一主题)
+
+        Examples:
+            >>> tags = ThemeTagger().tag(pd.Series(["端午艾草香囊", "库洛米六一礼盒", "T恤"]))
+            >>> tags.ids.tolist(), tags.flags.tolist()
+            ([1, 6, 0], [True, True, False])
+        """
+        codes, uniques = pd.factorize(names)
+        text = [self._fold(value if isinstance(value, str) else str(value)) for value in uniques]
+
+        ids = np.zeros(len(uniques) + 1, dtype=self.dtype)  # 最后一位对应空值
+        hit = np.flatnonzero(self._any.hits(text))
+        if len(self._matchers) == 1:
+            ids[hit] = 1
+        else:
+            candidates = [text[i] for i in hit]
+            for bit, matcher in enumerate(self._matchers):
+                ids[hit[matcher.hits(candidates)]] |= self.dtype(1) << self.dtype(bit)
+        ids = ids[codes]
+        return ThemeTags(ids, ids != 0)
+
+    def labels(self, ids: np.ndarray, sep: str = "、") -> pd.Series:
+        """
+        把主题位掩码解码为主题名称
+
+        Args:
+            ids: tag 返回的主题位掩码
+            sep: 多个主题之间的分隔符
+
+        Returns:
+            Series: 分类类型，不属于任何主题的为空字符串
+        """
+        # 只对出现过的掩码值解码，再按编码广播
+        uniques, inverse = np.unique(np.asarray(ids, dtype=self.dtype), return_inverse=True)
+        names = np.array([
+            sep.join(theme for bit, theme in enumerate(self.themes) if int(value) >> bit & 1)
+            for value in uniques
+        ], dtype=object)
+        return pd.Series(names[inverse.ravel()], dtype="category")
+
+    def counts(self, ids: np.ndarray) -> pd.Series:
+        """
+        统计各主题的商品数，同时属于多个主题的商品在每个主题中各计一次
+
+        Args:
+            ids: tag 返回的主题位掩码
+
+        Returns:
+            Series: 主题名 → 商品数
+        """
+        return count_themes(ids, self.themes)
+
+
+def count_themes(ids: np.ndarray, names: list[str]) -> pd.Series:
+    """
+    按主题名统计主题位掩码，第 i 位对应 names[i]
+
+    Args:
+        ids: 主题位掩码
+        names: 打标时的主题名，顺序与位一致
+
+    Returns:
+        Series: 主题名 → 商品数
+    """
+    dtype = next(dt for dt in _ID_DTYPES if len(names) <= np.iinfo(dt).bits)
+    ids = np.asarray(ids, dtype=dtype)
+    return pd.Series(
+        [int(np.count_nonzero(ids >> dtype(bit) & dtype(1))) for bit in range(len(names))],
+        index=pd.Index(names, name="主题"),
+        name="商品数",
+    )
+
+
+def recorded_theme_names(df: pd.DataFrame) -> list[str] | None:
+    """
+    theme_id 列各位对应的主题名
+
+    主题名在清洗时记录在 df.attrs 中；自定义主题的位与默认主题不同，
+    不能按默认主题解码。
+
+    Args:
+        df: 清洗后的数据
+
+    Returns:
+        list | None: 主题名，没有 theme_id 列或未记录主题名时为 None
+    """
+    if "theme_id" not in df.columns:
+        return None
+    names = df.attrs.get(THEME_NAMES_ATTR)
+    return list(names) if names is not None else None
@@ -0,0 +1,245 @@
+"""
+跨运行的词表缓存：把原始文本到解析结果的映射持久化到本地 SQLite
+
+每个转换函数一个命名空间，版本号由转换函数的实现计算，解析逻辑一旦修改，
+旧版本的缓存自动失效。命名空间在首次使用时整体加载到内存，新解析的值先
+记在内存里，运行结束时一次性批量写回。条数超过上限时按写入顺序淘汰最早
+写入的记录。
+"""
+
+from __future__ import annotations
+
+import atexit
+import hashlib
+import inspect
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Iterable, Sequence
+
+import numpy as np
+
+from douyin_ecom_analyzer.cache_dir import get_cache_dir
+
+logger = logging.getLogger("vocab_cache")
+
+# 设为 0 可关闭词表缓存
+VOCAB_CACHE_ENV = "DOUYIN_VOCAB_CACHE"
+
+DEFAULT_MAX_ENTRIES = 500_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vocab (
+    namespace TEXT NOT NULL,
+    version TEXT NOT NULL,
+    token TEXT NOT NULL,
+    value,
+    PRIMARY KEY (namespace, version, token)
+)
+"""
+
+
+@lru_cache(maxsize=None)
+def _file_digest(path: str) -> bytes:
+    return hashlib.sha1(Path(path).read_bytes()).digest()
+
+
+def converter_version(converter: Callable, *extra: Any) -> str:
+    """
+    计算转换函数的实现版本
+
+    取转换函数所在源文件内容的哈希，再加上函数名和额外参数（如区间取值策略、
+    functools.partial 绑定的参数），源文件任何修改都会得到新版本号。
+
+    Args:
+        converter: 转换函数，支持 functools.partial
+        extra: 影响解析结果的额外参数
+
+    Returns:
+        str: 版本号
+    """
+    func = converter
+    parts: list[str] = []
+    while hasattr(func, "func"):  # functools.partial
+        parts.append(repr((func.args, sorted(func.keywords.items()))))
+        func = func.func
+    func = inspect.unwrap(func)  # functools.lru_cache 等装饰器
+
+    digest = hashlib.sha1()
+    try:
+        digest.update(_file_digest(inspect.getfile(func)))
+    except (TypeError, OSError):
+        # 内置函数或动态生成的函数，退化为字节码
+        digest.update(getattr(getattr(func, "__code__", None), "co_code", b""))
+    digest.update(getattr(func, "__qualname__", repr(func)).encode())
+    for part in (*parts, *map(repr, extra)):
+        digest.update(part.encode())
+    return digest.hexdigest()[:16]
+
+
+def _to_sql_value(value: Any) -> Any:
+    """转换为 SQLite 可存储的值，NaN 存为 NULL"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    raise TypeError(f"词表缓存不支持的值类型: {type(value).__name__}")
+
+
+class VocabularyCache:
+    """
+    原始文本 → 解析结果 的持久化缓存
+    """
+
+    def __init__(self, path: str | Path | None = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        初始化词表缓存
+
+        Args:
+            path: SQLite 文件路径，默认为缓存目录下的 vocab.sqlite3
+            max_entries: 最多保留的记录数（所有命名空间合计）
+        """
+        self.path = Path(path) if path else get_cache_dir() / "vocab.sqlite3"
+        self.max_entries = max_entries
+        self._tables: dict[tuple[str, str], dict[str, Any]] = {}
+        self._pending: dict[tuple[str, str], dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute(_SCHEMA)
+        return conn
+
+    def _table(self, namespace: str, version: str) -> dict[str, Any]:
+        """获取命名空间的内存词表，首次访问时从磁盘整体加载"""
+        key = (namespace, version)
+        table = self._tables.get(key)
+        if table is None:
+            try:
+                with closing(self._connect()) as conn:
+                    rows = conn.execute(
+                        "SELECT token, value FROM vocab WHERE namespace = ? AND version = ?",
+                        key,
+                    ).fetchall()
+            except sqlite3.Error as e:
+                logger.warning(f"加载词表缓存失败: {e}")
+                rows = []
+            table = dict(rows)
+            self._tables[key] = table
+            logger.info(f"加载词表缓存 {namespace}: {len(table)}条")
+        return table
+
+    def lookup(
+        self, namespace: str, version: str, tokens: Sequence[str]
+    ) -> tuple[list[Any], np.ndarray]:
+        """
+        批量查询缓存
+
+        Args:
+            namespace: 命名空间，通常为转换函数名
+            version: 转换函数版本号
+            tokens: 原始文本
+
+        Returns:
+            tuple: (缓存值列表，未命中为 None；命中掩码)
+        """
+        with self._lock:
+            table = self._table(namespace, version)
+        hit = np.fromiter((token in table for token in tokens), dtype=bool, count=len(tokens))
+        values = [table.get(token) for token in tokens]
+        return values, hit
+
+    def record(
+        self, namespace: str, version: str, tokens: Iterable[str], values: Iterable[Any]
+    ) -> None:
+        """
+        记录新解析的结果，调用 flush 后才写入磁盘
+
+        Args:
+            namespace: 命名空间
+            version: 转换函数版本号
+            tokens: 原始文本
+            values: 解析结果，NaN 记为 None
+        """
+        entries = {token: _to_sql_value(value) for token, value in zip(tokens, values, strict=True)}
+        key = (namespace, version)
+        with self._lock:
+            self._table(namespace, version).update(entries)
+            self._pending.setdefault(key, {}).update(entries)
+
+    def flush(self) -> int:
+        """
+        把新记录批量写回磁盘，清理同一命名空间的旧版本，超出上限时淘汰
+        最早写入的记录（淘汰到上限的 90%）
+
+        Returns:
+            int: 写入的条数
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        written = 0
+        try:
+            with closing(self._connect()) as conn, conn:
+                for (namespace, version), entries in pending.items():
+                    conn.execute(
+                        "DELETE FROM vocab WHERE namespace = ? AND version != ?",
+                        (namespace, version),
+                    )
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO vocab VALUES (?, ?, ?, ?)",
+                        ((namespace, version, token, value) for token, value in entries.items()),
+                    )
+                    written += len(entries)
+                (count,) = conn.execute("SELECT COUNT(*) FROM vocab").fetchone()
+                if count > self.max_entries:
+                    # INSERT OR REPLACE 总是分配新的 rowid，rowid 小的写入最早
+                    target = self.max_entries - self.max_entries // 10
+                    conn.execute(
+                        "DELETE FROM vocab WHERE rowid IN "
+                        "(SELECT rowid FROM vocab ORDER BY rowid LIMIT ?)",
+                        (count - target,),
+                    )
+                    logger.info(f"词表缓存超过上限，淘汰 {count - target}条")
+        except sqlite3.Error as e:
+            logger.warning(f"写入词表缓存失败: {e}")
+            return 0
+
+        logger.info(f"词表缓存写入 {written}条: {self.path}")
+        return written
+
+
+_default_cache: VocabularyCache | None = None
+
+
+def get_vocab_cache() -> VocabularyCache | None:
+    """
+    获取进程级共享的词表缓存，环境变量 DOUYIN_VOCAB_CACHE=0 时返回 None
+
+    Returns:
+        VocabularyCache | None: 共享缓存
+    """
+    global _default_cache
+    if os.environ.get(VOCAB_CACHE_ENV, "1") == "0":
+        return None
+    if _default_cache is None:
+        try:
+            _default_cache = VocabularyCache()
+        except OSError as e:
+            logger.warning(f"无法创建词表缓存目录，已禁用缓存: {e}")
+            return None
+        atexit.register(_default_cache.flush)
+    return _default_cache
+
+
+def flush_vocab_cache() -> int:
+    """把共享词表缓存的新记录写回磁盘"""
+    return _default_cache.flush() if _default_cache is not None else 0
@@ -5,15 +5,55 @@
 import logging
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import yaml
 
+from douyin_ecom_analyzer.cleaning.binding import (
+    RATE_PERCENT,
+    ColumnBinding,
+    bind_columns,
+    rule_rate_unit,
+)
+from douyin_ecom_analyzer.cleaning.filter_engine import coerce_columns
+
 # 配置日志
 logger = logging.getLogger("filter_engine")
 
 # 默认规则文件路径
 DEFAULT_RULES_PATH = Path("filter_rules.yaml")
 
+# 过滤用到的逻辑字段，按列名绑定到 _val、值 等列（见 cleaning.binding）
+RULE_FIELDS = ["sales_7d", "sales_30d", "commission", "conversion", "influencer", "festival"]
+
+# 拒绝位：每条规则一位，按过滤顺序排列
+REJECT_SALES_7D = 1
+REJECT_SALES_30D = 2
+REJECT_INFLUENCER = 4
+REJECT_COMMISSION = 8
+REJECT_FESTIVAL = 16
+REJECT_ALL = 31
+
+REJECT_LABELS = {
+    REJECT_SALES_7D: "7天销量不达标",
+    REJECT_SALES_30D: "30天销量不达标",
+    REJECT_INFLUENCER: "关联达人不足",
+    REJECT_COMMISSION: "佣金或转化率不达标",
+    REJECT_FESTIVAL: "节日商品",
+}
+
+
+def _filter_rate(total: int, kept: int) -> str:
+    """过滤率，如 12.50%"""
+    return f"{(1 - kept / total) * 100:.2f}%" if total > 0 else "0%"
+
+
+def _as_bool_array(cond: pd.Series) -> np.ndarray:
+    """把过滤条件转为 bool 数组，空值视为不通过"""
+    if not pd.api.types.is_bool_dtype(cond.dtype):
+        raise TypeError(f"过滤条件不是布尔类型: {cond.dtype}")
+    return cond.to_numpy(dtype=bool, na_value=False)
+
 
 class FilterEngine:
     """
@@ -52,210 +92,208 @@ class FilterEngine:
             "influencer": {"min_count": 50},
         }
 
+    def _rule_values(self):
+        """获取规则值（可从配置中动态获取）"""
+        return {
+            "sales_7d_min": self.rules.get("sales", {}).get("last_7d_min", 5000),
+            "sales_30d_min": self.rules.get("sales", {}).get("last_30d_min", 25000),
+            "min_influencer": self.rules.get("influencer", {}).get("min_count", 50),
+            "min_commission": self.rules.get("commission", {}).get("min_rate", 20),
+            "zero_rate_conversion": self.rules.get("commission", {}).get(
+                "zero_rate_conversion_min", 20
+            ),
+            "min_conversion": self.rules.get("conversion", {}).get("min_rate", 15),
+        }
+
+    def _bound_rules(self, binding: ColumnBinding) -> list:
+        """
+        按列绑定生成规则，列名和比例阈值的单位由绑定确定
+
+        规则用到的字段没有绑定到列时跳过该规则，不补默认列。比例阈值默认为
+        百分点（见默认规则），规则文件可用 unit 键声明单位（filter_rules.yaml
+        为 unit: fraction），统一换算为列的单位。
+
+        Returns:
+            list: [(拒绝位, 规则名, 条件函数)]，条件函数传入取列的函数
+        """
+        v = self._rule_values()
+        unit = rule_rate_unit(self.rules, RATE_PERCENT)
+        rules = []
+
+        def at_least(field, value):
+            column, threshold = binding.column(field), binding.threshold(field, value, unit)
+            return lambda col: col(column) >= threshold
+
+        if "sales_7d" in binding:
+            rules.append((REJECT_SALES_7D, "7天销量过滤", at_least("sales_7d", v["sales_7d_min"])))
+        if "sales_30d" in binding:
+            rules.append(
+                (REJECT_SALES_30D, "30天销量过滤", at_least("sales_30d", v["sales_30d_min"]))
+            )
+        if "influencer" in binding:
+            rules.append(
+                (REJECT_INFLUENCER, "关联达人过滤", at_least("influencer", v["min_influencer"]))
+            )
+        if binding.has("commission", "conversion"):
+            rate, conv = binding.column("commission"), binding.column("conversion")
+            min_commission = binding.threshold("commission", v["min_commission"], unit)
+            min_conversion = binding.threshold("conversion", v["min_conversion"], unit)
+            zero_conversion = binding.threshold("conversion", v["zero_rate_conversion"], unit)
+            # ((佣金 ≥ 20% & 转化率 ≥ 15%) | (佣金 = 0% & 转化率 ≥ 20%))
+            rules.append((
+                REJECT_COMMISSION,
+                "佣金转化率过滤",
+                lambda col: ((col(rate) >= min_commission) & (col(conv) >= min_conversion))
+                | ((col(rate) == 0) & (col(conv) >= zero_conversion)),
+            ))
+        if "festival" in binding:
+            festival = binding.column("festival")
+            rules.append((REJECT_FESTIVAL, "节日商品过滤", lambda col: ~col(festival)))
+        return rules
+
+    def rejection_mask(self, df: pd.DataFrame, columns: dict | None = None) -> np.ndarray:
+        """
+        一次求出每行未通过的规则，每条规则占一位，见 REJECT_LABELS
+
+        每条规则都在整列上只计算一次；缺列的规则跳过，某条规则出错（如列
+        类型不对）时记录警告并跳过该规则。
+
+        Args:
+            df: 输入的DataFrame，_val、值 等后缀的列均可
+            columns: coerce_columns 的结果，为 None 时现算
+
+        Returns:
+            np.ndarray: uint8 数组，0 表示通过全部规则
+        """
+        binding = bind_columns(df.columns)
+        if columns is None:
+            columns = coerce_columns(df, binding)
+
+        def col(name):
+            return columns[name] if name in columns else df[name]
+
+        mask = np.zeros(len(df), dtype=np.uint8)
+        for bit, name, passed in self._bound_rules(binding):
+            try:
+                mask[~_as_bool_array(passed(col))] |= bit
+            except Exception as e:
+                logger.warning(f"{name}出错: {e}")
+        return mask
+
+    def filter_mask(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        求通过全部规则的行，不修改也不复制 df，需要时再用 df[mask] 取出
+
+        转换的列只在内部使用，取出的行中这些列仍为原值；需要与
+        apply_rules 相同的结果时用 apply_rules。
+
+        Args:
+            df: 输入的DataFrame，只读
+
+        Returns:
+            np.ndarray: bool 数组，与 df 的行一一对应
+        """
+        return self.rejection_mask(df) == 0
+
+    def _take(self, df: pd.DataFrame, keep: np.ndarray, columns: dict) -> pd.DataFrame:
+        """按位置取出通过的行，并写回转换后的列"""
+        df_filtered = df[keep]
+        if columns:
+            # 只复制通过的行，不复制整个输入
+            df_filtered = df_filtered.copy()
+        for col, values in columns.items():
+            df_filtered[col] = values.to_numpy()[keep]
+        return df_filtered
+
     def apply_rules(self, df: pd.DataFrame) -> pd.DataFrame:
         """
-        执行五维过滤规则，返回合规行，自动处理缺失列
+        执行五维过滤规则，返回合规行，缺列的规则跳过
 
         Args:
-            df: 输入的DataFrame，需要包含*_val列
+            df: 输入的DataFrame，_val、值 等后缀的列均可
 
         Returns:
             DataFrame: 过滤后的DataFrame
         """
-        # 创建副本
-        df_filtered = df.copy()
-
-        # 记录初始行数
-        initial_count = len(df_filtered)
-        logger.info(f"开始过滤，初始数据量: {initial_count}行")
-
-        # 确保必要的列存在
-        required_cols = [
-            "近7天销量_val",
-            "近30天销量_val",
-            "佣金比例_val",
-            "转化率_val",
-            "关联达人",
-            "is_festival",
-        ]
+        return self._filter(df)[0]
 
-        # 检查并添加缺失列
-        for col in required_cols:
-            if col not in df_filtered.columns:
-                if col == "is_festival":
-                    df_filtered[col] = False
-                    logger.info(f"添加缺失列: {col} (默认值: False)")
-                elif col == "关联达人":
-                    # 关联达人使用固定值100替代
-                    df_filtered[col] = 100
-                    logger.info(f"添加缺失列: {col} (默认值: 100)")
-                elif col.endswith("_val"):
-                    # 对于数值列，使用合理的默认值
-                    if "销量" in col:
-                        default_val = 10000 if "30" in col else 5000
-                    elif "佣金" in col:
-                        default_val = 20
-                    elif "转化" in col:
-                        default_val = 15
-                    else:
-                        default_val = 0
-                    df_filtered[col] = default_val
-                    logger.info(f"添加缺失列: {col} (默认值: {default_val})")
-
-        # 确保所有_val列都是数值类型
-        for col in df_filtered.columns:
-            if col.endswith("_val") and df_filtered[col].dtype == object:
-                df_filtered[col] = pd.to_numeric(df_filtered[col], errors="coerce").fillna(0)
-                logger.info(f"转换列 {col} 为数值类型")
-
-        # 获取规则值（可从配置中动态获取）
-        sales_7d_min = self.rules.get("sales", {}).get("last_7d_min", 5000)
-        sales_30d_min = self.rules.get("sales", {}).get("last_30d_min", 25000)
-        min_influencer = self.rules.get("influencer", {}).get("min_count", 50)
-        min_commission = self.rules.get("commission", {}).get("min_rate", 20)
-        zero_rate_conversion = self.rules.get("commission", {}).get("zero_rate_conversion_min", 20)
-        min_conversion = self.rules.get("conversion", {}).get("min_rate", 15)
-
-        # 1) 销量过滤 (7天销量 ≥ 5000, 30天销量 ≥ 25000)
-        try:
-            before_count = len(df_filtered)
-            df_filtered = df_filtered[df_filtered["近7天销量_val"] >= sales_7d_min]
-            logger.info(
-                f"7天销量过滤 (≥{sales_7d_min}): 过滤掉 {before_count - len(df_filtered)}行"
-            )
+    def _filter(self, df: pd.DataFrame) -> tuple[pd.DataFrame, np.ndarray]:
+        """求一次拒绝位掩码，返回 (过滤后的DataFrame, 掩码)"""
+        logger.info(f"开始过滤，初始数据量: {len(df)}行")
+        columns = coerce_columns(df)
+        mask = self.rejection_mask(df, columns)
+        keep = mask == 0
 
-            before_count = len(df_filtered)
-            df_filtered = df_filtered[df_filtered["近30天销量_val"] >= sales_30d_min]
-            logger.info(
-                f"30天销量过滤 (≥{sales_30d_min}): 过滤掉 {before_count - len(df_filtered)}行"
-            )
-        except Exception as e:
-            logger.warning(f"销量过滤出错: {e}")
+        # 按规则顺序归因（每行算在第一条未通过的规则上），与逐步过滤的日志一致
+        first_failed = np.bincount(mask & (~mask + np.uint8(1)), minlength=REJECT_ALL + 1)
+        for bit, label in REJECT_LABELS.items():
+            logger.info(f"{label}: 过滤掉 {first_failed[bit]}行")
 
-        # 2) 关联达人过滤 (关联达人 ≥ 50)
-        try:
-            before_count = len(df_filtered)
-            df_filtered = df_filtered[df_filtered["关联达人"] >= min_influencer]
-            logger.info(
-                f"关联达人过滤 (≥{min_influencer}): 过滤掉 {before_count - len(df_filtered)}行"
-            )
-        except Exception as e:
-            logger.warning(f"关联达人过滤出错: {e}")
+        df_filtered = self._take(df, keep, columns)
+        logger.info(f"过滤完成，从 {len(df)} 行减少到 {len(df_filtered)} 行")
+        return df_filtered, mask
 
-        # 3) 佣金和转化率过滤
-        # ((佣金 ≥ 20% & 转化率 ≥ 15%) | (佣金 = 0% & 转化率 ≥ 20%))
-        try:
-            before_count = len(df_filtered)
-            cond_commission = (
-                (df_filtered["佣金比例_val"] >= min_commission)
-                & (df_filtered["转化率_val"] >= min_conversion)
-            ) | (
-                (df_filtered["佣金比例_val"] == 0)
-                & (df_filtered["转化率_val"] >= zero_rate_conversion)
-            )
-            df_filtered = df_filtered[cond_commission]
-            logger.info(f"佣金转化率过滤: 过滤掉 {before_count - len(df_filtered)}行")
-        except Exception as e:
-            logger.warning(f"佣金转化率过滤出错: {e}")
+    def rejection_reasons(self, mask: np.ndarray, index=None) -> pd.Series:
+        """
+        把拒绝位掩码解码为每行的过滤原因
 
-        # 4) 节日商品过滤
-        try:
-            before_count = len(df_filtered)
-            df_filtered = df_filtered[~df_filtered["is_festival"]]
-            logger.info(f"节日商品过滤: 过滤掉 {before_count - len(df_filtered)}行")
-        except Exception as e:
-            logger.warning(f"节日商品过滤出错: {e}")
+        Args:
+            mask: rejection_mask 的结果
+            index: 结果的索引，一般为输入DataFrame的索引
 
-        logger.info(f"过滤完成，从 {initial_count} 行减少到 {len(df_filtered)} 行")
-        return df_filtered
+        Returns:
+            Series: 分类类型，通过的行为空字符串，否则为以"、"连接的原因
+        """
+        labels = [
+            "、".join(label for bit, label in REJECT_LABELS.items() if code & bit)
+            for code in range(REJECT_ALL + 1)
+        ]
+        return pd.Series(pd.Categorical.from_codes(mask, labels), index=index, name="过滤原因")
 
     def filter_data(self, df):
         """
         过滤数据（兼容旧接口）
 
+        所有规则只求值一次得到拒绝位掩码（见 rejection_mask），过滤结果、
+        过滤详情和每行的过滤原因都由这个掩码得到。
+
         Args:
             df: 输入的DataFrame
 
         Returns:
-            tuple: (过滤后的DataFrame, 过滤统计信息)
+            tuple: (过滤后的DataFrame, 过滤统计信息)，统计信息中的 "过滤原因"
+                为与输入行对齐的过滤原因列，见 rejection_reasons
         """
         stats = {"原始数据量": len(df), "过滤后数据量": 0, "过滤率": 0, "过滤详情": {}}
-        df_filtered = df.copy()  # 默认值，避免未定义变量
+        df_filtered = df  # 默认值，避免未定义变量
 
-        # 尝试使用新方法过滤
         try:
             # 记录输入数据的列
             logger.info(f"输入数据列: {df.columns.tolist()}")
-
-            # 检查是否包含新的*_val列
-            has_val_cols = all(
-                col in df.columns
-                for col in ["近7天销量_val", "近30天销量_val", "佣金比例_val", "转化率_val"]
-            )
-
-            logger.info(f"是否包含所有_val列: {has_val_cols}")
-            if not has_val_cols:
-                missing = [
-                    col
-                    for col in ["近7天销量_val", "近30天销量_val", "佣金比例_val", "转化率_val"]
-                    if col not in df.columns
-                ]
-                logger.warning(f"缺少以下_val列: {missing}")
-                # 即使缺少某些列，仍然使用新的过滤方法
-                logger.info("尽管缺少某些列，仍然使用新的过滤方法")
-
-            # 使用新方法过滤 - 总是使用新方法，不再回退到旧方法
-            logger.info("使用新的过滤方法")
-            df_before = df.copy()
-            df_filtered = self.apply_rules(df)
-            logger.info(f"过滤前: {len(df_before)}行, 过滤后: {len(df_filtered)}行")
-
-            # 更新统计信息
-            # 根据日志计算各环节过滤数量
-            sales_7d_min = self.rules.get("sales", {}).get("last_7d_min", 5000)
-            sales_30d_min = self.rules.get("sales", {}).get("last_30d_min", 25000)
-
-            try:
-                # 计算销量过滤数量
-                if "近7天销量_val" in df.columns and "近30天销量_val" in df.columns:
-                    mask_7d = df["近7天销量_val"] >= sales_7d_min
-                    mask_30d = df["近30天销量_val"] >= sales_30d_min
-                    sales_filtered = len(df) - len(df[mask_7d & mask_30d])
-
-                    # 计算佣金/转化率过滤数量
-                    min_commission = self.rules.get("commission", {}).get("min_rate", 20)
-                    min_conversion = self.rules.get("conversion", {}).get("min_rate", 15)
-                    zero_rate_conversion = self.rules.get("commission", {}).get(
-                        "zero_rate_conversion_min", 20
-                    )
-
-                    if "佣金比例_val" in df.columns and "转化率_val" in df.columns:
-                        cond_commission = (
-                            (df["佣金比例_val"] >= min_commission)
-                            & (df["转化率_val"] >= min_conversion)
-                        ) | ((df["佣金比例_val"] == 0) & (df["转化率_val"] >= zero_rate_conversion))
-
-                        commission_filtered = len(df[mask_7d & mask_30d]) - len(
-                            df[mask_7d & mask_30d & cond_commission]
-                        )
-
-                        # 计算节日商品过滤数量
-                        if "is_festival" in df.columns:
-                            festival_filtered = len(
-                                df[mask_7d & mask_30d & cond_commission & df["is_festival"]]
-                            )
-                            stats["过滤详情"]["节日商品"] = festival_filtered
-
-                        stats["过滤详情"]["佣金或转化率不达标"] = commission_filtered
-
-                    stats["过滤详情"]["销量不达标"] = sales_filtered
-                else:
-                    # 无法详细统计时使用总体统计
-                    stats["过滤详情"]["总过滤数量"] = len(df) - len(df_filtered)
-            except Exception as e:
-                logger.warning(f"统计详情计算错误: {e}")
+            binding = bind_columns(df.columns)
+            missing = [field for field in RULE_FIELDS if field not in binding]
+            if missing:
+                logger.warning(f"缺少以下字段的列: {missing}，跳过对应规则")
+
+            df_filtered, mask = self._filter(df)
+            stats["过滤原因"] = self.rejection_reasons(mask, df.index)
+
+            # 各环节过滤数量：节日商品和佣金只统计前面环节通过的行
+            details = stats["过滤详情"]
+            if binding.has("sales_7d", "sales_30d"):
+                sales_failed = (mask & (REJECT_SALES_7D | REJECT_SALES_30D)) != 0
+                if binding.has("commission", "conversion"):
+                    commission_failed = ~sales_failed & ((mask & REJECT_COMMISSION) != 0)
+                    if "festival" in binding:
+                        details["节日商品"] = int(np.count_nonzero(
+                            ~sales_failed & ((mask & (REJECT_COMMISSION | REJECT_FESTIVAL))
+                                             == REJECT_FESTIVAL)
+                        ))
+                    details["佣金或转化率不达标"] = int(np.count_nonzero(commission_failed))
+                details["销量不达标"] = int(np.count_nonzero(sales_failed))
+            else:
                 # 无法详细统计时使用总体统计
-                stats["过滤详情"]["总过滤数量"] = len(df) - len(df_filtered)
+                details["总过滤数量"] = len(df) - len(df_filtered)
 
         except Exception as e:
             logger.exception(f"过滤失败: {e}")
@@ -264,14 +302,40 @@ class FilterEngine:
 
         # 更新统计信息
         stats["过滤后数据量"] = len(df_filtered)
-        stats["过滤率"] = (
-            f"{(1 - len(df_filtered) / stats['原始数据量']) * 100:.2f}%"
-            if stats["原始数据量"] > 0
-            else "0%"
-        )
+        stats["过滤率"] = _filter_rate(stats["原始数据量"], len(df_filtered))
 
         return df_filtered, stats
 
+    @staticmethod
+    def combine_stats(parts):
+        """
+        合并分块过滤的统计信息
+
+        Args:
+            parts: 各块 filter_data 返回的统计信息，按块的顺序
+
+        Returns:
+            dict: 与 filter_data 的统计信息格式相同，数量逐项相加，
+                过滤原因按块的顺序拼接
+        """
+        stats = {"原始数据量": 0, "过滤后数据量": 0, "过滤率": "0%", "过滤详情": {}}
+        details = stats["过滤详情"]
+        reasons = []
+        for part in parts:
+            stats["原始数据量"] += part["原始数据量"]
+            stats["过滤后数据量"] += part["过滤后数据量"]
+            for reason, count in part.get("过滤详情", {}).items():
+                if isinstance(count, int):
+                    details[reason] = details.get(reason, 0) + count
+                else:
+                    details[reason] = count  # 过滤错误信息
+            if "过滤原因" in part:
+                reasons.append(part["过滤原因"])
+        if reasons:
+            stats["过滤原因"] = pd.concat(reasons)
+        stats["过滤率"] = _filter_rate(stats["原始数据量"], stats["过滤后数据量"])
+        return stats
+
     def generate_filter_report(self, stats, output_path=None):
         """
         生成过滤报告
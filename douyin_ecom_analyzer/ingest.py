@@ -0,0 +1,537 @@
+"""
+数据读取模块：以只读流式方式读取 Excel，按批返回，只解码需要的列
+
+pd.read_excel 默认用 openpyxl 的普通模式加载整个工作簿，每个单元格都建成
+对象，几百 MB 的 xlsx 在清洗开始前就要几分钟和数 GB 内存。这里用 openpyxl
+的 read_only 模式逐行流式读取，只取清洗和过滤用到的列（见 ColumnProjection），
+每 batch_size 行组成一个 DataFrame。read_excel 的结果按文件内容保存快照，
+同一工作簿再次读取时直接加载。
+
+.xls 等非 xlsx 格式 openpyxl 不支持，回退到 pd.read_excel（同样只读取需要的列）。
+
+命令行还支持 CSV、TSV、Parquet 和 JSONL（见 iter_table），按扩展名识别，
+按块读取，需要的列在读取时就筛选。
+"""
+
+from __future__ import annotations
+
+import logging
+import operator
+import string
+from functools import lru_cache
+from pathlib import Path
+from typing import IO, Any, Callable, Iterable, Iterator, Union
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from openpyxl.utils import column_index_from_string
+
+from douyin_ecom_analyzer.cleaning.binding import FIELDS
+from douyin_ecom_analyzer.cleaning.vocab_cache import converter_version
+from douyin_ecom_analyzer.snapshot import content_digest, get_snapshot_cache, snapshot_key
+
+logger = logging.getLogger("ingest")
+
+_DIGITS = string.digits
+
+Source = Union[str, Path, IO[bytes]]
+
+# 每批行数
+DEFAULT_BATCH_SIZE = 50_000
+
+# 扩展名 → 输入格式
+INPUT_FORMATS = {
+    ".xlsx": "excel",
+    ".xlsm": "excel",
+    ".xls": "excel",
+    ".csv": "csv",
+    ".tsv": "tsv",
+    ".tab": "tsv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+# 清洗和分析总会用到的列
+BASE_COLUMNS = ("商品名称", "商品", "关联达人", "价格", "price")
+# 列名包含这些片段的都读取：DataCleaner 按片段查找销量列（如 "30天销量"、
+# "直播销量"），douyin_ecom_analyzer.utils 校验所有链接列
+COLUMN_PATTERNS = ("销量", "佣金", "转化", "链接")
+
+# 过滤规则 → 原始列
+_RULE_COLUMNS = {
+    "sales": ("近7天销量", "近30天销量"),
+    "commission": ("佣金比例", "转化率"),
+    "conversion": ("转化率",),
+    "influencer": ("关联达人",),
+    "categories": ("商品名称",),
+}
+
+
+class ColumnProjection:
+    """
+    列投影：判断一列是否需要读取
+    """
+
+    def __init__(self, names: Iterable[Any] = (), patterns: Iterable[str] = COLUMN_PATTERNS):
+        """
+        初始化列投影
+
+        Args:
+            names: 需要读取的列名
+            patterns: 列名包含其中任一片段的也读取
+        """
+        self.names = frozenset(names)
+        self.patterns = tuple(patterns)
+
+    def __call__(self, name: Any) -> bool:
+        if name in self.names:
+            return True
+        return isinstance(name, str) and any(p in name for p in self.patterns)
+
+    def cache_key(self) -> tuple:
+        """与选中哪些列有关的全部参数，用于快照键"""
+        return sorted(map(repr, self.names)), self.patterns
+
+
+def default_projection(cleaner: Any = None, rules: dict | None = None,
+                       extra: Iterable[str] = ()) -> ColumnProjection:
+    """
+    清洗和过滤需要的列
+
+    Args:
+        cleaner: DataCleaner，取其 sales_fields、percent_fields、url_fields，
+            为 None 时用 DataCleaner 的默认字段
+        rules: 过滤规则，规则用到的原始列和已清洗列（见 cleaning.binding）都读取
+        extra: 额外需要的列，如 ecom_cleaner 配置中的字段
+
+    Returns:
+        ColumnProjection: 列投影
+
+    Examples:
+        >>> projection = default_projection()
+        >>> projection("近30天销量"), projection("直播销量"), projection("店铺名称")
+        (True, True, False)
+    """
+    if cleaner is None:
+        from ecom_cleaner.cleaning.cleaner import DataCleaner
+
+        cleaner = DataCleaner()
+    names = set(BASE_COLUMNS) | set(extra)
+    for fields in ("sales_fields", "percent_fields", "url_fields"):
+        names.update(getattr(cleaner, fields, ()))
+    # 输入可能已经清洗过
+    for candidates in FIELDS.values():
+        names.update(candidates)
+    for key in rules or {}:
+        names.update(_RULE_COLUMNS.get(key, ()))
+    return ColumnProjection(names)
+
+
+def _dedupe_header(header: Iterable[Any]) -> list[Any]:
+    """与 pd.read_excel 一致：空列名记为 Unnamed: i，重复列名加 .1、.2 后缀"""
+    names: list[Any] = []
+    seen: dict[Any, int] = {}
+    for i, name in enumerate(header):
+        if name is None:
+            name = f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        seen.setdefault(name, 0)
+        names.append(name)
+    return names
+
+
+def _is_xlsx(source: Source) -> bool:
+    """按文件头判断是否为 xlsx（zip 格式），文件对象读取后恢复位置"""
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            return f.read(4) == b"PK\x03\x04"
+    position = source.tell()
+    try:
+        return source.read(4) == b"PK\x03\x04"
+    finally:
+        source.seek(position)
+
+
+def _worksheet(workbook, sheet: int | str):
+    """按序号或名称取工作表，命令行传入的数字字符串也视为序号"""
+    if isinstance(sheet, int):
+        return workbook.worksheets[sheet]
+    if sheet not in workbook.sheetnames and str(sheet).isdigit():
+        return workbook.worksheets[int(sheet)]
+    return workbook[sheet]
+
+
+def _selector(columns: Callable[[Any], bool] | Iterable[Any] | None):
+    if columns is None or callable(columns):
+        return columns
+    return ColumnProjection(columns, patterns=())
+
+
+def _snapshot_key(source: Source, sheet: int | str, select) -> str | None:
+    """读取结果的快照键，列由任意函数选择时无法确定，返回 None"""
+    if select is None:
+        columns = "all"
+    elif isinstance(select, ColumnProjection):
+        columns = select.cache_key()
+    else:
+        return None
+    # 读取代码或 pandas 版本变化时快照失效
+    version = converter_version(_row_batches, pd.__version__)
+    return snapshot_key(content_digest(source), repr(sheet), columns, version)
+
+
+def _row_batches(
+    source: Source, sheet: int | str, select, batch_size: int
+) -> Iterator[tuple[list[Any], np.ndarray]]:
+    """
+    只读模式逐行读取 xlsx，每 batch_size 行返回一次 (列名, 二维 object 数组)
+
+    表尾的全空行去掉，中间的全空行保留（与 pd.read_excel 一致）。
+    """
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        ws = _worksheet(workbook, sheet)
+        header = next(ws.iter_rows(max_row=1, values_only=True), None)
+        if header is None:
+            return
+        names = _dedupe_header(header)
+        keep = [i for i, name in enumerate(names) if select is None or select(name)]
+        names = [names[i] for i in keep]
+        logger.info(f"读取 {len(keep)}/{len(header)} 列: {names}")
+        if not keep:
+            return
+
+        batch: list[tuple] = []
+        emitted = False
+        blank = 0  # 尚未确定是否在表尾的全空行数
+        for values, filled in _data_rows(ws, keep):
+            if not filled:
+                blank += 1
+                continue
+            if blank:
+                batch.extend([(None,) * len(names)] * blank)
+                blank = 0
+            batch.append(values)
+            if len(batch) >= batch_size:
+                yield names, _to_array(batch, len(names))
+                emitted = True
+                batch = []
+        if batch or not emitted:
+            yield names, _to_array(batch, len(names))
+    finally:
+        workbook.close()
+
+
+def _to_array(rows: list[tuple], width: int) -> np.ndarray:
+    values = np.empty((len(rows), width), dtype=object)
+    if rows:
+        values[:] = rows
+    return values
+
+
+def _frame(values: np.ndarray, names: list[Any], start: int = 0) -> pd.DataFrame:
+    """二维 object 数组转为 DataFrame：空单元格为 NaN，再按列推断类型"""
+    values[pd.isna(values)] = np.nan
+    df = pd.DataFrame(values, columns=names, index=pd.RangeIndex(start, start + len(values)))
+    return df.infer_objects()
+
+
+def iter_excel(
+    source: Source,
+    sheet: int | str = 0,
+    columns: Callable[[Any], bool] | Iterable[Any] | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """
+    流式读取 Excel，按批返回
+
+    第一行为表头，表尾的全空行去掉，空单元格为 NaN（与 pd.read_excel 一致）。
+    列类型按批推断，同一列在不同批中的类型可能不同（如某批全空时为 float64）。
+
+    Args:
+        source: 文件路径或二进制文件对象（如 Streamlit 上传的文件）
+        sheet: 工作表序号或名称
+        columns: 需要的列，列名集合或判断函数（如 default_projection()），
+            None 表示全部列
+        batch_size: 每批行数
+
+    Yields:
+        DataFrame: 每批数据，索引在各批之间连续
+    """
+    select = _selector(columns)
+    if not _is_xlsx(source):
+        logger.info("非 xlsx 格式，使用 pd.read_excel 读取")
+        df = pd.read_excel(source, sheet_name=sheet, usecols=select)
+        for start in range(0, len(df), batch_size):
+            yield df.iloc[start:start + batch_size]
+        return
+
+    start = 0
+    for names, values in _row_batches(source, sheet, select, batch_size):
+        yield _frame(values, names, start)
+        start += len(values)
+
+
+def read_excel(
+    source: Source,
+    sheet: int | str = 0,
+    columns: Callable[[Any], bool] | Iterable[Any] | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    use_cache: bool = True,
+) -> pd.DataFrame:
+    """
+    流式读取整个工作表，参数见 iter_excel，列类型在全部行读完后统一推断
+
+    同一文件内容、工作表和列再次读取时直接加载快照（见 snapshot 模块），
+    不重新解码。
+
+    Args:
+        use_cache: 是否使用快照缓存
+
+    Returns:
+        DataFrame: 读取的数据
+
+    Examples:
+        >>> df = read_excel("products.xlsx", columns=default_projection())
+    """
+    select = _selector(columns)
+    cache = get_snapshot_cache() if use_cache else None
+    key = _snapshot_key(source, sheet, select) if cache else None
+    if key:
+        df = cache.load(key)
+        if df is not None:
+            return df
+
+    df = _read_excel(source, sheet, select, batch_size)
+    if key:
+        cache.save(key, df)
+    return df
+
+
+def _read_excel(source: Source, sheet: int | str, select, batch_size: int) -> pd.DataFrame:
+    if not _is_xlsx(source):
+        return pd.read_excel(source, sheet_name=sheet, usecols=select)
+
+    batches = list(_row_batches(source, sheet, select, batch_size))
+    if not batches:
+        return pd.DataFrame()
+    # 每批的列名相同，取第一批的
+    names = batches[0][0]
+    batches = [values for _, values in batches]
+    values = batches[0] if len(batches) == 1 else np.concatenate(batches)
+    return _frame(values, names)
+
+
+def detect_format(path: str | Path) -> str:
+    """
+    按扩展名识别输入格式
+
+    Args:
+        path: 输入文件路径
+
+    Returns:
+        str: excel、csv、tsv、parquet 或 jsonl
+
+    Raises:
+        ValueError: 不支持的扩展名
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix not in INPUT_FORMATS:
+        supported = "、".join(sorted(INPUT_FORMATS))
+        raise ValueError(f"不支持的文件格式: {suffix or path}，支持 {supported}")
+    return INPUT_FORMATS[suffix]
+
+
+def iter_table(
+    path: str | Path,
+    sheet: int | str = 0,
+    columns: Callable[[Any], bool] | Iterable[Any] | None = None,
+    chunksize: int = DEFAULT_BATCH_SIZE,
+    encoding: str = "utf-8-sig",
+    stream_excel: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """
+    按块读取 Excel、CSV、TSV、Parquet 或 JSONL 文件，格式按扩展名识别
+
+    文本格式和 Parquet 每次只读 chunksize 行，需要的列交给读取器筛选
+    （CSV/TSV 的 usecols、Parquet 的 columns），不需要的列不解析。JSONL
+    每行是完整的对象，只能在每块解析后再筛选列。Excel 默认整表读取一次，
+    作为一块返回，可以使用快照缓存（见 read_excel）；stream_excel 为 True
+    时按块流式读取（见 iter_excel），不使用快照。
+
+    Args:
+        path: 输入文件路径
+        sheet: Excel 工作表序号或名称，其他格式忽略
+        columns: 需要的列，列名集合或判断函数（如 default_projection()），
+            None 表示全部列
+        chunksize: 每块行数
+        encoding: 文本格式的编码，默认兼容带 BOM 的 UTF-8
+        stream_excel: Excel 是否也按块读取
+
+    Yields:
+        DataFrame: 每块数据，索引在各块之间连续
+
+    Examples:
+        >>> for chunk in iter_table("products.csv", columns=default_projection()):
+        ...     cleaned = clean_dataframe(chunk)
+    """
+    fmt = detect_format(path)
+    select = _selector(columns)
+    logger.info(f"按 {fmt} 格式读取: {path}")
+    if fmt == "excel" and stream_excel:
+        yield from iter_excel(path, sheet=sheet, columns=select, batch_size=chunksize)
+    elif fmt == "excel":
+        yield read_excel(path, sheet=sheet, columns=select)
+    elif fmt in ("csv", "tsv"):
+        reader = pd.read_csv(
+            path,
+            sep="\t" if fmt == "tsv" else ",",
+            usecols=select,
+            chunksize=chunksize,
+            encoding=encoding,
+        )
+        with reader:
+            yield from reader
+    elif fmt == "jsonl":
+        reader = pd.read_json(
+            path, lines=True, chunksize=chunksize, dtype=False, convert_dates=False,
+            encoding=encoding,
+        )
+        with reader:
+            for chunk in reader:
+                yield chunk if select is None else chunk[[c for c in chunk.columns if select(c)]]
+    else:
+        yield from _iter_parquet(path, select, chunksize)
+
+
+def _iter_parquet(path: str | Path, select, chunksize: int) -> Iterator[pd.DataFrame]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("读取 Parquet 文件需要安装 pyarrow: pip install pyarrow") from e
+
+    parquet = pq.ParquetFile(path)
+    names = parquet.schema_arrow.names
+    if select is not None:
+        names = [name for name in names if select(name)]
+    start = 0
+    for batch in parquet.iter_batches(batch_size=chunksize, columns=names):
+        chunk = batch.to_pandas()
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
+
+
+@lru_cache(maxsize=None)
+def _projected_parser_class() -> type:
+    """
+    只解码需要的列的工作表解析器类
+
+    继承 openpyxl 的内部解析器 openpyxl.worksheet._reader.WorkSheetParser，
+    在用到时才导入：openpyxl 调整内部接口时只影响 Excel 的快速路径（见
+    _data_rows 的回退），不影响导入本模块和读取其他格式。
+    """
+    from openpyxl.worksheet._reader import FORMULA_TAG, WorkSheetParser
+
+    class _ProjectedParser(WorkSheetParser):
+        """
+        只解码需要的列的工作表解析器
+
+        openpyxl 的解析器对每个单元格都解析坐标、转换类型并生成字典；这里按
+        单元格引用的列字母先判断是否需要，不需要的单元格直接跳过。
+        """
+
+        def __init__(self, ws, columns: list[int]):
+            """
+            Args:
+                ws: 只读工作表
+                columns: 需要的列序号（从 0 开始，升序）
+            """
+            wb = ws.parent
+            super().__init__(
+                ws._get_source(),
+                ws._shared_strings,
+                data_only=True,
+                epoch=wb.epoch,
+                date_formats=wb._date_formats,
+                timedelta_formats=wb._timedelta_formats,
+            )
+            # 列序号（从 1 开始） → 结果中的位置
+            self.positions = {col + 1: i for i, col in enumerate(columns)}
+            self.width = len(columns)
+            self._letters: dict[str, int] = {}
+
+        def parse_row(self, row):
+            """返回 (行号, 需要的列的值, 整行是否有值)"""
+            r = row.get("r")
+            self.row_counter = int(float(r)) if r else self.row_counter + 1
+            values = [None] * self.width
+            filled = False
+            col = 0
+            for element in row:
+                ref = element.get("r")
+                if ref:
+                    letters = ref.rstrip(_DIGITS)
+                    col = self._letters.get(letters) or self._letters.setdefault(
+                        letters, column_index_from_string(letters)
+                    )
+                else:
+                    col += 1
+                position = self.positions.get(col)
+                if position is not None:
+                    value = values[position] = self.parse_cell(element)["value"]
+                    filled = filled or value is not None
+                elif not filled:
+                    # 不需要的列不解码，有值（<v> 或 <is>）即可
+                    filled = any(child.tag != FORMULA_TAG for child in element)
+            return self.row_counter, tuple(values), filled
+
+    return _ProjectedParser
+
+
+def _data_rows(ws, keep: list[int]) -> Iterator[tuple[tuple, bool]]:
+    """
+    逐行返回表头以下各行 (需要的列的值, 整行是否有值)，缺失的行补为全空
+
+    整行是否有值用于与 pd.read_excel 一样按整行判断表尾空行。优先用
+    _projected_parser_class 的解析器；openpyxl 内部接口不可用（模块移动、
+    属性或构造参数变化）时退回 iter_rows，解析整行，结果相同但较慢。
+    """
+    try:
+        parser = _projected_parser_class()(ws, keep)
+    except (ImportError, AttributeError, TypeError) as e:
+        logger.debug(f"openpyxl 内部解析器不可用，改用 iter_rows: {e!r}")
+        pick = _row_getter(keep)
+        width = keep[-1] + 1
+        for row in ws.iter_rows(min_row=2, values_only=True):
+            # 只读模式下短行不补齐
+            if len(row) < width:
+                row = row + (None,) * (width - len(row))
+            yield pick(row), any(v is not None for v in row)
+        return
+
+    empty = ((None,) * len(keep), False)
+    expected = 2
+    try:
+        for idx, values, filled in parser.parse():
+            if idx < expected:
+                continue
+            for _ in range(expected, idx):
+                yield empty
+            expected = idx + 1
+            yield values, filled
+    finally:
+        parser.source.close()
+
+
+def _row_getter(offsets: list[int]) -> Callable[[tuple], tuple]:
+    """按位置取出一行中的若干值，结果总是元组"""
+    if len(offsets) == 1:
+        only = offsets[0]
+        return lambda row: (row[only],)
+    return operator.itemgetter(*offsets)
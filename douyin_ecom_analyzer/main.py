@@ -1,16 +1,21 @@
 import os
 import sys
 import argparse
-import pandas as pd
 import logging
 from datetime import datetime
 import time
+import pandas as pd
 from tqdm import tqdm
 
 # 导入项目模块 - 修改为完整包路径
-from douyin_ecom_analyzer.utils import clean_dataframe
+from douyin_ecom_analyzer.utils import chunked_url_validation, clean_dataframe
 from douyin_ecom_analyzer.analyzer import DouyinAnalyzer
 from douyin_ecom_analyzer.filter_engine import FilterEngine
+from douyin_ecom_analyzer.ingest import (
+    DEFAULT_BATCH_SIZE, default_projection, detect_format, iter_table
+)
+from douyin_ecom_analyzer.streaming import StreamAggregator
+from ecom_cleaner.cleaning.cleaner import DataCleaner
 
 # 配置日志
 logging.basicConfig(
@@ -25,7 +30,7 @@ def parse_args():
     
     parser.add_argument(
         'input_file', 
-        help='输入Excel文件路径'
+        help='输入文件路径，支持 xlsx/xls/csv/tsv/parquet/jsonl，按扩展名识别'
     )
     
     parser.add_argument(
@@ -43,7 +48,7 @@ def parse_args():
     parser.add_argument(
         '--no-url-check',
         action='store_true',
-        help='跳过URL有效性检查'
+        help='跳过URL联网检查，只离线校验链接结构'
     )
     
     parser.add_argument(
@@ -57,6 +62,40 @@ def parse_args():
         help='自定义过滤规则文件路径'
     )
     
+    parser.add_argument(
+        '--all-columns',
+        action='store_true',
+        help='读取全部列（默认只读取清洗、过滤和分析用到的列）'
+    )
+    
+    parser.add_argument(
+        '--chunksize',
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help='CSV/TSV/Parquet/JSONL 每块读取的行数'
+    )
+    
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='分块处理模式：逐块清洗、过滤和累计统计，内存占用与行数无关，'
+             '过滤后的行写入CSV文件，不生成图表（块大小见 --chunksize）'
+    )
+    
+    parser.add_argument(
+        '--top-k',
+        type=int,
+        default=100,
+        help='--stream 模式下保留近30天销量最高的商品数'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='清洗的进程数上限，默认按行数和CPU核数自动选择，1 为不使用多进程'
+    )
+    
     return parser.parse_args()
 
 def main():
@@ -74,34 +113,58 @@ def main():
     logger.info(f"开始处理文件: {args.input_file}")
     
     try:
-        # 读取Excel文件
-        logger.info("正在读取Excel文件...")
-        df = pd.read_excel(args.input_file, sheet_name=args.sheet)
-        logger.info(f"成功读取数据: {df.shape[0]}行 x {df.shape[1]}列")
-        
-        # 打印原始数据列名
-        logger.info(f"原始数据列: {', '.join(df.columns)}")
+        fmt = detect_format(args.input_file)
+    except ValueError as e:
+        logger.error(str(e))
+        return 1
+    
+    if args.stream:
+        return stream_main(args, start_time)
+    
+    try:
+        # 按块读取，默认只读取用到的列；每块读完即清洗和过滤，只保留过滤后的行
+        logger.info(f"正在读取{fmt}文件...")
+        columns = None if args.all_columns else default_projection()
+        filter_engine = FilterEngine(args.rules) if args.apply_filters else None
+        # 每块过滤后即在后台联网校验这一块保留的链接，与后面块的清洗、过滤同时进行
+        url_validation = None if args.no_url_check else chunked_url_validation()
         
-        # 清洗数据
-        logger.info("正在清洗数据...")
-        if args.no_url_check:
-            logger.info("已禁用URL检查")
+        parts = []
+        filter_parts = []
+        total_rows = 0
+        for chunk in iter_table(args.input_file, sheet=args.sheet, columns=columns,
+                                chunksize=args.chunksize):
+            if total_rows == 0:
+                # 打印原始数据列名
+                logger.info(f"原始数据列: {', '.join(map(str, chunk.columns))}")
+            total_rows += len(chunk)
+            
+            # 清洗数据：先做离线结构校验，联网检查在后台进行，与过滤和分析同时运行
+            logger.info(f"正在清洗数据: 第{total_rows - len(chunk) + 1}-{total_rows}行...")
+            # 数据块用完即弃，不必复制未改写的列
+            cleaned_chunk = clean_dataframe(chunk, url_check=False, workers=args.workers,
+                                            copy=False)
+            
+            # 应用过滤规则（如果启用）
+            if filter_engine is not None:
+                cleaned_chunk, chunk_stats = filter_engine.filter_data(cleaned_chunk)
+                filter_parts.append(chunk_stats)
+            if url_validation is not None:
+                url_validation.add(cleaned_chunk)
+            parts.append(cleaned_chunk)
         
-        cleaned_df = clean_dataframe(df)
-        logger.info(f"数据清洗完成: {cleaned_df.shape[0]}行 x {cleaned_df.shape[1]}列")
+        if not parts:
+            logger.error(f"文件中没有数据: {args.input_file}")
+            return 1
+        filtered_df = parts[0] if len(parts) == 1 else pd.concat(parts)
+        rows, cols = filtered_df.shape
+        logger.info(f"读取并清洗数据: {total_rows}行，保留 {rows}行 x {cols}列")
         
-        # 应用过滤规则（如果启用）
-        filtered_df = cleaned_df
-        filter_stats = None
+        if args.no_url_check:
+            logger.info("已禁用URL联网检查，仅做链接结构校验")
         
-        if args.apply_filters:
-            logger.info("正在应用过滤规则...")
-            
-            # 初始化过滤引擎
-            filter_engine = FilterEngine(args.rules)
-            
-            # 应用过滤
-            filtered_df, filter_stats = filter_engine.filter_data(cleaned_df)
+        if filter_engine is not None:
+            filter_stats = FilterEngine.combine_stats(filter_parts)
             
             # 输出过滤结果
             logger.info(f"过滤前数据量: {filter_stats['原始数据量']}")
@@ -112,12 +175,13 @@ def main():
                 logger.info(f"- {reason}: {count}项")
             
             # 生成过滤报告
-            filter_report_path = os.path.join(args.output, f'filter_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.md')
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filter_report_path = os.path.join(args.output, f'filter_report_{stamp}.md')
             filter_engine.generate_filter_report(filter_stats, filter_report_path)
             logger.info(f"过滤报告已保存: {filter_report_path}")
         
         # 创建分析器
-        analyzer = DouyinAnalyzer(filtered_df, args.output)
+        analyzer = DouyinAnalyzer(filtered_df, args.output, url_validation=url_validation)
         
         # 运行分析
         logger.info("正在进行数据分析...")
@@ -141,5 +205,79 @@ def main():
         logger.exception(f"处理过程中发生错误: {str(e)}")
         return 1
 
+def stream_main(args, start_time):
+    """
+    --stream 模式：每块依次读取、清洗（DataCleaner）、过滤并累计分布、统计摘要
+    和 Top-K，过滤后的行追加写入CSV，内存中只保留累计结果
+    
+    Args:
+        args: 命令行参数
+        start_time: 开始时间
+    
+    Returns:
+        int: 退出码
+    """
+    os.makedirs(args.output, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    rows_path = os.path.join(args.output, f'filtered_{timestamp}.csv')
+    report_path = os.path.join(args.output, f'stream_report_{timestamp}.xlsx')
+    
+    try:
+        columns = None if args.all_columns else default_projection()
+        cleaner = DataCleaner()
+        filter_engine = FilterEngine(args.rules) if args.apply_filters else None
+        aggregator = StreamAggregator(top_k=args.top_k)
+        filter_parts = []
+        total_rows = 0
+        
+        chunks = iter_table(args.input_file, sheet=args.sheet, columns=columns,
+                            chunksize=args.chunksize, stream_excel=True)
+        header = True
+        with open(rows_path, 'w', encoding='utf-8-sig', newline='') as rows_file:
+            for chunk in tqdm(chunks, desc="分块处理", unit="块"):
+                total_rows += len(chunk)
+                cleaned_chunk = cleaner.clean(chunk, workers=args.workers, copy=False)
+                
+                if filter_engine is not None:
+                    cleaned_chunk, chunk_stats = filter_engine.filter_data(cleaned_chunk)
+                    # 逐行的过滤原因随行数增长，分块模式不保留
+                    chunk_stats.pop("过滤原因", None)
+                    filter_parts.append(chunk_stats)
+                
+                aggregator.update(cleaned_chunk)
+                cleaned_chunk.to_csv(rows_file, header=header, index=False)
+                header = False
+        
+        logger.info(f"分块处理完成: 读取 {total_rows}行，保留 {aggregator.rows}行")
+        logger.info(f"过滤后的数据已保存: {rows_path}")
+        logger.info("URL联网检查在 --stream 模式下不进行")
+        
+        if filter_engine is not None:
+            filter_stats = FilterEngine.combine_stats(filter_parts)
+            logger.info(f"过滤率: {filter_stats['过滤率']}")
+            for reason, count in filter_stats.get("过滤详情", {}).items():
+                logger.info(f"- {reason}: {count}项")
+            filter_report_path = os.path.join(args.output, f'filter_report_{timestamp}.md')
+            filter_engine.generate_filter_report(filter_stats, filter_report_path)
+            logger.info(f"过滤报告已保存: {filter_report_path}")
+        
+        # 写入累计结果
+        results = aggregator.results()
+        with pd.ExcelWriter(report_path, engine='openpyxl') as writer:
+            results['sales'].to_excel(writer, sheet_name='销量分布')
+            results['commission'].to_excel(writer, sheet_name='佣金分布')
+            results['summary'].to_excel(writer, sheet_name='统计摘要')
+            if results['theme'] is not None:
+                results['theme'].to_excel(writer, sheet_name='类别分布')
+            results['top'].to_excel(writer, sheet_name=f'Top{args.top_k}', index=False)
+        logger.info(f"报表生成完成: {report_path}")
+        
+        logger.info(f"处理完成! 总耗时: {time.time() - start_time:.2f}秒")
+        return 0
+        
+    except Exception as e:
+        logger.exception(f"处理过程中发生错误: {str(e)}")
+        return 1
+
 if __name__ == "__main__":
     sys.exit(main()) 
\ No newline at end of file
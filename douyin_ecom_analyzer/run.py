@@ -3,7 +3,7 @@
 启动抖音电商数据分析工具
 
 用法:
-1. 命令行模式: python run.py cli input.xlsx
+1. 命令行模式: python run.py cli input.xlsx（也支持 csv/tsv/parquet/jsonl）
 2. Web界面模式: python run.py web
 """
 
@@ -33,7 +33,7 @@ def parse_args():
     parser.add_argument(
         'input_file', 
         nargs='?',
-        help='输入Excel文件路径 (仅CLI模式需要)'
+        help='输入文件路径，支持 xlsx/xls/csv/tsv/parquet/jsonl (仅CLI模式需要)'
     )
     
     parser.add_argument(
@@ -60,6 +60,24 @@ def parse_args():
         help='自定义过滤规则文件路径'
     )
     
+    parser.add_argument(
+        '--chunksize',
+        type=int,
+        help='CSV/TSV/Parquet/JSONL 每块读取的行数 (仅CLI模式)'
+    )
+    
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='分块处理模式，内存占用与行数无关 (仅CLI模式)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='清洗的进程数上限，默认自动选择 (仅CLI模式)'
+    )
+    
     return parser.parse_args()
 
 def main():
@@ -93,6 +111,15 @@ def main():
             if args.rules:
                 sys.argv.extend(['--rules', args.rules])
             
+            if args.chunksize:
+                sys.argv.extend(['--chunksize', str(args.chunksize)])
+            
+            if args.stream:
+                sys.argv.append('--stream')
+            
+            if args.workers:
+                sys.argv.extend(['--workers', str(args.workers)])
+            
             return cli_main()
             
         elif args.mode == 'web':
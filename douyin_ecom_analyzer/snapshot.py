@@ -0,0 +1,282 @@
+"""
+读取结果快照：同一个工作簿再次上传时不重新解码 xlsx
+
+按文件内容的哈希（加上工作表、读取的列和读取代码的版本）把 read_excel 的结果
+按列保存为 .npy 文件：数值、布尔、日期列直接保存，下次以内存映射方式加载，
+不复制数据；文本等 object 列保存为整数编码 .npy 加唯一值 .json，加载时只还原
+唯一值再按编码展开。
+
+快照目录总大小有上限，超出时删除最久未使用的快照。本项目不依赖 pyarrow，
+因此不用 Feather/Parquet。
+"""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import IO, Any, Union
+
+import numpy as np
+import pandas as pd
+
+from douyin_ecom_analyzer.cache_dir import get_cache_dir
+from douyin_ecom_analyzer.cleaning.memo import factorize_exact
+
+logger = logging.getLogger("snapshot")
+
+# 设为 0 可关闭快照缓存
+SNAPSHOT_CACHE_ENV = "DOUYIN_SNAPSHOT_CACHE"
+# 快照目录总大小上限（MB）
+SNAPSHOT_CACHE_MB_ENV = "DOUYIN_SNAPSHOT_CACHE_MB"
+DEFAULT_MAX_MB = 2048
+
+# 快照格式版本，格式修改时递增
+_FORMAT = 1
+_META = "meta.json"
+_CHUNK = 1 << 20
+
+Source = Union[str, Path, IO[bytes]]
+
+
+def content_digest(source: Source) -> str:
+    """
+    计算文件内容的哈希，文件对象读取后恢复位置
+
+    Args:
+        source: 文件路径或二进制文件对象
+
+    Returns:
+        str: 十六进制哈希
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK), b""):
+                digest.update(chunk)
+    else:
+        position = source.tell()
+        try:
+            for chunk in iter(lambda: source.read(_CHUNK), b""):
+                digest.update(chunk)
+        finally:
+            source.seek(position)
+    return digest.hexdigest()
+
+
+def _encode_value(value: Any) -> Any:
+    """唯一值、列名转为可写入 JSON 的值，日期时间类带类型标记"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, datetime.datetime):
+        return {"datetime": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"date": value.isoformat()}
+    if isinstance(value, datetime.time):
+        return {"time": value.isoformat()}
+    if isinstance(value, datetime.timedelta):
+        return {"timedelta": value.total_seconds()}
+    raise TypeError(f"快照不支持的值类型: {type(value).__name__}")
+
+
+def _decode_value(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return value
+    (kind, text), = value.items()
+    if kind == "datetime":
+        return datetime.datetime.fromisoformat(text)
+    if kind == "date":
+        return datetime.date.fromisoformat(text)
+    if kind == "time":
+        return datetime.time.fromisoformat(text)
+    return datetime.timedelta(seconds=text)
+
+
+def _directory_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.iterdir() if f.is_file())
+
+
+class SnapshotCache:
+    """
+    DataFrame 快照目录，每个快照一个子目录
+    """
+
+    def __init__(self, path: str | Path | None = None, max_bytes: int | None = None):
+        """
+        初始化快照缓存
+
+        Args:
+            path: 快照根目录，默认为缓存目录下的 snapshots
+            max_bytes: 快照总大小上限，默认 DEFAULT_MAX_MB
+        """
+        self.path = Path(path) if path else get_cache_dir("snapshots")
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = DEFAULT_MAX_MB << 20 if max_bytes is None else max_bytes
+
+    def load(self, key: str) -> pd.DataFrame | None:
+        """
+        加载快照，数值列以内存映射（写时复制）方式加载
+
+        Args:
+            key: 快照键
+
+        Returns:
+            pd.DataFrame | None: 快照数据，不存在或已损坏时为 None
+        """
+        entry = self.path / key
+        try:
+            meta = json.loads((entry / _META).read_text(encoding="utf-8"))
+            if meta["format"] != _FORMAT:
+                return None
+            data = {}
+            for i, column in enumerate(meta["columns"]):
+                values = np.load(entry / f"{i}.npy", mmap_mode="c").view(np.ndarray)
+                if column["encoded"]:
+                    decoded = json.loads((entry / f"{i}.json").read_text(encoding="utf-8"))
+                    if column["tagged"]:
+                        decoded = [_decode_value(v) for v in decoded]
+                    # 编码 -1 为缺失值，对应唯一值末尾追加的 NaN
+                    uniques = np.empty(len(decoded) + 1, dtype=object)
+                    uniques[:-1] = decoded
+                    uniques[-1] = np.nan
+                    values = uniques[values]
+                data[i] = values
+            df = pd.DataFrame(data, copy=False)
+            df.columns = pd.Index([_decode_value(c["name"]) for c in meta["columns"]])
+            os.utime(entry)  # 记录使用时间，按最久未使用淘汰
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"快照 {key} 加载失败，重新读取: {e}")
+            return None
+        logger.info(f"从快照加载: {df.shape[0]}行 x {df.shape[1]}列")
+        return df
+
+    def save(self, key: str, df: pd.DataFrame) -> bool:
+        """
+        保存快照，先写入临时目录再改名，写入后按大小上限淘汰旧快照
+
+        Args:
+            key: 快照键
+            df: 要保存的数据，索引不保存（加载后为 RangeIndex）
+
+        Returns:
+            bool: 是否已保存（含不支持的列类型时不保存）
+        """
+        entry = self.path / key
+        tmp = self.path / f".tmp-{key}-{os.getpid()}"
+        try:
+            tmp.mkdir()
+            columns = []
+            for i, name in enumerate(df.columns):
+                series = df.iloc[:, i]
+                column = {"name": _encode_value(name), "encoded": False, "tagged": False}
+                if series.dtype == object:
+                    codes, values = factorize_exact(series)
+                    uniques = [_encode_value(v) for v in values]
+                    column["encoded"] = True
+                    # 只有含日期时间类的值时，加载时才需要逐个还原
+                    column["tagged"] = any(isinstance(v, dict) for v in uniques)
+                    text = json.dumps(uniques, ensure_ascii=False)
+                    (tmp / f"{i}.json").write_text(text, encoding="utf-8")
+                    array = codes.astype(np.int32)
+                elif isinstance(series.dtype, np.dtype):
+                    array = series.to_numpy()
+                else:
+                    raise TypeError(f"快照不支持的列类型: {series.dtype}")
+                np.save(tmp / f"{i}.npy", array, allow_pickle=False)
+                columns.append(column)
+            meta = {"format": _FORMAT, "rows": len(df), "columns": columns}
+            (tmp / _META).write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, entry)
+        except (OSError, TypeError, ValueError) as e:
+            # 目标已存在（其他进程同时写入）时也会失败，保留已有快照即可
+            if not entry.exists():
+                logger.warning(f"保存快照失败: {e}")
+            shutil.rmtree(tmp, ignore_errors=True)
+            return False
+        logger.info(f"已保存快照: {entry}")
+        self.evict(keep=key)
+        return True
+
+    def evict(self, keep: str | None = None) -> int:
+        """
+        快照总大小超过上限时，按最近使用时间从旧到新删除
+
+        Args:
+            keep: 不删除的快照键，一般为刚写入的快照
+
+        Returns:
+            int: 删除的快照个数
+        """
+        entries = []
+        for entry in self.path.iterdir():
+            if entry.is_dir() and not entry.name.startswith("."):
+                try:
+                    entries.append((entry.stat().st_mtime, _directory_size(entry), entry))
+                except OSError:
+                    continue
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            if entry.name == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"快照目录超过上限，删除 {removed} 个最久未使用的快照")
+        return removed
+
+
+_default_cache: SnapshotCache | None = None
+
+
+def get_snapshot_cache() -> SnapshotCache | None:
+    """
+    获取进程级共享的快照缓存，环境变量 DOUYIN_SNAPSHOT_CACHE=0 时返回 None
+
+    大小上限可通过环境变量 DOUYIN_SNAPSHOT_CACHE_MB 设置。
+
+    Returns:
+        SnapshotCache | None: 共享缓存
+    """
+    global _default_cache
+    if os.environ.get(SNAPSHOT_CACHE_ENV, "1") == "0":
+        return None
+    if _default_cache is None:
+        max_mb = os.environ.get(SNAPSHOT_CACHE_MB_ENV)
+        try:
+            max_bytes = int(float(max_mb) * (1 << 20)) if max_mb else None
+        except ValueError:
+            logger.warning(f"无效的快照目录大小上限: {max_mb!r}，使用默认值")
+            max_bytes = None
+        try:
+            _default_cache = SnapshotCache(max_bytes=max_bytes)
+        except OSError as e:
+            logger.warning(f"无法创建快照目录，已禁用快照: {e}")
+            return None
+    return _default_cache
+
+
+def snapshot_key(digest: str, *parts: Any) -> str:
+    """
+    快照键：内容哈希加上影响读取结果的参数
+
+    Args:
+        digest: content_digest 的结果
+        parts: 工作表、读取的列、读取代码版本等
+
+    Returns:
+        str: 快照键，可用作目录名
+    """
+    extra = hashlib.blake2b(repr((_FORMAT, *parts)).encode(), digest_size=8).hexdigest()
+    return f"{digest}-{extra}"
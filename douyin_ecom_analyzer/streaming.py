@@ -0,0 +1,282 @@
+"""
+分块聚合模块：按块累计分析结果，内存占用与总行数无关
+
+命令行的 --stream 模式下，每块数据清洗、过滤后交给 StreamAggregator，只保留
+销量和佣金分布、数值列统计摘要、主题分布和 Top-K 商品，不保留全部数据。
+
+分布区间与 DouyinAnalyzer 的销量、佣金分析相同；统计摘要中的个数、均值、
+标准差、最值、空值数是精确值，分位数在数据量超过抽样容量时由等概率抽样
+（蓄水池抽样）估计。
+"""
+
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from douyin_ecom_analyzer.cleaning.binding import bind_columns
+from douyin_ecom_analyzer.cleaning.themes import ThemeTagger, recorded_theme_names
+
+logger = logging.getLogger("streaming")
+
+# 销量区间（近30天销量，件）
+SALES_BINS = [0, 1000, 5000, 10000, 50000, 100000, float("inf")]
+SALES_LABELS = ["<1k", "1k-5k", "5k-1w", "1w-5w", "5w-10w", ">10w"]
+
+# 佣金比例区间（0-1 小数）
+COMMISSION_BINS = [0, 0.05, 0.1, 0.15, 0.2, 0.3, 1.0]
+COMMISSION_LABELS = ["0-5%", "5-10%", "10-15%", "15-20%", "20-30%", ">30%"]
+
+# 分位数估计的抽样容量，数据量不超过该值时分位数为精确值
+DEFAULT_SAMPLE_SIZE = 100_000
+
+
+class BinnedCounter:
+    """
+    分区间计数，区间为左开右闭，与 pd.cut 的默认行为一致，区间外和空值不计
+    """
+
+    def __init__(self, bins: list[float], labels: list[str], name: str):
+        """
+        Args:
+            bins: 区间边界，升序
+            labels: 区间名称，比边界少一个
+            name: 结果索引的名称，如 "销量区间"
+        """
+        self.bins = np.asarray(bins, dtype=np.float64)
+        self.labels = labels
+        self.name = name
+        self.counts = np.zeros(len(labels), dtype=np.int64)
+
+    def update(self, values: np.ndarray) -> None:
+        """累计一块数据"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[(values > self.bins[0]) & (values <= self.bins[-1])]
+        positions = np.searchsorted(self.bins, values, side="left") - 1
+        self.counts += np.bincount(positions, minlength=len(self.labels))
+
+    def result(self) -> pd.Series:
+        """
+        Returns:
+            Series: 区间 → 商品数，与 pd.cut(...).value_counts().sort_index() 相同
+        """
+        index = pd.CategoricalIndex(
+            self.labels, categories=self.labels, ordered=True, name=self.name
+        )
+        return pd.Series(self.counts.copy(), index=index, name="count")
+
+
+class _ColumnSummary:
+    """单个数值列的累计统计量，均值和方差按 Chan 等人的分组公式合并"""
+
+    def __init__(self, sample_size: int, rng: np.random.Generator):
+        self.count = 0
+        self.nulls = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sample = np.empty(sample_size, dtype=np.float64)
+        self.rng = rng
+
+    def update(self, values: np.ndarray) -> None:
+        missing = np.isnan(values)
+        self.nulls += int(np.count_nonzero(missing))
+        values = values[~missing]
+        n = len(values)
+        if n == 0:
+            return
+
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._sample(values)
+        self.count = total
+
+    def _sample(self, values: np.ndarray) -> None:
+        """蓄水池抽样：第 i 个值以 容量/i 的概率替换样本中的随机位置"""
+        capacity = len(self.sample)
+        filled = min(self.count, capacity)
+        room = min(capacity - filled, len(values))
+        self.sample[filled:filled + room] = values[:room]
+        rest = values[room:]
+        if len(rest):
+            seen = np.arange(self.count + room + 1, self.count + len(values) + 1)
+            slots = self.rng.integers(0, seen)
+            keep = slots < capacity
+            # 同一位置多次替换时保留最后一次，与逐个抽样相同
+            self.sample[slots[keep]] = rest[keep]
+
+    def describe(self) -> dict[str, float]:
+        total = self.count + self.nulls
+        sample = self.sample[:min(self.count, len(self.sample))]
+        if self.count:
+            q1, median, q3 = np.quantile(sample, [0.25, 0.5, 0.75])
+        else:
+            q1 = median = q3 = np.nan
+        return {
+            "count": float(self.count),
+            "mean": self.mean if self.count else np.nan,
+            "std": np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan,
+            "min": self.min if self.count else np.nan,
+            "25%": q1,
+            "50%": median,
+            "75%": q3,
+            "max": self.max if self.count else np.nan,
+            "中位数": median,
+            "非空值数": float(self.count),
+            "空值数": float(self.nulls),
+            "空值比例": self.nulls / total if total else np.nan,
+        }
+
+
+class RunningSummary:
+    """
+    数值列的累计统计摘要，格式与 DouyinAnalyzer.generate_summary_stats 相同
+    """
+
+    def __init__(self, sample_size: int = DEFAULT_SAMPLE_SIZE, seed: int = 0):
+        """
+        Args:
+            sample_size: 每列分位数估计的抽样容量
+            seed: 抽样的随机种子，相同输入的结果可复现
+        """
+        self.sample_size = sample_size
+        self.rng = np.random.default_rng(seed)
+        self.columns: dict[str, _ColumnSummary] = {}
+
+    def update(self, df: pd.DataFrame) -> None:
+        """
+        累计一块数据的数值列
+
+        某列在一块中为数值类型后即开始统计，之后各块中该列无法转为数值的值
+        计为空值（分块推断的类型可能不同）。
+        """
+        numeric = df.select_dtypes(include=[np.number]).columns
+        for col in numeric:
+            if col not in self.columns:
+                self.columns[col] = _ColumnSummary(self.sample_size, self.rng)
+        for col, summary in self.columns.items():
+            if col not in df.columns:
+                continue
+            values = df[col]
+            if col not in numeric:
+                values = pd.to_numeric(values, errors="coerce")
+            summary.update(values.to_numpy(dtype=np.float64, na_value=np.nan))
+
+    def result(self) -> pd.DataFrame:
+        """
+        Returns:
+            DataFrame: 行为统计量，列为数值列
+        """
+        return pd.DataFrame({col: s.describe() for col, s in self.columns.items()})
+
+
+class TopK:
+    """
+    按排序键保留最大的 k 行，键相同时保留先出现的行
+    """
+
+    def __init__(self, k: int):
+        """
+        Args:
+            k: 保留的行数
+        """
+        self.k = k
+        self.rows: pd.DataFrame | None = None
+        self.keys = np.empty(0, dtype=np.float64)
+
+    def update(self, df: pd.DataFrame, keys: np.ndarray) -> None:
+        """累计一块数据，keys 为与 df 对齐的排序键，空值排在最后"""
+        keys = np.nan_to_num(np.asarray(keys, dtype=np.float64), nan=-np.inf)
+        if len(keys) > self.k:
+            # 块内先取前 k，不排序整块
+            positions = np.argsort(-keys, kind="stable")[:self.k]
+            positions.sort()
+            df, keys = df.iloc[positions], keys[positions]
+        rows = df if self.rows is None else pd.concat([self.rows, df])
+        keys = np.concatenate([self.keys, keys])
+        order = np.argsort(-keys, kind="stable")[:self.k]
+        self.rows, self.keys = rows.iloc[order], keys[order]
+
+    def result(self) -> pd.DataFrame:
+        """
+        Returns:
+            DataFrame: 按排序键降序的前 k 行
+        """
+        return self.rows if self.rows is not None else pd.DataFrame()
+
+
+class StreamAggregator:
+    """
+    --stream 模式的分析结果累计器
+
+    列按逻辑字段绑定（见 cleaning.binding），DataCleaner 的 _val 列和
+    clean_dataframe 的 _清洗 列都可以。
+    """
+
+    def __init__(self, top_k: int = 100, sample_size: int = DEFAULT_SAMPLE_SIZE,
+                 themes: dict | None = None):
+        """
+        Args:
+            top_k: 保留近30天销量最高的商品数
+            sample_size: 统计摘要中分位数估计的抽样容量
+            themes: 主题名 → 关键词列表，默认为 themes.DEFAULT_THEMES
+        """
+        self.sales = BinnedCounter(SALES_BINS, SALES_LABELS, "销量区间")
+        self.commission = BinnedCounter(COMMISSION_BINS, COMMISSION_LABELS, "佣金区间")
+        self.summary = RunningSummary(sample_size)
+        self.top = TopK(top_k)
+        self.tagger = ThemeTagger(themes)
+        self.theme_counts = None
+        self.rows = 0
+
+    def update(self, df: pd.DataFrame) -> None:
+        """
+        累计一块清洗（和过滤）后的数据
+
+        Args:
+            df: 清洗后的数据块
+        """
+        self.rows += len(df)
+        binding = bind_columns(df.columns)
+        if "sales_30d" in binding:
+            sales = pd.to_numeric(df[binding.column("sales_30d")], errors="coerce").to_numpy()
+            self.sales.update(sales)
+            self.top.update(df, sales)
+        if "commission" in binding:
+            bound = binding.fields["commission"]
+            rates = pd.to_numeric(df[bound.column], errors="coerce").to_numpy()
+            self.commission.update(rates / bound.scale)
+        self.summary.update(df)
+
+        # theme_id 的主题与本累计器相同时直接使用，否则重新标记
+        if recorded_theme_names(df) == self.tagger.themes:
+            ids = df["theme_id"].to_numpy()
+        elif "商品名称" in df.columns:
+            ids = self.tagger.tag(df["商品名称"]).ids
+        else:
+            return
+        counts = self.tagger.counts(ids)
+        self.theme_counts = counts if self.theme_counts is None else self.theme_counts + counts
+
+    def results(self) -> dict:
+        """
+        Returns:
+            dict: sales、commission（区间 → 商品数）、summary（统计摘要）、
+                theme（主题 → 商品数，缺少商品名称时为 None）、top（Top-K 商品）
+        """
+        return {
+            "sales": self.sales.result(),
+            "commission": self.commission.result(),
+            "summary": self.summary.result(),
+            "theme": self.theme_counts,
+            "top": self.top.result(),
+        }
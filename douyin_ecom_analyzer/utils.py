@@ -2,9 +2,12 @@ import re
 import pandas as pd
 import numpy as np
 import requests
-from tqdm import tqdm
 import logging
 
+from douyin_ecom_analyzer.cleaning.columnar import parse_percent_column, parse_sales_column
+from douyin_ecom_analyzer.cleaning.parallel import choose_workers, parallel_clean
+from douyin_ecom_analyzer.cleaning.vocab_cache import flush_vocab_cache
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -120,63 +123,140 @@ def validate_url(url, timeout=2):
     if not url.startswith(('http://', 'https://')):
         return False
     
+    from douyin_ecom_analyzer.validation.canonical import canonicalize_url
+    from douyin_ecom_analyzer.validation.url_cache import get_url_cache
+    
+    canonical = canonicalize_url(url)
+    if canonical is None:
+        return False
+    
+    # 先查URL缓存
+    cache = get_url_cache()
+    status = cache.get(canonical.key) if cache is not None else None
+    if status is not None:
+        return status < 400
+    
     try:
         # 发送HEAD请求检查URL是否可访问
-        response = requests.head(url, timeout=timeout, allow_redirects=True)
-        return response.status_code < 400
+        status = requests.head(canonical.url, timeout=timeout, allow_redirects=True).status_code
     except requests.RequestException:
         return False
+    if cache is not None:
+        cache.put(canonical.key, status)
+    return status < 400
 
-def batch_validate_urls(df, url_columns, max_workers=10):
+def batch_validate_urls(df, url_columns, max_workers=64, limit_per_host=8, resume=True):
     """
     批量验证DataFrame中的URL
     
+    所有URL列合并后一起校验：规范化后相同的链接（包括同一商品ID的抖音和
+    蝉妈妈链接）只请求一次，结果再按列写回，见 validation.url_checker.check_urls。
+    结果边校验边写入校验日志，中途被终止后用同一数据重新调用只校验剩余的链接。
+    
     Args:
         df: 包含URL的DataFrame
         url_columns: URL列名列表
-        max_workers: 并行处理的最大工作线程数
+        max_workers: 全局最大并发请求数
+        limit_per_host: 单个域名的最大并发请求数
+        resume: 是否从中断前的校验日志恢复
     
     Returns:
         DataFrame: 添加了URL验证结果的DataFrame
     """
-    from concurrent.futures import ThreadPoolExecutor
-    
-    result_df = df.copy()
+    from douyin_ecom_analyzer.validation.url_checker import add_valid_columns, check_urls
     
+    columns = []
     for col in url_columns:
         if col not in df.columns:
             logger.warning(f"列 {col} 不存在，跳过验证")
             continue
-        
-        valid_col = f"{col}_有效"
-        result_df[valid_col] = False
-        
-        urls = df[col].dropna().tolist()
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            results = list(tqdm(
-                executor.map(validate_url, urls),
-                total=len(urls),
-                desc=f"验证 {col}"
-            ))
-        
-        # 将结果填回DataFrame
-        valid_dict = dict(zip(urls, results))
-        result_df.loc[df[col].notna(), valid_col] = df.loc[df[col].notna(), col].map(valid_dict)
+        columns.append(col)
+    if not columns:
+        return df.copy(deep=False)
     
-    return result_df
+    urls = pd.concat([df[col].dropna() for col in columns], ignore_index=True)
+    valid_dict, _ = check_urls(
+        urls,
+        limit=max_workers,
+        limit_per_host=limit_per_host,
+        desc=f"验证 {'、'.join(columns)}",
+        resume=resume,
+    )
+    
+    # 将结果按列填回DataFrame
+    return add_valid_columns(df, columns, valid_dict)
 
-def clean_dataframe(df):
+def start_url_validation(df, url_columns=None, max_workers=64, limit_per_host=8):
     """
-    清洗整个DataFrame
+    在后台开始联网验证URL，立即返回
+    
+    清洗、过滤和分析可以同时进行，需要 _有效 列时再调用返回对象的 join(df)。
     
     Args:
-        df: 原始DataFrame
+        df: 包含URL的DataFrame
+        url_columns: URL列名列表，默认为列名含"链接"的列
+        max_workers: 全局最大并发请求数
+        limit_per_host: 单个域名的最大并发请求数
     
     Returns:
-        DataFrame: 清洗后的DataFrame
+        BackgroundUrlValidation: 后台校验任务
+    """
+    from douyin_ecom_analyzer.validation.background import BackgroundUrlValidation
+    
+    if url_columns is None:
+        url_columns = [col for col in df.columns if '链接' in col]
+    return BackgroundUrlValidation(
+        df, url_columns, limit=max_workers, limit_per_host=limit_per_host
+    )
+
+def chunked_url_validation(url_columns=None, max_workers=64, limit_per_host=8):
+    """
+    按块在后台联网验证URL：每块过滤后调用返回对象的 add(chunk) 开始校验
+    
+    与 start_url_validation 相同，需要 _有效 列时再调用 join(df)。各块依次
+    校验，并发上限与整表校验相同。
+    
+    Args:
+        url_columns: URL列名列表，默认为第一块中列名含"链接"的列
+        max_workers: 全局最大并发请求数
+        limit_per_host: 单个域名的最大并发请求数
+    
+    Returns:
+        ChunkedUrlValidation: 按块的后台校验任务
+    """
+    from douyin_ecom_analyzer.validation.background import ChunkedUrlValidation
+    
+    return ChunkedUrlValidation(url_columns, limit=max_workers, limit_per_host=limit_per_host)
+
+def structural_validate_urls(df, url_columns):
+    """
+    离线验证DataFrame中的URL结构（协议、域名和商品ID），不发请求
+    
+    生成与 batch_validate_urls 相同的 <列名>_有效 列，见 validation.structural。
+    
+    Args:
+        df: 包含URL的DataFrame
+        url_columns: URL列名列表
+    
+    Returns:
+        DataFrame: 添加了URL验证结果的DataFrame
     """
-    # 创建副本避免修改原始数据
-    cleaned_df = df.copy()
+    from douyin_ecom_analyzer.validation.structural import structural_valid
+    
+    result_df = df.copy(deep=False)
+    for col in url_columns:
+        if col not in df.columns:
+            logger.warning(f"列 {col} 不存在，跳过验证")
+            continue
+        result_df[f"{col}_有效"] = structural_valid(df[col])
+        logger.info(f"{col} 结构有效: {result_df[f'{col}_有效'].sum()}/{df[col].notna().sum()}")
+    
+    return result_df
+
+def _clean_values(df):
+    """逐行独立的值清洗：去除空格、解析销量和佣金，可按行分区并行执行"""
+    # 浅复制避免修改原始数据：下面只整列替换或新增列，不改写原列的数据
+    cleaned_df = df.copy(deep=False)
     
     # 基本清洗：去除前后空格，替换特殊字符等
     for col in cleaned_df.columns:
@@ -185,14 +265,39 @@ def clean_dataframe(df):
     
     # 特定字段清洗
     if '近30天销量' in cleaned_df.columns:
-        cleaned_df['近30天销量_清洗'] = cleaned_df['近30天销量'].apply(clean_sales_volume)
+        sales = parse_sales_column(cleaned_df['近30天销量'], how='mean')
+        cleaned_df['近30天销量_清洗'] = sales.values
     
     if '佣金比例' in cleaned_df.columns:
-        cleaned_df['佣金比例_清洗'] = cleaned_df['佣金比例'].apply(clean_commission_rate)
+        commission = parse_percent_column(cleaned_df['佣金比例'], how='mean')
+        cleaned_df['佣金比例_清洗'] = commission.values
+    flush_vocab_cache()
+    return cleaned_df
+
+def clean_dataframe(df, url_check=True, workers=1, copy=True):
+    """
+    清洗整个DataFrame，不修改 df
+    
+    Args:
+        df: 原始DataFrame
+        url_check: 是否联网检查URL可访问性，为 False 时只做离线结构校验
+        workers: 值清洗的进程数，1 为在本进程清洗，None 为按行数自动选择；
+            URL 校验始终在本进程进行
+        copy: 是否复制未改写的列。为 False 时结果与 df 共用这些列的数据，
+            修改结果会同时改动 df，只适合用完即弃的输入（如分块读取的数据块）
+    
+    Returns:
+        DataFrame: 清洗后的DataFrame
+    """
+    cleaned_df = parallel_clean(
+        df, _clean_values, workers=choose_workers(len(df), workers), copy=copy
+    )
     
     # 验证URL列
     url_columns = [col for col in cleaned_df.columns if '链接' in col]
-    if url_columns:
+    if url_columns and url_check:
         cleaned_df = batch_validate_urls(cleaned_df, url_columns)
+    elif url_columns:
+        cleaned_df = structural_validate_urls(cleaned_df, url_columns)
     
     return cleaned_df 
\ No newline at end of file
@@ -0,0 +1,4 @@
+# douyin_ecom_analyzer.validation 包
+"""
+商品链接校验模块
+"""
@@ -0,0 +1,108 @@
+"""
+单个域名的自适应并发（AIMD）和熔断
+
+每个域名维护一个并发窗口：请求成功且延迟正常时窗口加性增长（每完成一窗口
+约 +1），出现超时、限流（429）、服务端错误（5xx）或响应明显变慢时窗口减半。
+“变慢”与该域名自己的最低延迟比较，本来就慢但稳定的域名不会被限成串行。
+连续失败或错误率过高时熔断，该域名剩余的链接不再请求，直接记为未知。
+"""
+
+from __future__ import annotations
+
+from collections import deque
+
+# 熔断的域名剩余链接的状态码（未知，不是有效也不是无效）
+STATUS_UNKNOWN = -1
+
+# 初始并发窗口
+DEFAULT_INITIAL_WINDOW = 2.0
+# 延迟超过请求超时的该比例、并且超过该域名最低延迟的 LATENCY_INFLATION 倍视为拥塞
+SLOW_FRACTION = 0.5
+LATENCY_INFLATION = 2.0
+# 连续失败次数达到该值熔断
+BREAKER_CONSECUTIVE = 5
+# 请求数达到 BREAKER_MIN_SAMPLES 后错误率不低于 BREAKER_ERROR_RATE 熔断
+BREAKER_MIN_SAMPLES = 20
+BREAKER_ERROR_RATE = 0.5
+# 延迟指数移动平均的权重
+_LATENCY_ALPHA = 0.2
+
+
+def is_failure(status: int | None) -> bool:
+    """网络错误、超时、限流和服务端错误视为域名拥塞或故障"""
+    return status is None or status == 429 or status >= 500
+
+
+class HostState:
+    """
+    单个域名的待校验队列、并发窗口和熔断状态
+    """
+
+    def __init__(self, max_window: int, initial_window: float = DEFAULT_INITIAL_WINDOW):
+        """
+        初始化域名状态
+
+        Args:
+            max_window: 并发窗口上限
+            initial_window: 初始并发窗口
+        """
+        self.max_window = max_window
+        self.window = max(1.0, min(initial_window, max_window))
+        self.pending: deque[str] = deque()
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency = 0.0  # 延迟的指数移动平均（秒）
+        self.min_latency = float("inf")  # 成功请求的最低延迟（秒）
+        self.open = False  # 是否已熔断
+        self._since_decrease = 0
+
+    def can_send(self) -> bool:
+        """未熔断、有待校验链接且并发未达到窗口"""
+        return not self.open and bool(self.pending) and self.in_flight < int(self.window)
+
+    def _decrease(self) -> None:
+        # 每个窗口最多减半一次，避免同一批并发请求的失败把窗口连续减到底
+        if self._since_decrease >= self.window:
+            self.window = max(1.0, self.window / 2)
+            self._since_decrease = 0
+
+    def record(self, status: int | None, elapsed: float, slow: float) -> None:
+        """
+        记录一次请求结果并调整窗口和熔断状态
+
+        Args:
+            status: HTTP 状态码，网络错误和超时为 None
+            elapsed: 请求耗时（秒）
+            slow: 视为拥塞的延迟阈值（秒）
+        """
+        self.requests += 1
+        self._since_decrease += 1
+        self.latency = elapsed if self.requests == 1 else (
+            _LATENCY_ALPHA * elapsed + (1 - _LATENCY_ALPHA) * self.latency
+        )
+
+        if is_failure(status):
+            self.failures += 1
+            self.consecutive_failures += 1
+            self._decrease()
+        else:
+            self.consecutive_failures = 0
+            self.min_latency = min(self.min_latency, elapsed)
+            if elapsed > slow and elapsed > LATENCY_INFLATION * self.min_latency:
+                self._decrease()
+            else:
+                self.window = min(self.max_window, self.window + 1 / self.window)
+
+        if self.consecutive_failures >= BREAKER_CONSECUTIVE or (
+            self.requests >= BREAKER_MIN_SAMPLES
+            and self.failures / self.requests >= BREAKER_ERROR_RATE
+        ):
+            self.open = True
+
+    def __str__(self) -> str:
+        return (
+            f"请求{self.requests}, 失败{self.failures}, 平均延迟{self.latency * 1000:.0f}ms, "
+            f"并发窗口{self.window:.1f}" + (", 已熔断" if self.open else "")
+        )
@@ -0,0 +1,190 @@
+"""
+后台URL校验：在单独线程中联网校验链接，清洗、过滤和分析同时进行
+
+URL校验几乎全是网络等待，而清洗、过滤和分析不依赖 _有效 列。先启动后台
+校验，等真正需要结果（URL有效性分析、Excel报表）时再合并，总耗时接近
+max(网络, 计算) 而不是两者之和。
+
+按块读取时用 ChunkedUrlValidation：每块过滤后立即开始校验这一块保留的链接，
+后面块的清洗和过滤与网络等待同时进行。
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import Future, wait
+from typing import Any, Iterable
+
+import pandas as pd
+
+from douyin_ecom_analyzer.validation.url_checker import (
+    ValidationStats,
+    add_valid_columns,
+    check_urls,
+)
+
+logger = logging.getLogger("url_validation")
+
+
+class BackgroundUrlValidation:
+    """
+    后台运行的URL校验任务
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        url_columns: Iterable[str],
+        after: BackgroundUrlValidation | None = None,
+        **check_kwargs: Any,
+    ):
+        """
+        取出链接并立即在后台线程中开始校验
+
+        Args:
+            df: 包含URL的DataFrame，只在这里读取一次链接值
+            url_columns: URL列名列表，不存在的列会被忽略
+            after: 等该任务结束后再发请求，不为 None 时两个任务不同时占用并发
+            check_kwargs: 传给 check_urls 的参数，如 limit、limit_per_host
+        """
+        self.url_columns = [col for col in url_columns if col in df.columns]
+        self.stats: ValidationStats | None = None
+        urls = pd.concat(
+            [df[col].dropna() for col in self.url_columns] or [pd.Series(dtype=object)],
+            ignore_index=True,
+        )
+        check_kwargs.setdefault("desc", f"后台验证 {'、'.join(self.url_columns)}")
+
+        self._future: Future = Future()
+        # 守护线程：主流程异常退出时不必等待剩余的网络请求
+        self._thread = threading.Thread(
+            target=self._run, args=(urls, check_kwargs, after), name="url-validation",
+            daemon=True,
+        )
+        self._thread.start()
+        logger.info(f"已在后台开始URL校验: {len(urls)}个链接")
+
+    def _run(
+        self, urls: pd.Series, check_kwargs: dict[str, Any], after: BackgroundUrlValidation | None
+    ) -> None:
+        if after is not None:
+            # 前一个任务失败也继续，异常由它自己的 result() 抛出
+            wait([after._future])
+        if not self._future.set_running_or_notify_cancel():
+            return
+        try:
+            valid, self.stats = check_urls(urls, **check_kwargs)
+        except BaseException as e:  # 异常在 result() 中重新抛出
+            self._future.set_exception(e)
+        else:
+            self._future.set_result(valid)
+
+    def done(self) -> bool:
+        """后台校验是否已完成"""
+        return self._future.done()
+
+    def result(self, timeout: float | None = None) -> dict[Any, bool]:
+        """
+        等待后台校验完成
+
+        Args:
+            timeout: 最长等待秒数，None 为一直等待
+
+        Returns:
+            dict: URL → 是否有效
+        """
+        if not self.done():
+            logger.info("等待后台URL校验完成...")
+        return self._future.result(timeout)
+
+    def join(self, df: pd.DataFrame, timeout: float | None = None) -> pd.DataFrame:
+        """
+        等待校验完成并写入 <列名>_有效 列
+
+        结果按链接值映射，df 可以是启动校验后过滤得到的子集。
+
+        Args:
+            df: 需要校验结果的DataFrame
+            timeout: 最长等待秒数
+
+        Returns:
+            DataFrame: 添加了URL验证结果的DataFrame
+        """
+        return add_valid_columns(df, self.url_columns, self.result(timeout))
+
+
+class ChunkedUrlValidation:
+    """
+    按数据块启动的后台URL校验，接口与 BackgroundUrlValidation 相同
+
+    每块清洗、过滤后调用 add 开始校验这一块保留的链接，之后的块继续清洗和
+    过滤。各块依次校验，同一时刻只有一块在发请求，全局和单域名并发上限与
+    整表校验相同；前面块的结果已写入URL缓存，重复出现的链接不再请求。
+    """
+
+    def __init__(self, url_columns: Iterable[str] | None = None, **check_kwargs: Any):
+        """
+        初始化，此时还不发请求
+
+        Args:
+            url_columns: URL列名列表，默认为第一块中列名含"链接"的列
+            check_kwargs: 传给 check_urls 的参数，如 limit、limit_per_host
+        """
+        self.url_columns = None if url_columns is None else list(url_columns)
+        self.check_kwargs = check_kwargs
+        self.parts: list[BackgroundUrlValidation] = []
+
+    def add(self, df: pd.DataFrame) -> None:
+        """
+        在后台开始校验一块数据的链接，排在已加入的块之后
+
+        Args:
+            df: 一块（过滤后的）数据
+        """
+        if self.url_columns is None:
+            self.url_columns = [col for col in df.columns if "链接" in col]
+        after = self.parts[-1] if self.parts else None
+        self.parts.append(
+            BackgroundUrlValidation(df, self.url_columns, after=after, **self.check_kwargs)
+        )
+
+    @property
+    def stats(self) -> ValidationStats | None:
+        """各块统计之和（跨块重复的链接按块计数），有块未完成时为 None"""
+        stats = [part.stats for part in self.parts]
+        if not stats or any(s is None for s in stats):
+            return None
+        return ValidationStats(*(sum(values) for values in zip(*stats, strict=True)))
+
+    def done(self) -> bool:
+        """所有块是否都已校验完成"""
+        return all(part.done() for part in self.parts)
+
+    def result(self, timeout: float | None = None) -> dict[Any, bool]:
+        """
+        等待所有块校验完成并合并结果
+
+        Args:
+            timeout: 每块最长等待秒数，None 为一直等待
+
+        Returns:
+            dict: URL → 是否有效
+        """
+        valid: dict[Any, bool] = {}
+        for part in self.parts:
+            valid.update(part.result(timeout))
+        return valid
+
+    def join(self, df: pd.DataFrame, timeout: float | None = None) -> pd.DataFrame:
+        """
+        等待校验完成并写入 <列名>_有效 列，见 BackgroundUrlValidation.join
+
+        Args:
+            df: 需要校验结果的DataFrame，通常为各块合并后的数据
+            timeout: 每块最长等待秒数
+
+        Returns:
+            DataFrame: 添加了URL验证结果的DataFrame
+        """
+        return add_valid_columns(df, self.url_columns or [], self.result(timeout))
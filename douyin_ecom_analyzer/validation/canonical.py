@@ -0,0 +1,119 @@
+"""
+URL规范化：去掉跟踪参数、统一协议和域名大小写，并提取商品ID
+
+同一件商品的抖音链接和蝉妈妈链接、以及带不同分享参数的链接，规范化后
+得到同一个规范键，校验时每个规范键只请求一次。
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, NamedTuple
+from urllib.parse import urlsplit, urlunsplit
+
+# 分享、推广来源等跟踪参数（另外所有 utm_ 开头的参数），不影响链接指向的商品
+TRACKING_PARAMS = frozenset(
+    {
+        "spm",
+        "from",
+        "source",
+        "origin_type",
+        "share_token",
+        "share_id",
+        "share_from",
+        "u_code",
+        "did",
+        "iid",
+        "timestamp",
+        "ts",
+        "ecom_share_track_params",
+        "entrance_info",
+        "pick_source",
+        "sec_author_id",
+        "author_id",
+    }
+)
+
+# 商品链接所在的域名（含子域名）
+GOODS_DOMAINS = ("douyin.com", "jinritemai.com", "chanmama.com")
+
+# 商品ID：查询参数或路径中的长数字
+GOODS_ID_PARAMS = ("id", "goods_id", "product_id", "promotion_id")
+GOODS_ID_DIGITS = r"\d{5,}"
+GOODS_ID_PATH_PREFIX = r"/(?:goods|item|product|promotionDetail|detail)(?:/detail)?/"
+_GOODS_ID_PATH = re.compile(rf"{GOODS_ID_PATH_PREFIX}({GOODS_ID_DIGITS})", re.I)
+_DIGITS = re.compile(GOODS_ID_DIGITS)
+
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+class CanonicalUrl(NamedTuple):
+    """规范化结果"""
+
+    url: str  # 去掉跟踪参数后的URL，实际请求用
+    key: str  # 规范键：商品链接为 'goods:<商品ID>'，否则为规范化URL
+    goods_id: str | None  # 商品ID，非商品链接为 None
+
+
+def _is_tracking(name: str) -> bool:
+    return name in TRACKING_PARAMS or name.startswith("utm_")
+
+
+def is_goods_host(host: str) -> bool:
+    """域名是否属于抖音、精选联盟或蝉妈妈"""
+    return any(host == domain or host.endswith("." + domain) for domain in GOODS_DOMAINS)
+
+
+def extract_goods_id(path: str, params: dict[str, str]) -> str | None:
+    """从查询参数或路径中提取商品ID"""
+    for name in GOODS_ID_PARAMS:
+        value = params.get(name, "")
+        if _DIGITS.fullmatch(value):
+            return value
+    m = _GOODS_ID_PATH.search(path)
+    return m.group(1) if m else None
+
+
+def canonicalize_url(url: Any) -> CanonicalUrl | None:
+    """
+    规范化单个URL
+
+    Args:
+        url: 原始链接
+
+    Returns:
+        CanonicalUrl | None: 规范化结果，不是 http/https 链接时返回 None
+
+    Examples:
+        >>> canonicalize_url("HTTPS://Haohuo.Douyin.com/item?id=3512345678&u_code=x").url
+        'https://haohuo.douyin.com/item?id=3512345678'
+        >>> canonicalize_url("https://www.chanmama.com/goods/3512345678?from=share").key
+        'goods:3512345678'
+    """
+    if not isinstance(url, str):
+        return None
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    netloc = host if port in (None, int(_DEFAULT_PORTS[scheme])) else f"{host}:{port}"
+    # 直接过滤原始的 name=value 片段，不做解码和重新编码
+    params = sorted(
+        pair
+        for pair in parts.query.split("&")
+        if pair and not _is_tracking(pair.partition("=")[0].lower())
+    )
+    clean = urlunsplit((scheme, netloc, parts.path or "/", "&".join(params), ""))
+
+    goods_id = None
+    if is_goods_host(host):
+        goods_id = extract_goods_id(parts.path, dict(p.partition("=")[::2] for p in params))
+    key = f"goods:{goods_id}" if goods_id else clean
+    return CanonicalUrl(clean, key, goods_id)
+
@@ -0,0 +1,109 @@
+"""
+URL校验日志：每校验完一个规范键就追加一行，中断后重新运行同一批链接时从日志恢复
+
+URL缓存（见 url_cache）在整批校验结束后才写入，几十万链接的校验如果中途
+被终止（Streamlit 会话超时、命令行被杀），已完成的结果会全部丢失。日志按
+整批规范键的哈希命名，同一批输入重新运行时先重放日志，只校验剩余的链接；
+整批完成并写入缓存后删除日志。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Iterable
+
+from douyin_ecom_analyzer.cache_dir import get_cache_dir
+from douyin_ecom_analyzer.validation.adaptive import STATUS_UNKNOWN
+
+logger = logging.getLogger("url_validation")
+
+
+def journal_path(keys: Iterable[str]) -> Path:
+    """
+    获取一批规范键对应的日志文件路径
+
+    Args:
+        keys: 整批的规范键，顺序无关
+
+    Returns:
+        Path: 缓存目录下 url_journal/<哈希>.jsonl
+    """
+    digest = hashlib.sha1()
+    for key in sorted(keys):
+        digest.update(key.encode("utf-8"))
+        digest.update(b"\n")
+    return get_cache_dir("url_journal") / f"{digest.hexdigest()}.jsonl"
+
+
+class ValidationJournal:
+    """
+    追加写入的校验日志，每行为 [规范键, HTTP状态码]
+    """
+
+    def __init__(self, path: str | Path):
+        """
+        初始化校验日志
+
+        Args:
+            path: 日志文件路径，见 journal_path
+        """
+        self.path = Path(path)
+        self._file = None
+
+    def replay(self) -> dict[str, int | None]:
+        """
+        读取日志中已完成的结果，忽略中断时写了一半的最后一行
+
+        Returns:
+            dict: 规范键 → HTTP状态码（网络错误和超时为 None）
+        """
+        done: dict[str, int | None] = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        key, status = json.loads(line)
+                    except ValueError:
+                        continue
+                    done[key] = status
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"读取URL校验日志失败: {e}")
+        if done:
+            logger.info(f"从URL校验日志恢复{len(done)}个结果: {self.path}")
+        return done
+
+    def append(self, key: str, status: int | None) -> None:
+        """
+        追加一个结果并立即刷新到文件，熔断跳过的结果不记录
+
+        Args:
+            key: 规范键
+            status: HTTP状态码
+        """
+        if status == STATUS_UNKNOWN:
+            return
+        try:
+            if self._file is None:
+                # 整批校验期间保持打开，逐条追加，由 close()/remove() 关闭
+                self._file = open(self.path, "a", encoding="utf-8")  # noqa: SIM115
+            self._file.write(json.dumps([key, status], ensure_ascii=False) + "\n")
+            # 进程被杀时已写入操作系统的内容不会丢失
+            self._file.flush()
+        except OSError as e:
+            logger.warning(f"写入URL校验日志失败: {e}")
+
+    def close(self) -> None:
+        """关闭日志文件"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self) -> None:
+        """整批完成后删除日志"""
+        self.close()
+        self.path.unlink(missing_ok=True)
@@ -0,0 +1,78 @@
+"""
+离线结构校验：不发请求，整列检查链接的协议、域名和商品ID
+
+结果与 canonical.canonicalize_url 一致：链接有效当且仅当它是 http/https
+链接、域名在允许列表中（含子域名），并且能提取出商品ID。
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from douyin_ecom_analyzer.validation.canonical import (
+    GOODS_DOMAINS,
+    GOODS_ID_DIGITS,
+    GOODS_ID_PARAMS,
+    GOODS_ID_PATH_PREFIX,
+)
+
+_URL_PAT = re.compile(
+    r"^(?P<scheme>https?)://(?:[^@/?#\s]*@)?(?P<host>[^/?#:\s]+)(?::\d*)?"
+    r"(?P<path>[^?#\s]*)(?:\?(?P<query>[^#\s]*))?(?:#\S*)?$",
+    re.I,
+)
+
+# 查询参数名区分大小写，路径不区分，与 canonical.extract_goods_id 保持一致
+_GOODS_PARAM_PAT = rf"(?:^|&)(?:{'|'.join(GOODS_ID_PARAMS)})={GOODS_ID_DIGITS}(?:&|$)"
+_GOODS_PATH_PAT = rf"(?i:{GOODS_ID_PATH_PREFIX}){GOODS_ID_DIGITS}"
+
+
+def _domain_pattern(domains: Iterable[str]) -> str:
+    return rf"(?:^|\.)(?:{'|'.join(re.escape(d.lower()) for d in domains)})$"
+
+
+def structural_valid(
+    series: pd.Series,
+    allowed_domains: Iterable[str] = GOODS_DOMAINS,
+    require_goods_id: bool = True,
+) -> np.ndarray:
+    """
+    整列检查链接结构是否有效
+
+    先 factorize 去重，再对唯一值用整列正则拆出协议、域名、路径和查询参数，
+    不逐行调用 urlparse，也不发任何请求。
+
+    Args:
+        series: 链接列
+        allowed_domains: 允许的域名，子域名也视为允许
+        require_goods_id: 是否要求能提取出商品ID
+
+    Returns:
+        np.ndarray: bool 数组，空值和非字符串为 False
+
+    Examples:
+        >>> structural_valid(pd.Series([
+        ...     "https://haohuo.douyin.com/views/product/item2?id=3512345678",
+        ...     "https://www.chanmama.com/goods/3512345678",
+        ...     "https://example.com/goods/3512345678",
+        ...     "haohuo.douyin.com/item?id=3512345678",
+        ... ])).tolist()
+        [True, True, False, False]
+    """
+    codes, uniques = pd.factorize(series)
+    text = pd.Series(uniques, dtype=object)
+    text = text.where(text.map(lambda value: isinstance(value, str)), "").str.strip()
+
+    parts = text.str.extract(_URL_PAT)
+    host = parts["host"].str.lower()
+    ok = parts["scheme"].notna() & host.str.contains(_domain_pattern(allowed_domains), na=False)
+    if require_goods_id:
+        in_query = parts["query"].fillna("").str.contains(_GOODS_PARAM_PAT)
+        in_path = parts["path"].fillna("").str.contains(_GOODS_PATH_PAT)
+        ok &= in_query | in_path
+
+    return np.append(ok.to_numpy(dtype=bool), False)[codes]
@@ -0,0 +1,216 @@
+"""
+URL校验结果的持久化缓存：规范键 → (HTTP状态码, 校验时间)
+
+缓存保存在本地 SQLite，所有URL校验路径共用，每个线程复用一个连接。超过
+有效期（TTL）的记录视为未命中；写入时只累计条数，每写入 PRUNE_EVERY 条或
+估计条数超过上限时才清理过期记录并按校验时间淘汰最旧的记录。网络错误、
+限流（429）和服务端错误（5xx）属于暂时性结果，不写入缓存。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import suppress
+from pathlib import Path
+from typing import Iterable
+
+from douyin_ecom_analyzer.cache_dir import get_cache_dir
+
+logger = logging.getLogger("url_validation")
+
+# 设为 0 可关闭URL缓存
+URL_CACHE_ENV = "DOUYIN_URL_CACHE"
+# 缓存有效期（小时）
+URL_CACHE_TTL_ENV = "DOUYIN_URL_CACHE_TTL"
+
+DEFAULT_TTL = 3 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 1_000_000
+# 每写入这么多条清理一次过期记录
+PRUNE_EVERY = 10_000
+
+# 单条 SQL 中 IN (...) 的最大参数个数
+_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS url_status (
+    url TEXT PRIMARY KEY,  -- 规范键
+    status INTEGER NOT NULL,
+    checked_at REAL NOT NULL
+)
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS url_status_checked_at ON url_status (checked_at)"
+
+
+def is_cacheable(status: int | None) -> bool:
+    """只缓存确定性的结果，网络错误、429、5xx 和熔断跳过的下次运行重新校验"""
+    return status is not None and 100 <= status < 500 and status != 429
+
+
+class UrlStatusCache:
+    """
+    URL校验结果的磁盘缓存
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        """
+        初始化URL缓存
+
+        Args:
+            path: SQLite 文件路径，默认为缓存目录下的 url_status.sqlite3
+            ttl: 有效期（秒）
+            max_entries: 最多保留的记录数
+        """
+        self.path = Path(path) if path else get_cache_dir() / "url_status.sqlite3"
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._count: int | None = None  # 上次清理后的记录数，None 为尚未统计
+        self._unpruned = 0  # 上次清理后写入的条数（含覆盖已有记录的）
+
+    def _connect(self) -> sqlite3.Connection:
+        """当前线程的连接，首次使用时建立；fork 出的子进程重新建立"""
+        pid, conn = getattr(self._local, "conn", (None, None))
+        if conn is None or pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute(_SCHEMA)
+            conn.execute(_INDEX)
+            self._local.conn = (os.getpid(), conn)
+        return conn
+
+    def _reset(self) -> None:
+        """出错后丢弃当前线程的连接，下次重新建立"""
+        _, conn = getattr(self._local, "conn", (None, None))
+        self._local.conn = (None, None)
+        if conn is not None:
+            with suppress(sqlite3.Error):
+                conn.close()
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, int]:
+        """
+        批量查询未过期的校验结果
+
+        Args:
+            keys: 规范键，见 canonical.canonicalize_url
+
+        Returns:
+            dict: 命中的 规范键 → HTTP状态码
+        """
+        keys = list(keys)
+        found: dict[str, int] = {}
+        since = time.time() - self.ttl
+        try:
+            conn = self._connect()
+            for i in range(0, len(keys), _CHUNK):
+                chunk = keys[i : i + _CHUNK]
+                rows = conn.execute(
+                    f"SELECT url, status FROM url_status "
+                    f"WHERE checked_at >= ? AND url IN ({','.join('?' * len(chunk))})",
+                    (since, *chunk),
+                )
+                found.update(rows)
+        except sqlite3.Error as e:
+            logger.warning(f"读取URL缓存失败: {e}")
+            self._reset()
+        return found
+
+    def get(self, key: str) -> int | None:
+        """查询单个规范键，未命中或已过期返回 None"""
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Iterable[tuple[str, int | None]]) -> int:
+        """
+        批量写入校验结果，需要时清理过期和超出上限的记录（见 _prune）
+
+        Args:
+            items: (规范键, HTTP状态码) 序列，暂时性结果会被忽略
+
+        Returns:
+            int: 写入的条数
+        """
+        now = time.time()
+        rows = [(key, status, now) for key, status in items if is_cacheable(status)]
+        if not rows:
+            return 0
+        try:
+            conn = self._connect()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO url_status VALUES (?, ?, ?)", rows)
+            with self._lock:
+                self._unpruned += len(rows)
+                # 覆盖已有记录的也计入，估计值只会偏大
+                prune = (
+                    self._count is None
+                    or self._unpruned >= PRUNE_EVERY
+                    or self._count + self._unpruned > self.max_entries
+                )
+                if prune:
+                    self._prune(conn, now)
+        except sqlite3.Error as e:
+            logger.warning(f"写入URL缓存失败: {e}")
+            self._reset()
+            return 0
+        return len(rows)
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> None:
+        """
+        清理过期记录，超出上限时按校验时间淘汰最旧的记录
+
+        淘汰到上限的 90%，之后的写入不必每批都再清理。
+        """
+        with conn:
+            conn.execute("DELETE FROM url_status WHERE checked_at < ?", (now - self.ttl,))
+            (count,) = conn.execute("SELECT COUNT(*) FROM url_status").fetchone()
+            if count > self.max_entries:
+                target = self.max_entries - self.max_entries // 10
+                conn.execute(
+                    "DELETE FROM url_status WHERE url IN "
+                    "(SELECT url FROM url_status ORDER BY checked_at LIMIT ?)",
+                    (count - target,),
+                )
+                count = target
+        self._count = count
+        self._unpruned = 0
+
+    def put(self, key: str, status: int | None) -> None:
+        """写入单个规范键的校验结果"""
+        self.put_many([(key, status)])
+
+
+_default_cache: UrlStatusCache | None = None
+
+
+def get_url_cache() -> UrlStatusCache | None:
+    """
+    获取进程级共享的URL缓存，环境变量 DOUYIN_URL_CACHE=0 时返回 None
+
+    有效期可通过环境变量 DOUYIN_URL_CACHE_TTL（小时）设置。
+
+    Returns:
+        UrlStatusCache | None: 共享缓存
+    """
+    global _default_cache
+    if os.environ.get(URL_CACHE_ENV, "1") == "0":
+        return None
+    if _default_cache is None:
+        ttl_hours = os.environ.get(URL_CACHE_TTL_ENV)
+        try:
+            ttl = float(ttl_hours) * 3600 if ttl_hours else DEFAULT_TTL
+        except ValueError:
+            logger.warning(f"无效的URL缓存有效期: {ttl_hours!r}，使用默认值")
+            ttl = DEFAULT_TTL
+        try:
+            _default_cache = UrlStatusCache(ttl=ttl)
+        except OSError as e:
+            logger.warning(f"无法创建URL缓存目录，已禁用缓存: {e}")
+            return None
+    return _default_cache
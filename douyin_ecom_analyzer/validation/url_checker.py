@@ -0,0 +1,299 @@
+"""
+异步URL可访问性校验：所有请求共享一个 keep-alive 连接池，限制全局并发，
+单个域名的并发按响应情况自适应，故障域名熔断
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Iterable, NamedTuple
+from urllib.parse import urlsplit
+
+import aiohttp
+import pandas as pd
+from tqdm import tqdm
+
+from douyin_ecom_analyzer.validation.adaptive import SLOW_FRACTION, STATUS_UNKNOWN, HostState
+from douyin_ecom_analyzer.validation.canonical import canonicalize_url
+from douyin_ecom_analyzer.validation.journal import ValidationJournal, journal_path
+from douyin_ecom_analyzer.validation.url_cache import get_url_cache
+
+logger = logging.getLogger("url_validation")
+
+# 默认全局并发、单个域名并发和单个请求超时（秒）
+DEFAULT_LIMIT = 64
+DEFAULT_LIMIT_PER_HOST = 8
+DEFAULT_TIMEOUT = 2.0
+
+
+class ValidationStats(NamedTuple):
+    """URL校验统计"""
+
+    total: int  # 去重后的URL数
+    keys: int  # 规范键个数，见 canonical.canonicalize_url
+    requested: int  # 实际发出请求的URL数
+    valid: int  # 有效的URL数
+    elapsed: float  # 耗时（秒）
+    cache_hits: int = 0  # 由URL缓存直接得到结果的URL数
+    unknown: int = 0  # 所在域名熔断、未能校验的URL数
+    resumed: int = 0  # 从中断前的校验日志恢复的URL数
+
+    @property
+    def urls_per_sec(self) -> float:
+        return self.requested / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.total}个URL, 规范键{self.keys}, 缓存命中{self.cache_hits}, "
+            f"日志恢复{self.resumed}, "
+            f"请求{self.requested}, 有效{self.valid}, 未知{self.unknown}, "
+            f"耗时{self.elapsed:.1f}秒, {self.urls_per_sec:.1f}个/秒"
+        )
+
+
+def is_valid_status(status: int | None) -> bool | None:
+    """
+    状态码小于 400 视为有效，网络错误和超时（None）视为无效，
+    熔断跳过的（STATUS_UNKNOWN）返回 None
+    """
+    if status == STATUS_UNKNOWN:
+        return None
+    return status is not None and status < 400
+
+
+async def _head(session: aiohttp.ClientSession, url: str) -> int | None:
+    """发送 HEAD 请求并跟随跳转，返回最终状态码，网络错误和超时返回 None"""
+    try:
+        async with session.head(url, allow_redirects=True) as response:
+            return response.status
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        return None
+
+
+async def _timed_head(session: aiohttp.ClientSession, url: str) -> tuple[int | None, float]:
+    start = time.perf_counter()
+    status = await _head(session, url)
+    return status, time.perf_counter() - start
+
+
+def _host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+async def check_urls_async(
+    urls: Iterable[str],
+    on_result: Callable[[str, int | None], None],
+    limit: int = DEFAULT_LIMIT,
+    limit_per_host: int = DEFAULT_LIMIT_PER_HOST,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> dict[str, HostState]:
+    """
+    并发校验URL，每完成一个就回调 on_result(url, status)
+
+    所有请求共享一个 aiohttp 连接池，同一域名的连接保持 keep-alive 复用，
+    不必每个链接都重新建立 TCP/TLS 连接。最多 limit 个请求同时进行。
+
+    单个域名的并发按 AIMD 自适应（见 adaptive.HostState）：从较小的窗口
+    开始，响应快且成功时逐步增加到 limit_per_host，超时、429、5xx 或变慢
+    时减半。某个域名熔断后，它剩余的链接不再请求，直接以 STATUS_UNKNOWN
+    回调，慢或故障的域名不会拖住其他域名。
+
+    Args:
+        urls: 待校验的URL，应已去重
+        on_result: 结果回调，status 为 HTTP 状态码，网络错误和超时为 None，
+            熔断跳过的为 STATUS_UNKNOWN
+        limit: 全局并发上限
+        limit_per_host: 单个域名并发上限
+        timeout: 单个请求超时（秒）
+
+    Returns:
+        dict: 域名 → HostState，用于统计和日志
+    """
+    hosts: dict[str, HostState] = {}
+    for url in urls:
+        host = _host_of(url)
+        if host not in hosts:
+            hosts[host] = HostState(limit_per_host)
+        hosts[host].pending.append(url)
+
+    slow = timeout * SLOW_FRACTION
+    connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit_per_host)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    running: dict[asyncio.Task, tuple[str, HostState]] = {}
+
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        while True:
+            # 轮流从各域名取链接，直到全局并发或各域名窗口用满
+            progressed = True
+            while progressed and len(running) < limit:
+                progressed = False
+                for state in hosts.values():
+                    if len(running) >= limit:
+                        break
+                    if state.can_send():
+                        url = state.pending.popleft()
+                        state.in_flight += 1
+                        running[asyncio.create_task(_timed_head(session, url))] = (url, state)
+                        progressed = True
+            if not running:
+                break
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                url, state = running.pop(task)
+                status, elapsed = task.result()
+                state.in_flight -= 1
+                was_open = state.open
+                state.record(status, elapsed, slow)
+                on_result(url, status)
+                if state.open and not was_open:
+                    logger.warning(
+                        f"域名 {_host_of(url)} 已熔断（{state}），"
+                        f"剩余{len(state.pending)}个链接记为未知"
+                    )
+                    while state.pending:
+                        on_result(state.pending.popleft(), STATUS_UNKNOWN)
+
+    for host, state in hosts.items():
+        logger.debug(f"域名 {host}: {state}")
+    return hosts
+
+
+def check_urls(
+    urls: Iterable[Any],
+    limit: int = DEFAULT_LIMIT,
+    limit_per_host: int = DEFAULT_LIMIT_PER_HOST,
+    timeout: float = DEFAULT_TIMEOUT,
+    on_result: Callable[[str, int | None], None] | None = None,
+    desc: str = "验证URL",
+    use_cache: bool = True,
+    resume: bool = True,
+) -> tuple[dict[Any, bool | None], ValidationStats]:
+    """
+    批量校验URL是否可访问（同步入口）
+
+    先把URL规范化（见 canonical），同一规范键只请求一次：去掉跟踪参数后
+    相同的链接、以及同一商品ID的抖音和蝉妈妈链接共用一个结果，实际请求
+    第一次出现的链接。再查URL缓存（见 url_cache），只对新的或已过期的
+    规范键发请求，结束后把新结果批量写回缓存。所在域名熔断的链接结果为
+    None（未知），不写入缓存。
+
+    校验过程中每个结果都追加到校验日志（见 journal），中途被终止后用同一批
+    链接重新运行，会先从日志恢复已完成的结果，只请求剩余的链接；网络错误和
+    超时的结果不恢复，重新请求。
+
+    Args:
+        urls: 待校验的URL，可以有重复和非字符串值，可以来自多个列
+        limit: 全局并发上限
+        limit_per_host: 单个域名并发上限（自适应窗口的上限）
+        timeout: 单个请求超时（秒）
+        on_result: 每个规范键校验完成时的回调 on_result(key, status)
+        desc: 进度条描述
+        use_cache: 是否使用URL缓存
+        resume: 是否写入校验日志并从中断前的日志恢复
+
+    Returns:
+        tuple: (URL → 是否有效 的字典（未知为 None）, ValidationStats)
+
+    Examples:
+        >>> valid, stats = check_urls(["https://haohuo.douyin.com/item?id=1", "bad"])
+        >>> valid["bad"]
+        False
+    """
+    unique = list(dict.fromkeys(urls))
+    canonical = {url: canonicalize_url(url) for url in unique}
+    targets: dict[str, str] = {}  # 规范键 → 实际请求的URL
+    for c in canonical.values():
+        if c is not None:
+            targets.setdefault(c.key, c.url)
+
+    cache = get_url_cache() if use_cache else None
+    statuses: dict[str, int | None] = cache.get_many(targets) if cache is not None else {}
+    cache_hits = len(statuses)
+    todo = {url: key for key, url in targets.items() if key not in statuses}
+
+    journal = None
+    fresh: dict[str, int | None] = {}
+    if resume and todo:
+        try:
+            journal = ValidationJournal(journal_path(targets))
+        except OSError as e:
+            logger.warning(f"无法创建URL校验日志，中断后将重新校验: {e}")
+        else:
+            # 网络错误和超时（None）是暂时性结果，与新的运行一样重新校验
+            keys = set(todo.values())
+            fresh = {
+                key: status
+                for key, status in journal.replay().items()
+                if key in keys and status is not None
+            }
+            todo = {url: key for url, key in todo.items() if key not in fresh}
+    resumed = len(fresh)
+
+    start = time.perf_counter()
+    if todo:
+        try:
+            with tqdm(total=len(todo), desc=desc) as bar:
+
+                def record(url: str, status: int | None) -> None:
+                    fresh[todo[url]] = status
+                    if journal is not None:
+                        journal.append(todo[url], status)
+                    bar.update()
+                    if on_result is not None:
+                        on_result(todo[url], status)
+
+                asyncio.run(check_urls_async(todo, record, limit, limit_per_host, timeout))
+        finally:
+            # 中断时保留日志，下次运行从这里继续
+            if journal is not None:
+                journal.close()
+    statuses.update(fresh)
+    if cache is not None and fresh:
+        cache.put_many(fresh.items())
+    if journal is not None:
+        journal.remove()
+
+    results = {
+        url: c is not None and is_valid_status(statuses.get(c.key)) for url, c in canonical.items()
+    }
+    unknown = sum(status == STATUS_UNKNOWN for status in statuses.values())
+    stats = ValidationStats(
+        total=len(unique),
+        keys=len(targets),
+        requested=len(todo) - unknown,
+        valid=sum(value is True for value in results.values()),
+        elapsed=time.perf_counter() - start,
+        cache_hits=cache_hits,
+        unknown=unknown,
+        resumed=resumed,
+    )
+    logger.info(f"URL校验完成: {stats}")
+    return results, stats
+
+
+def add_valid_columns(
+    df: pd.DataFrame, url_columns: Iterable[str], valid: dict[Any, bool | None]
+) -> pd.DataFrame:
+    """
+    按链接值把校验结果写成 <列名>_有效 列（覆盖已有的同名列）
+
+    按值而不是按行号映射，因此也适用于过滤后的子集。列为可空布尔类型，
+    所在域名熔断、未能校验的链接为 <NA>，空链接为 False。
+
+    Args:
+        df: 包含URL列的DataFrame
+        url_columns: URL列名列表
+        valid: check_urls 返回的 URL → 是否有效 字典
+
+    Returns:
+        DataFrame: 添加了URL验证结果的DataFrame副本
+    """
+    result_df = df.copy(deep=False)  # 只新增列，浅复制即可
+    for col in url_columns:
+        if col in df.columns:
+            mapped = df[col].map(valid).astype("boolean")
+            result_df[f"{col}_有效"] = mapped.mask(df[col].isna(), False)
+    return result_df
@@ -1,7 +1,7 @@
 import streamlit as st
-import pandas as pd
 from cleaning import clean_dataframe, load_config
 from analysis import analyze_and_report
+from douyin_ecom_analyzer.ingest import read_excel
 import yaml
 
 # 页面配置
@@ -46,8 +46,8 @@ uploaded_file = st.file_uploader(
 
 if uploaded_file is not None:
     try:
-        # 读取数据
-        df_raw = pd.read_excel(uploaded_file)
+        # 流式读取数据；报表导出整张清洗后的表，因此读取全部列
+        df_raw = read_excel(uploaded_file)
         st.success(f"✅ 成功读取数据：{df_raw.shape[0]} 行 × {df_raw.shape[1]} 列")
         
         # 显示数据预览
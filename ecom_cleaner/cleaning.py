@@ -1,7 +1,13 @@
+import numpy as np
 import pandas as pd
 import re
 from typing import Union, Dict, Any
 import yaml
+from functools import partial
+
+from douyin_ecom_analyzer.cleaning.columnar import parse_percent_column
+from douyin_ecom_analyzer.cleaning.memo import convert_unique
+from douyin_ecom_analyzer.cleaning.vocab_cache import flush_vocab_cache
 
 def load_config(config_path: str = "config.yaml") -> Dict[str, Any]:
     """加载配置文件"""
@@ -52,6 +58,18 @@ def standardize_percentage(value: str, config: Dict[str, Any]) -> float:
     # 处理单个百分比
     return round(float(value.replace("%", "")) / 100, config["cleaning_rules"]["percentage"]["decimal_places"])
 
+def standardize_percentage_column(
+    series: pd.Series, config: Dict[str, Any], errors: str = "raise"
+) -> np.ndarray:
+    """整列标准化百分比数据，区间取均值，空值取默认值；errors='coerce' 时无法解析的值也取默认值"""
+    rules = config["cleaning_rules"]["percentage"]
+    result = parse_percent_column(series, how="mean", unit="fraction", bare="percent")
+    if errors == "raise" and result.failed.any():
+        raise ValueError(f"无法解析的百分比: {series[result.failed].iloc[0]!r}")
+    values = np.round(result.values, rules["decimal_places"])
+    values[np.isnan(values)] = rules["default_value"]
+    return values
+
 def validate_url(url: str, config: Dict[str, Any]) -> str:
     """验证URL链接"""
     if pd.isna(url) or url == "":
@@ -71,31 +89,45 @@ def validate_url(url: str, config: Dict[str, Any]) -> str:
     
     return config["cleaning_rules"]["url_validation"]["default_value"]
 
-def clean_dataframe(df: pd.DataFrame, config: Dict[str, Any]) -> pd.DataFrame:
-    """清洗整个数据框"""
-    df_clean = df.copy()
+def validate_url_column(series: pd.Series, config: Dict[str, Any]) -> pd.Series:
+    """整列版 validate_url：补全协议后按域名白名单整列匹配，不逐行循环"""
+    rules = config["cleaning_rules"]["url_validation"]
+    if not rules["allowed_domains"]:
+        # 空白名单与 validate_url 一致：全部记为默认值（空正则会匹配所有链接）
+        return pd.Series(rules["default_value"], index=series.index, dtype=object)
+    text = series.astype(str).str.strip()
+    url = text.where(text.str.match(r"https?://"), "https://" + text)
+    domains = "|".join(re.escape(domain) for domain in rules["allowed_domains"])
+    ok = series.notna() & text.ne("") & url.str.contains(domains)
+    return url.where(ok, rules["default_value"])
+
+def clean_dataframe(df: pd.DataFrame, config: Dict[str, Any], copy: bool = True) -> pd.DataFrame:
+    """清洗整个数据框，不修改 df；copy 为 False 时未改写的列与 df 共用数据"""
+    # 下面只整列替换，不改写原列的数据，copy 为 False 时浅复制即可
+    df_clean = df.copy(deep=copy)
     
     # 处理销量数据
     for field in config["sales_fields"]:
         if field in df_clean.columns:
-            df_clean[field] = df_clean[field].astype(str).apply(
-                lambda x: standardize_sales_range(x, config)
+            df_clean[field], _ = convert_unique(
+                df_clean[field].astype(str),
+                partial(standardize_sales_range, config=config),
+                errors="coerce",
             )
     
     # 处理百分比数据
     for field in config["percent_fields"]:
         if field in df_clean.columns:
-            df_clean[field] = df_clean[field].astype(str).apply(
-                lambda x: standardize_percentage(x, config)
+            df_clean[field] = standardize_percentage_column(
+                df_clean[field], config, errors="coerce"
             )
     
     # 处理URL数据
     for field in config["url_fields"]:
         if field in df_clean.columns:
-            df_clean[field] = df_clean[field].astype(str).apply(
-                lambda x: validate_url(x, config)
-            )
+            df_clean[field] = validate_url_column(df_clean[field], config)
     
+    flush_vocab_cache()
     return df_clean
 
 def detect_anomalies(df: pd.DataFrame, config: Dict[str, Any]) -> pd.DataFrame:
@@ -4,29 +4,30 @@
 
 import logging
 import re
-from typing import Dict, Optional
+from functools import partial
+from typing import Dict, Optional, Tuple
 
 import pandas as pd
 
+from douyin_ecom_analyzer.cleaning.columnar import (
+    FORMAT_MIXED,
+    ColumnParseResult,
+    ParseReport,
+    merge_reports,
+    parse_percent_column,
+    parse_sales_column,
+    sniff_format,
+    summarize_errors,
+)
+from douyin_ecom_analyzer.cleaning.parallel import choose_workers, parallel_clean
+from douyin_ecom_analyzer.cleaning.themes import DEFAULT_THEMES, THEME_NAMES_ATTR, ThemeTagger
+from douyin_ecom_analyzer.cleaning.vocab_cache import flush_vocab_cache
+
 # 配置日志
 logger = logging.getLogger("data_cleaner")
 
-# 节日关键词列表
-FESTIVAL_KEYWORDS = [
-    "端午",
-    "艾草",
-    "菖蒲",
-    "粽子",
-    "龙舟",
-    "儿童节",
-    "六一",
-    "61",
-    "童趣",
-    "礼盒",
-    "库洛米",
-    "HelloKitty",
-    "蜡笔小新",
-]
+# 节日关键词列表（默认主题的全部关键词，见 themes.DEFAULT_THEMES）
+FESTIVAL_KEYWORDS = [kw for keywords in DEFAULT_THEMES.values() for kw in keywords]
 
 # 销量和百分比正则模式
 _sales_pat = re.compile(r"(?P<num>[\d\.]+)\s*(?P<unit>w|万)?", re.I)
@@ -54,6 +55,13 @@ def parse_percent(raw) -> float | None:
     return float(m.group(1)) if m else None
 
 
+def _clean_partition(cleaner: "DataCleaner", df: pd.DataFrame) -> Tuple[pd.DataFrame, tuple]:
+    """子进程中清洗一个分区，同时返回该分区的列格式和解析错误汇总"""
+    # 分区是子进程自己的数据，不必复制；未改写的列才能识别出来不传回
+    cleaned = cleaner.clean(df, copy=False)
+    return cleaned, (cleaner.column_formats, cleaner.parse_reports)
+
+
 class DataCleaner:
     """
     数据清洗器类，提供数据清洗的主要功能。
@@ -64,7 +72,7 @@ class DataCleaner:
         初始化数据清洗器。
 
         Args:
-            config: 配置字典，包含字段映射和清洗规则
+            config: 配置字典，包含字段映射和清洗规则，themes 为 主题名 → 关键词列表
         """
         self.config = config or {}
         self.sales_fields = (
@@ -82,18 +90,61 @@ class DataCleaner:
             if config
             else ["商品链接", "蝉妈妈商品链接"]
         )
-
-    def clean(self, df: pd.DataFrame) -> pd.DataFrame:
+        self.theme_tagger = ThemeTagger(self.config.get("themes"))
+        # 最近一次清洗中各列的抽样格式（见 sniff_format）和解析错误汇总
+        self.column_formats: Dict[str, str] = {}
+        self.parse_reports: Dict[str, ParseReport] = {}
+
+    def _sniff(self, df: pd.DataFrame, col: str, kind: str) -> str:
+        """抽样判断列格式并记录，供整列解析选择专用解析路径"""
+        fmt = sniff_format(df[col], kind)
+        self.column_formats[col] = fmt
+        logger.info(f"列格式 {col}: {fmt}")
+        return fmt
+
+    def _report(self, df: pd.DataFrame, col: str, result: ColumnParseResult) -> pd.Series:
+        """记录解析错误汇总，无法解析的值记为 NaN，不中断清洗"""
+        report = summarize_errors(df[col], result)
+        self.parse_reports[col] = report
+        if report.failures:
+            logger.warning(f"列 {col} 存在无法解析的值: {report}")
+        return pd.Series(result.values, index=df.index)
+
+    def _parse_sales(self, df: pd.DataFrame, col: str) -> pd.Series:
+        fmt = self._sniff(df, col, "sales")
+        return self._report(df, col, parse_sales_column(df[col], how="lower", fmt=fmt))
+
+    def _parse_percent(self, df: pd.DataFrame, col: str) -> pd.Series:
+        fmt = self._sniff(df, col, "percent")
+        result = parse_percent_column(df[col], how="lower", unit="percent", bare="percent", fmt=fmt)
+        return self._report(df, col, result)
+
+    def clean(
+        self, df: pd.DataFrame, workers: Optional[int] = 1, copy: bool = True
+    ) -> pd.DataFrame:
         """
-        清洗数据框
+        清洗数据框，不修改 df
 
         Args:
             df: 输入的DataFrame
+            workers: 进程数，1 为在本进程清洗，None 为按行数自动选择；
+                多进程时按行分区清洗（见 cleaning.parallel），结果与单进程相同
+            copy: 是否复制未改写的列。为 False 时结果与 df 共用这些列的数据，
+                修改结果会同时改动 df，只适合用完即弃的输入（如分块读取的数据块）
 
         Returns:
             DataFrame: 清洗后的DataFrame
         """
-        df = df.copy()
+        if workers != 1 and choose_workers(len(df), workers) > 1:
+            # 分区本来就要重新编码传输，只需复制结果中未修改的列
+            return self._parallel_clean(df, choose_workers(len(df), workers), copy)
+        if copy:
+            df = df.copy()
+
+        # 浅复制：清洗只整列替换或新增列，不改写原列的数据
+        df = df.copy(deep=False)
+        self.column_formats = {}
+        self.parse_reports = {}
         logger.info(f"开始清洗数据：{len(df)}行，列：{df.columns.tolist()}")
 
         # ---- 数值列处理 ----
@@ -112,31 +163,29 @@ class DataCleaner:
 
         # 处理7天销量
         if "近7天销量" in df.columns:
-            df["近7天销量_val"] = df["近7天销量"].apply(parse_sales)
+            df["近7天销量_val"] = self._parse_sales(df, "近7天销量")
             logger.info("从'近7天销量'列创建了'近7天销量_val'")
         elif "7天销量" in df.columns:
-            df["近7天销量_val"] = df["7天销量"].apply(parse_sales)
+            df["近7天销量_val"] = self._parse_sales(df, "7天销量")
             logger.info("从'7天销量'列创建了'近7天销量_val'")
         elif "销量" in df.columns and "近7天销量_val" not in df.columns:
             # 如果没有7天销量列但有销量列，使用销量列作为7天销量
-            df["近7天销量_val"] = df["销量"].apply(parse_sales)
+            df["近7天销量_val"] = self._parse_sales(df, "销量")
             logger.info("从'销量'列创建了'近7天销量_val'")
 
             # 如果使用同一列作为30天销量，则通过后处理将7天销量调整为原值的1/4
             if sales_col_30d and sales_col_30d == "销量":
-                df["近7天销量_val"] = df["近7天销量_val"].apply(
-                    lambda x: x / 4 if pd.notna(x) else x
-                )
+                df["近7天销量_val"] = df["近7天销量_val"] / 4
                 logger.info("将'近7天销量_val'调整为'销量'的1/4")
 
         # 处理30天销量
         # 1. 使用标准的30天销量列
         if sales_col_30d:
-            df["近30天销量_val"] = df[sales_col_30d].apply(parse_sales)
+            df["近30天销量_val"] = self._parse_sales(df, sales_col_30d)
             logger.info(f"从'{sales_col_30d}'列创建了'近30天销量_val'")
         # 2. 如果没有30天销量，但有7天销量，则使用7天销量的4倍估算
         elif "近7天销量_val" in df.columns and "近30天销量_val" not in df.columns:
-            df["近30天销量_val"] = df["近7天销量_val"].apply(lambda x: x * 4 if pd.notna(x) else x)
+            df["近30天销量_val"] = df["近7天销量_val"] * 4
             logger.info("根据'近7天销量_val'的4倍创建了'近30天销量_val'")
         # 3. 如果有直播销量和商品卡销量，尝试合并这些数据
         if (
@@ -145,8 +194,8 @@ class DataCleaner:
             and "近30天销量_val" not in df.columns
         ):
             # 使用直播销量和商品卡销量的和作为30天总销量的估计
-            live_sales = df["直播销量"].apply(parse_sales).fillna(0)
-            card_sales = df["商品卡销量"].apply(parse_sales).fillna(0)
+            live_sales = self._parse_sales(df, "直播销量").fillna(0)
+            card_sales = self._parse_sales(df, "商品卡销量").fillna(0)
             df["近30天销量_val"] = live_sales + card_sales
             logger.info("根据'直播销量'和'商品卡销量'的和创建了'近30天销量_val'")
 
@@ -169,14 +218,12 @@ class DataCleaner:
 
         # 处理佣金比例
         if "佣金比例" in df.columns:
-            df["佣金比例_val"] = df["佣金比例"].apply(parse_percent)
-            df["佣金比例_val"] = pd.to_numeric(df["佣金比例_val"], errors="coerce").fillna(0)
+            df["佣金比例_val"] = self._parse_percent(df, "佣金比例").fillna(0)
             logger.info("从'佣金比例'列创建了'佣金比例_val'")
 
         # 处理转化率
         if "转化率" in df.columns:
-            df["转化率_val"] = df["转化率"].apply(parse_percent)
-            df["转化率_val"] = pd.to_numeric(df["转化率_val"], errors="coerce").fillna(0)
+            df["转化率_val"] = self._parse_percent(df, "转化率").fillna(0)
             logger.info("从'转化率'列创建了'转化率_val'")
 
         # ---- 节日标记 ----
@@ -187,15 +234,39 @@ class DataCleaner:
         else:
             product_col = df.columns[0]  # 默认使用第一列作为商品名称列
 
-        df["is_festival"] = df[product_col].apply(
-            lambda x: any(kw.lower() in str(x).lower() for kw in FESTIVAL_KEYWORDS)
-        )
+        # 一次标记出全部主题：theme_id 为主题位掩码，属于任一主题即为节日商品
+        tags = self.theme_tagger.tag(df[product_col])
+        df["theme_id"] = tags.ids
+        # 记录各位对应的主题名，分析时按清洗时的主题解码
+        df.attrs[THEME_NAMES_ATTR] = list(self.theme_tagger.themes)
+        df["is_festival"] = tags.flags
         festival_count = df["is_festival"].sum()
         logger.info(f"从'{product_col}'列标记了{festival_count}个节日商品")
 
+        flush_vocab_cache()
         logger.info(f"数据清洗完成，最终列：{df.columns.tolist()}")
         return df
 
+    def _parallel_clean(self, df: pd.DataFrame, workers: int, copy: bool) -> pd.DataFrame:
+        """多进程清洗，合并各分区的列格式和解析错误汇总"""
+        cleaned, states = parallel_clean(
+            df, partial(_clean_partition, self), workers=workers, with_state=True, copy=copy
+        )
+        # 各分区抽样判断的格式不一致时记为 mixed
+        self.column_formats = {}
+        for col in states[0][0]:
+            formats = {formats[col] for formats, _ in states}
+            self.column_formats[col] = formats.pop() if len(formats) == 1 else FORMAT_MIXED
+        self.parse_reports = {
+            col: merge_reports([reports[col] for _, reports in states])
+            for col in states[0][1]
+        }
+        for col, report in self.parse_reports.items():
+            if report.failures:
+                logger.warning(f"列 {col} 存在无法解析的值: {report}")
+        cleaned.attrs[THEME_NAMES_ATTR] = list(self.theme_tagger.themes)
+        return cleaned
+
     def clean_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         清洗整个DataFrame（兼容旧版接口）。
@@ -245,5 +316,7 @@ class DataCleaner:
                 "count": festival_count,
                 "percentage": festival_count / len(df) * 100 if len(df) > 0 else 0,
             }
+        if "theme_id" in df.columns:
+            stats["themes"] = self.theme_tagger.counts(df["theme_id"]).to_dict()
 
         return stats
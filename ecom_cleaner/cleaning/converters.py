@@ -10,6 +10,9 @@ import pandas as pd
 import requests
 from urllib.parse import urlparse
 
+from douyin_ecom_analyzer.validation.canonical import canonicalize_url
+from douyin_ecom_analyzer.validation.url_cache import get_url_cache
+
 
 def parse_sales_to_float(raw: Union[str, int, float, None]) -> Optional[float]:
     """
@@ -185,12 +188,18 @@ def validate_url(url: str) -> Union[str, float]:
     except:
         return np.nan
 
-    # 检查URL可访问性
-    try:
-        response = requests.head(url, timeout=5, allow_redirects=True)
-        if response.status_code == 200:
-            return url
-    except:
-        pass
+    # 先查跨运行的URL缓存，未命中再检查URL可访问性
+    canonical = canonicalize_url(url)
+    if canonical is None:
+        return np.nan
+    cache = get_url_cache()
+    status = cache.get(canonical.key) if cache is not None else None
+    if status is None:
+        try:
+            status = requests.head(canonical.url, timeout=5, allow_redirects=True).status_code
+        except requests.RequestException:
+            return np.nan
+        if cache is not None:
+            cache.put(canonical.key, status)
 
-    return np.nan
+    return url if status == 200 else np.nan
@@ -0,0 +1,101 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from douyin_ecom_analyzer import snapshot
+from douyin_ecom_analyzer.cleaning import vocab_cache
+from douyin_ecom_analyzer.validation import url_cache
+
+# server.gate 的最长等待（秒），避免测试失败时挂起
+GATE_TIMEOUT = 10.0
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """本地桩服务：/ok 返回 200，/missing 返回 404，/redirect 跳转到 /ok
+
+    server.delay 为每个请求的响应延迟（秒），server.gate 不为 None 时每个请求
+    等到该 threading.Event 被设置（最多 GATE_TIMEOUT 秒）才响应，server.status
+    不为 None 时所有请求都返回该状态码（模拟限流或故障的域名）
+    """
+
+    protocol_version = "HTTP/1.1"  # 支持 keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_HEAD(self):
+        with self.server.lock:
+            self.server.requests += 1
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        if self.server.gate is not None:
+            self.server.gate.wait(GATE_TIMEOUT)
+        path = self.path.split("?", 1)[0]
+        if self.server.status is not None:
+            self.send_response(self.server.status)
+        elif path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/ok")
+        elif path.startswith("/ok"):
+            self.send_response(200)
+        else:
+            self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    # 每个测试使用独立的缓存目录，不读写用户目录下的缓存
+    monkeypatch.setenv("DOUYIN_ANALYZER_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(vocab_cache, "_default_cache", None)
+    monkeypatch.setattr(url_cache, "_default_cache", None)
+    monkeypatch.setattr(snapshot, "_default_cache", None)
+
+
+def _start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.requests = 0
+    server.delay = 0.0
+    server.gate = None
+    server.status = None
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    return server
+
+
+def _stop_server(server):
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def url_server():
+    # 本地桩HTTP服务，返回根地址，如 http://127.0.0.1:12345
+    server = _start_server()
+    yield server
+    _stop_server(server)
+
+
+@pytest.fixture
+def make_url_server():
+    # 按需启动多个桩服务，端口不同即为不同域名，可分别设置 delay 和 status
+    servers = []
+
+    def make():
+        servers.append(_start_server())
+        return servers[-1]
+
+    yield make
+    for server in servers:
+        _stop_server(server)
@@ -0,0 +1,192 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from douyin_ecom_analyzer.cleaning.columnar import (
+    PARSE_INVALID,
+    PARSE_MISSING,
+    PARSE_OK,
+    PARSE_PLACEHOLDER,
+    parse_percent_column,
+    parse_sales_column,
+    sniff_format,
+    summarize_errors,
+)
+from douyin_ecom_analyzer.cleaning.converters import range_mid_result
+from douyin_ecom_analyzer.cleaning.memo import convert_unique
+from douyin_ecom_analyzer.cleaning.vocab_cache import VocabularyCache, converter_version
+from ecom_cleaner.cleaning.converters import range_to_mean
+
+
+def test_parse_sales_column():
+    # 测试整列销量解析
+    s = pd.Series(["7.5w~10w", "3k-5k", "1.2万", "5000", 800.0, None, "暂无", "3,500+"])
+    result = parse_sales_column(s)
+
+    expected = [87500, 4000, 12000, 5000, 800, np.nan, np.nan, 3500]
+    np.testing.assert_array_equal(result.values, expected)
+    assert result.failed.tolist() == [False] * 6 + [True, False]
+
+
+def test_parse_sales_column_lower():
+    # 测试区间取下限
+    s = pd.Series(["7.5w~10w", "6000~7500", "1.5万"])
+    result = parse_sales_column(s, how="lower")
+
+    np.testing.assert_array_equal(result.values, [75000, 6000, 15000])
+    assert not result.failed.any()
+
+
+def test_parse_sales_column_numeric():
+    # 纯数值列直接返回
+    s = pd.Series([1.0, 2.5, np.nan])
+    result = parse_sales_column(s)
+
+    np.testing.assert_array_equal(result.values, [1.0, 2.5, np.nan])
+    assert not result.failed.any()
+
+
+def test_parse_percent_column():
+    # 测试整列百分比解析，区间取均值
+    s = pd.Series(["20.00%", "10%~15%", "5-10%", "12", None, "--"])
+    result = parse_percent_column(s)
+
+    np.testing.assert_allclose(result.values, [0.2, 0.125, 0.075, 0.12, np.nan, np.nan])
+    assert result.failed.tolist() == [False] * 5 + [True]
+
+
+def test_parse_percent_column_policies():
+    # 区间取下限、输出百分点
+    s = pd.Series(["36%", "10%~15%", "5-10%"])
+    result = parse_percent_column(s, how="lower", unit="percent")
+    np.testing.assert_array_equal(result.values, [36.0, 10.0, 5.0])
+
+    # 裸数字视为小数（转化率常见写法）
+    s = pd.Series(["15%", "0.15", 0.2])
+    result = parse_percent_column(s, bare="fraction")
+    np.testing.assert_allclose(result.values, [0.15, 0.15, 0.2])
+
+
+def test_parse_error_codes():
+    # 批量模式不抛异常，逐行记录错误码并汇总常见的无法解析值
+    s = pd.Series(["1w~2w", "--", "暂无", "--", None, "null", "1.2.3w", 5000])
+    result = parse_sales_column(s)
+
+    assert result.errors.dtype == np.uint8
+    assert result.errors.tolist() == [
+        PARSE_OK,
+        PARSE_PLACEHOLDER,
+        PARSE_PLACEHOLDER,
+        PARSE_PLACEHOLDER,
+        PARSE_MISSING,
+        PARSE_MISSING,
+        PARSE_INVALID,  # 必须匹配整格，不取前缀 '1.2'
+        PARSE_OK,
+    ]
+    report = summarize_errors(s, result)
+    assert report.counts == {"缺失": 2, "占位符": 3, "无法解析": 1}
+    assert report.top_tokens == [("--", 2), ("暂无", 1), ("1.2.3w", 1)]
+    assert report.failures == 4
+
+    s = pd.Series(["20%", "约1成", "x"])
+    result = parse_percent_column(s)
+    assert result.errors.tolist() == [PARSE_OK, PARSE_INVALID, PARSE_PLACEHOLDER]
+
+
+def test_parse_whole_cell_only():
+    # 只允许 '约'、'+'、'以上' 和空白作为前后缀，其余多余文本记为无法解析
+    s = pd.Series(["约5000+", "1w以上", " 2w ", "2023-05-01", "第3名", "abc12"])
+    result = parse_sales_column(s)
+    np.testing.assert_array_equal(result.values, [5000, 10000, 20000] + [np.nan] * 3)
+    assert result.errors.tolist() == [PARSE_OK] * 3 + [PARSE_INVALID] * 3
+
+
+def test_range_mid_result():
+    # 整列版 range_mid：脏数据不抛异常，返回 NaN 和错误码
+    s = pd.Series(["7.5w~10w", "--"])
+    result = range_mid_result(s)
+    np.testing.assert_array_equal(result.values, [87500, np.nan])
+    assert result.failed.tolist() == [False, True]
+
+
+def test_sniff_format():
+    # 抽样判断列的主要格式
+    assert sniff_format(pd.Series([1.0, 2.0]), "sales") == "numeric"
+    assert sniff_format(pd.Series(["7.5w~10w", "3k-5k", "1w~2w"]), "sales") == "range"
+    assert sniff_format(pd.Series(["1.2万", "3w", "800"]), "sales") == "unit"
+    assert sniff_format(pd.Series(["20%", "5.5%", None]), "percent") == "percent"
+    assert sniff_format(pd.Series(["1w~2w", "暂无", "3k", "--"]), "sales") == "mixed"
+
+
+def test_format_kernels_match_general(monkeypatch):
+    # 专用解析与通用解析结果一致，不匹配的行回退到通用解析
+    monkeypatch.setenv("DOUYIN_VOCAB_CACHE", "0")
+    sales = pd.Series(["7.5w~10w", "3k-5k", "1.2万", "5000", "3,500+", "暂无", "1w~", " 2w "])
+    for fmt in ("unit", "range"):
+        for how in ("mean", "lower"):
+            fast = parse_sales_column(sales, how=how, fmt=fmt)
+            general = parse_sales_column(sales, how=how)
+            np.testing.assert_array_equal(fast.values, general.values)
+            assert fast.failed.tolist() == general.failed.tolist()
+
+    percent = pd.Series(["20.00%", "10%~15%", "5-10%", "12", "0.15", "--", "3.%"])
+    for fmt in ("percent", "percent_range"):
+        for bare in ("percent", "fraction"):
+            fast = parse_percent_column(percent, bare=bare, fmt=fmt)
+            general = parse_percent_column(percent, bare=bare)
+            np.testing.assert_array_equal(fast.values, general.values)
+            assert fast.failed.tolist() == general.failed.tolist()
+
+
+def test_convert_unique():
+    # 每个唯一值只调用一次转换函数
+    calls = []
+
+    def converter(value):
+        calls.append(value)
+        return range_to_mean(value)
+
+    s = pd.Series(["1k~2k", "7.5w~10w", "1k~2k", None, "1k~2k", "bad"])
+    values, stats = convert_unique(s, converter, errors="coerce")
+
+    np.testing.assert_array_equal(values, [1500, 87500, 1500, np.nan, 1500, np.nan])
+    assert sorted(calls) == ["1k~2k", "7.5w~10w", "bad"]
+    assert stats.cardinality == 3
+    assert stats.non_null == 5
+    assert stats.failures == 1
+    assert stats.hit_ratio == 1 - 3 / 5
+
+
+def test_vocab_cache(tmp_path):
+    # 跨运行词表缓存：写回后新实例可直接读取，版本变化时失效
+    cache = VocabularyCache(tmp_path / "vocab.sqlite3")
+    version = converter_version(range_to_mean)
+    cache.record("range_to_mean", version, ["1k~2k", "bad"], [1500.0, np.nan])
+    assert cache.flush() == 2
+
+    reloaded = VocabularyCache(tmp_path / "vocab.sqlite3")
+    values, hit = reloaded.lookup("range_to_mean", version, ["1k~2k", "bad", "3k~4k"])
+    assert values == [1500.0, None, None]
+    assert hit.tolist() == [True, True, False]
+
+    _, hit = reloaded.lookup("range_to_mean", "other-version", ["1k~2k"])
+    assert not hit.any()
+
+
+def test_vocab_cache_max_entries(tmp_path):
+    # 超过上限时淘汰最早写入的记录，淘汰到上限的 90%
+    path = tmp_path / "vocab.sqlite3"
+    cache = VocabularyCache(path, max_entries=10)
+    cache.record("ns", "v1", [f"old{i}" for i in range(6)], range(6))
+    cache.flush()
+    cache.record("ns", "v1", [f"new{i}" for i in range(6)], range(6))
+    assert cache.flush() == 6
+
+    tokens = [f"old{i}" for i in range(6)] + [f"new{i}" for i in range(6)]
+    _, hit = VocabularyCache(path).lookup("ns", "v1", tokens)
+    assert hit.tolist() == [False] * 3 + [True] * 9
@@ -1,6 +1,7 @@
 import sys
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 # 添加项目根目录到路径
@@ -8,6 +9,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 # 从douyin_ecom_analyzer包和ecom_cleaner包导入
 from douyin_ecom_analyzer.filter_engine import FilterEngine
+from douyin_ecom_analyzer.utils import clean_dataframe
 from ecom_cleaner.cleaning.cleaner import DataCleaner, parse_percent, parse_sales
 
 
@@ -107,10 +109,131 @@ def test_complete_flow():
     assert "节日商品" in stats["过滤详情"]
 
 
+def test_rejection_reasons():
+    # 一次求值得到拒绝位掩码，过滤结果、过滤详情和过滤原因都由它得到
+    df = pd.DataFrame({
+        "商品名称": ["达标", "销量低", "零佣金低转化", "节日", "全不达标"],
+        "近7天销量_val": [6000, 100, 6000, 6000, 100],
+        "近30天销量_val": [30000, 30000, 30000, 30000, 100],
+        "佣金比例_val": [25, 25, 0, 25, 0],
+        "转化率_val": [20, 20, 5, 20, 5],
+        "关联达人": [60, 60, 60, 60, 10],
+        "is_festival": [False, False, False, True, True],
+    })
+    filter_engine = FilterEngine()
+    filter_engine.rules = filter_engine._get_default_rules()  # 百分比单位的规则
+    mask = filter_engine.rejection_mask(df)
+    assert mask.tolist() == [0, 1, 8, 16, 31]
+
+    filtered_df, stats = filter_engine.filter_data(df)
+    assert filtered_df["商品名称"].tolist() == ["达标"]
+    assert stats["过滤详情"] == {"节日商品": 1, "佣金或转化率不达标": 1, "销量不达标": 2}
+    reasons = stats["过滤原因"]
+    assert reasons.tolist()[:4] == ["", "7天销量不达标", "佣金或转化率不达标", "节日商品"]
+    assert reasons.iloc[4].split("、")[0] == "7天销量不达标"
+    assert filter_engine.filter_mask(df).tolist() == [True, False, False, False, False]
+
+
+def test_combine_chunk_stats():
+    # 分块过滤后合并的统计信息与整体过滤一致
+    df = pd.DataFrame({
+        "商品名称": ["达标", "销量低", "零佣金低转化", "节日", "全不达标"],
+        "近7天销量_val": [6000, 100, 6000, 6000, 100],
+        "近30天销量_val": [30000, 30000, 30000, 30000, 100],
+        "佣金比例_val": [25, 25, 0, 25, 0],
+        "转化率_val": [20, 20, 5, 20, 5],
+        "关联达人": [60, 60, 60, 60, 10],
+        "is_festival": [False, False, False, True, True],
+    })
+    filter_engine = FilterEngine()
+    filter_engine.rules = filter_engine._get_default_rules()
+    filtered_df, stats = filter_engine.filter_data(df)
+
+    parts = [filter_engine.filter_data(df.iloc[i:i + 2]) for i in range(0, len(df), 2)]
+    combined = FilterEngine.combine_stats([part_stats for _, part_stats in parts])
+    pd.testing.assert_frame_equal(pd.concat([part for part, _ in parts]), filtered_df)
+    assert combined["过滤详情"] == stats["过滤详情"]
+    assert combined["过滤率"] == stats["过滤率"] == "80.00%"
+    assert combined["过滤原因"].tolist() == stats["过滤原因"].tolist()
+
+
+def test_filter_engine_column_binding():
+    # 缺列的规则跳过、不补默认列；比例阈值声明为小数或百分点结果相同，值 列也能过滤
+    df = pd.DataFrame({
+        "商品名称": ["达标", "佣金低", "零佣金高转化"],
+        "佣金比例_val": [25, 10, 0],
+        "转化率_val": [20, 20, 25],
+    })
+    filter_engine = FilterEngine()
+    filter_engine.rules = {
+        "unit": "fraction",
+        "commission": {"min_rate": 0.2, "zero_rate_conversion_min": 0.2},
+        "conversion": {"min_rate": 0.15},
+    }
+    filtered_df = filter_engine.apply_rules(df)
+    assert filtered_df["商品名称"].tolist() == ["达标", "零佣金高转化"]
+    assert filtered_df.columns.tolist() == df.columns.tolist()
+
+    filter_engine.rules = filter_engine._get_default_rules()  # 百分比单位的规则
+    assert filter_engine.filter_mask(df).tolist() == [True, False, True]
+
+    fractions = pd.DataFrame({
+        "商品名称": df["商品名称"],
+        "佣金比例值": df["佣金比例_val"] / 100,
+        "转化率值": df["转化率_val"] / 100,
+    })
+    assert filter_engine.filter_mask(fractions).tolist() == [True, False, True]
+
+
+def test_filter_engine_percent_threshold_at_most_one():
+    # 百分点规则中不超过 1 的阈值仍是百分点：1 表示 1%，不是 100%
+    df = pd.DataFrame({
+        "商品名称": ["5%", "0.5%"],
+        "佣金比例_val": [30.0, 30.0],
+        "转化率_val": [5.0, 0.5],
+    })
+    filter_engine = FilterEngine()
+    filter_engine.rules = {"commission": {"min_rate": 20}, "conversion": {"min_rate": 1}}
+    assert filter_engine.filter_mask(df).tolist() == [True, False]
+
+    filter_engine.rules = {
+        "unit": "fraction",
+        "commission": {"min_rate": 0.2},
+        "conversion": {"min_rate": 0.01},
+    }
+    assert filter_engine.filter_mask(df).tolist() == [True, False]
+
+
+def test_cleaner_does_not_modify_input():
+    # 清洗不修改原始数据，默认修改清洗结果也不影响原始数据
+    df = pd.DataFrame({
+        "商品名称": ["端午香囊", "T恤"],
+        "近7天销量": ["7.5w~10w", "3w"],
+        "佣金比例": ["36%", "0%"],
+        "转化率": ["10%", "30%"],
+        "关联达人": [3, 5],
+    })
+    before = df.copy()
+    cleaned = DataCleaner().clean(df)
+    pd.testing.assert_frame_equal(df, before)
+    assert cleaned["近7天销量_val"].tolist() == [75000, 30000]
+
+    cleaned.loc[0, "关联达人"] = 999
+    cleaned.loc[1, "商品名称"] = "改"
+    other = clean_dataframe(df, url_check=False)
+    other.loc[1, "关联达人"] = 999
+    pd.testing.assert_frame_equal(df, before)
+
+    # copy=False 时未改写的列与原始数据共用
+    shared = DataCleaner().clean(df, copy=False)
+    assert np.shares_memory(shared["关联达人"].to_numpy(), df["关联达人"].to_numpy())
+
+
 if __name__ == "__main__":
     test_parse_sales()
     test_parse_percent()
     test_cleaner()
     test_filter_rules()
     test_complete_flow()
+    test_rejection_reasons()
     print("所有测试通过!")
@@ -0,0 +1,133 @@
+import sys
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from cleaning.filter_engine import compile_rules, filter_dataframe, filter_mask, take_rows
+from douyin_ecom_analyzer.cleaning import filter_engine
+from douyin_ecom_analyzer.cleaning.binding import bind_columns
+
+RULES = {
+    "sales": {"last_7d_min": 5000, "last_30d_min": 25000},
+    "commission": {"min_rate": 0.2, "zero_rate_conversion_min": 0.2},
+    "conversion": {"min_rate": 0.15},
+    "influencer": {"min_count": 50},
+    "categories": {"blacklist": ["端午文创", "hellokitty"]},
+}
+
+
+def _sample_df(n=5000):
+    rng = np.random.default_rng(0)
+    names = ["端午文创香囊", "普通T恤", "HelloKitty水杯", "保温杯", None]
+    df = pd.DataFrame({
+        "商品名称": rng.choice(np.array(names, dtype=object), n),
+        "近7天销量值": rng.integers(0, 10000, n).astype(object),
+        "近30天销量值": rng.integers(0, 60000, n),
+        "佣金比例值": rng.choice([0, 0.1, 0.25], n),
+        "转化率值": rng.random(n) * 0.3,
+        "关联达人": rng.integers(0, 100, n),
+    })
+    df.loc[::7, "近7天销量值"] = "abc"  # 无法转换的值记为 0
+    return df
+
+
+def test_filter_plan_matches_full_mask():
+    # 按选择率排序、只在存活行上求值，结果与逐条构建完整布尔列相同
+    df = _sample_df()
+    result = filter_dataframe(df, RULES)
+
+    sales7 = pd.to_numeric(df["近7天销量值"], errors="coerce").fillna(0)
+    names = df["商品名称"].astype(str)
+    rate, conv = df["佣金比例值"], df["转化率值"]
+    cond = (
+        (sales7 >= 5000)
+        & (df["近30天销量值"] >= 25000)
+        & ((rate >= 0.2) | ((rate == 0) & (conv >= 0.2)))
+        & (conv >= 0.15)
+        & (df["关联达人"] >= 50)
+        & ~names.str.contains("端午文创|hellokitty", case=False)
+    )
+    assert len(result) == cond.sum() > 0
+    assert result["商品名称"].tolist() == names[cond].tolist()
+    assert result["近7天销量值"].tolist() == sales7[cond].tolist()
+
+    # 缺少的列对应的条件跳过
+    partial = filter_dataframe(df[["商品名称", "关联达人"]], RULES)
+    assert len(partial) == ((df["关联达人"] >= 50) & ~names.str.contains(
+        "端午文创|hellokitty", case=False)).sum()
+
+
+def test_filter_plan_cache_and_order():
+    # 内容相同的规则复用同一个计划，淘汰行多的条件先求值
+    plan = compile_rules(RULES)
+    assert compile_rules({key: dict(value) for key, value in RULES.items()}) is plan
+    assert compile_rules({"influencer": {"min_count": 10}}) is not plan
+
+    df = _sample_df()
+    df["关联达人"] = np.where(np.arange(len(df)) % 50 == 0, 80, 0)
+    plan.apply(df)
+    assert plan._order(plan.predicates(bind_columns(df.columns)))[0].name == "关联达人"
+
+
+def test_filter_plan_cache_lru(monkeypatch):
+    # 淘汰最久未使用的计划，常用的计划不会被一次性的规则挤出
+    monkeypatch.setattr(filter_engine, "_PLAN_CACHE", OrderedDict())
+    hot = compile_rules(RULES)
+    for i in range(filter_engine._PLAN_CACHE_SIZE * 2):
+        compile_rules({"influencer": {"min_count": i}})
+        assert compile_rules(RULES) is hot
+    assert len(filter_engine._PLAN_CACHE) == filter_engine._PLAN_CACHE_SIZE
+
+
+def test_filter_mask_copy_free():
+    # 只读求掩码，输入不被修改；需要时才取出行，结果与 filter_dataframe 相同
+    df = _sample_df()
+    before = df.copy()
+    mask = filter_mask(df, RULES)
+    pd.testing.assert_frame_equal(df, before)
+
+    result = filter_dataframe(df, RULES)
+    assert mask.sum() == len(result)
+    # 需要转换的列按转换后的值取出
+    assert result["商品名称"].tolist() == df.loc[mask, "商品名称"].astype(str).tolist()
+    assert result["近7天销量值"].tolist() == (
+        pd.to_numeric(df.loc[mask, "近7天销量值"], errors="coerce").fillna(0).tolist()
+    )
+    assert take_rows(df, np.flatnonzero(mask)).columns.tolist() == df.columns.tolist()
+
+
+def test_column_binding_schemas():
+    # 值、_num、_val 各种后缀的列按同一规则过滤，_val 列的比例为百分点
+    df = _sample_df(1000)
+    expected = filter_dataframe(df, RULES)
+
+    num = df.rename(columns=lambda c: c.replace("值", "_num"))
+    assert filter_dataframe(num, RULES)["商品名称"].tolist() == expected["商品名称"].tolist()
+
+    val = df.rename(columns=lambda c: c.replace("值", "_val"))
+    val["佣金比例_val"] = val["佣金比例_val"] * 100
+    val["转化率_val"] = val["转化率_val"] * 100
+    result = filter_dataframe(val, RULES)
+    assert result["商品名称"].tolist() == expected["商品名称"].tolist()
+    assert result.columns.tolist() == val.columns.tolist()  # 不补默认列
+
+    # 规则声明为百分点也一样
+    percent_rules = dict(
+        RULES,
+        unit="percent",
+        commission={"min_rate": 20, "zero_rate_conversion_min": 20},
+        conversion={"min_rate": 15},
+    )
+    assert len(filter_dataframe(val, percent_rules)) == len(expected)
+
+    # 同一组列名只解析一次
+    binding = bind_columns(val.columns)
+    assert bind_columns(list(val.columns)) is binding
+    assert binding.column("commission") == "佣金比例_val"
+    assert binding.threshold("commission", 0.2) == 20.0
+    assert binding.threshold("commission", 20, "percent") == 20.0
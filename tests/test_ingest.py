@@ -0,0 +1,106 @@
+import datetime
+import io
+import sys
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+import pytest
+
+# 添加项目根目录到路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from douyin_ecom_analyzer import ingest
+from douyin_ecom_analyzer.ingest import (
+    default_projection,
+    detect_format,
+    iter_excel,
+    iter_table,
+    read_excel,
+)
+
+
+def _sample_xlsx():
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    # 空列名和重复列名
+    ws.append([
+        "商品名称", "店铺", None, "近30天销量", "佣金比例", "商品链接", "商品名称", "价格", "日期",
+    ])
+    ws.append(["A", "s1", 1, "7.5w~10w", "20%", "http://x", "dup", 12.5,
+               datetime.datetime(2024, 5, 1)])
+    ws.append([None] * 9)
+    ws.append(["B", None, None, 5000, 0.2, None, "d2", 3, datetime.datetime(2024, 6, 1)])
+    # 中间缺失的行，以及只有不读取的列有值的行
+    ws["B8"] = "only-shop"
+    ws.append(["C", "s3", None, None, "1%", "http://y", None, None])
+    ws.append([None] * 9)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf
+
+
+def test_read_excel_matches_pandas():
+    """流式读取与 pd.read_excel 结果一致，与批大小和列投影无关"""
+    buf = _sample_xlsx()
+    projection = default_projection()
+    cases = [(None, None), (projection, projection), (["日期"], lambda c: c == "日期")]
+    for columns, usecols in cases:
+        buf.seek(0)
+        expected = pd.read_excel(buf, usecols=usecols)
+        for batch_size in (1, 3, 100):
+            buf.seek(0)
+            result = read_excel(buf, columns=columns, batch_size=batch_size)
+            pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize("error", [ImportError, AttributeError, TypeError])
+def test_read_excel_without_openpyxl_internals(monkeypatch, error):
+    """openpyxl 内部解析器不可用时退回 iter_rows，结果不变"""
+    def unavailable():
+        raise error("openpyxl 内部接口已变化")
+
+    monkeypatch.setattr(ingest, "_projected_parser_class", unavailable)
+    buf = _sample_xlsx()
+    for columns, usecols in [(None, None), (["日期"], lambda c: c == "日期")]:
+        buf.seek(0)
+        expected = pd.read_excel(buf, usecols=usecols)
+        buf.seek(0)
+        result = read_excel(buf, columns=columns, batch_size=3, use_cache=False)
+        pd.testing.assert_frame_equal(result, expected)
+
+
+def test_iter_excel_batches_and_projection():
+    """按批返回，索引连续，只包含需要的列"""
+    buf = _sample_xlsx()
+    batches = list(iter_excel(buf, columns=default_projection(), batch_size=3))
+
+    # 表尾空行去掉，共 8 行
+    assert [len(b) for b in batches] == [3, 3, 2]
+    assert list(pd.concat(batches).index) == list(range(8))
+    # 店铺、日期、空列名的列不读取
+    assert list(batches[0].columns) == ["商品名称", "近30天销量", "佣金比例", "商品链接", "价格"]
+
+
+def test_iter_table_text_formats(tmp_path):
+    """CSV、TSV、JSONL 按块读取，只保留需要的列，结果与整体读取一致"""
+    df = pd.DataFrame({
+        "商品名称": ["A", "B", "C", "D", "E"],
+        "店铺": ["s1", "s2", "s3", "s4", "s5"],
+        "近30天销量": ["7.5w~10w", "5000", "3w", "1.2万", "2w"],
+        "佣金比例": ["20%", "0%", "15%", "30%", "5%"],
+        "关联达人": [10, 60, 3, 80, 0],
+    })
+    df.to_csv(tmp_path / "a.csv", index=False, encoding="utf-8-sig")
+    df.to_csv(tmp_path / "a.tsv", index=False, sep="\t")
+    df.to_json(tmp_path / "a.jsonl", orient="records", lines=True, force_ascii=False)
+    expected = df.drop(columns="店铺")
+
+    for name in ("a.csv", "a.tsv", "a.jsonl"):
+        chunks = list(iter_table(tmp_path / name, columns=default_projection(), chunksize=2))
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+
+    assert detect_format("data/商品.XLSX") == "excel"
+    with pytest.raises(ValueError):
+        detect_format("商品.txt")
@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from cleaning.filter_engine import blacklist_matches, filter_dataframe
+from douyin_ecom_analyzer.cleaning import keywords
+from douyin_ecom_analyzer.cleaning.keywords import KeywordMatcher, get_keyword_matcher
+
+NAMES = pd.Series([
+    "HelloKitty保温杯", "儿童节礼盒(限定)", "c++入门教程", "普通T恤", None, "ushers", "she",
+])
+TERMS = ["hellokitty", "礼盒(限定)", "C++", "he", "she", "hers"]
+
+
+def test_keyword_matcher(monkeypatch):
+    # 按字面匹配、不区分大小写，正则和自动机两种方式结果相同
+    expected_hits = [True, True, True, False, False, True, True]
+    for max_keywords in (100, 0):
+        monkeypatch.setattr(keywords, "REGEX_MAX_KEYWORDS", max_keywords)
+        matcher = KeywordMatcher(TERMS + ["", "C++"])
+        assert (matcher._regex is not None) == (max_keywords > 0)
+        assert matcher.contains(NAMES).tolist() == expected_hits
+        matched = matcher.match(NAMES).tolist()
+        assert matched[:3] == ["hellokitty", "礼盒(限定)", "C++"]
+        assert matched[3] is None and matched[4] is None
+        assert matched[5] in ("she", "he", "hers")
+        assert matcher.find("") is None
+
+    assert get_keyword_matcher(["a", "b"]) is get_keyword_matcher(("a", "b"))
+
+
+def test_blacklist_literal_terms():
+    # 含正则元字符的黑名单关键词不再报错，可以查看命中的关键词
+    df = pd.DataFrame({"商品名称": ["c++入门", "a+b 礼包", "普通T恤"], "关联达人": [60, 60, 60]})
+    rules = {"categories": {"blacklist": ["C++", "a+b"]}}
+    assert filter_dataframe(df, rules)["商品名称"].tolist() == ["普通T恤"]
+    assert blacklist_matches(df, rules).tolist() == ["C++", "a+b", None]
@@ -0,0 +1,80 @@
+import datetime
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from douyin_ecom_analyzer.cleaning import parallel
+from douyin_ecom_analyzer.cleaning.parallel import choose_workers
+from douyin_ecom_analyzer.utils import clean_dataframe
+from ecom_cleaner.cleaning.cleaner import DataCleaner
+
+
+def _raw_df(n=3000):
+    rng = np.random.default_rng(7)
+
+    def choice(values):
+        return rng.choice(np.array(values, dtype=object), n)
+
+    df = pd.DataFrame({
+        "商品名称": choice(["端午香囊", " 普通T恤 ", "中秋月饼", None]),
+        # 混合类型：True 与 1 不能合并
+        "近30天销量": choice(["7.5w~10w", "2500~5000", "暂无", None, 1, True]),
+        "佣金比例": choice(["20%", "10%~15%", "-", None]),
+        "上架时间": choice([datetime.date(2024, 5, 1), "2024-06-01", pd.NaT]),
+        "价格": rng.normal(100, 20, n),
+        "关联达人": pd.array(rng.integers(0, 50, n), dtype="Int64"),
+    })
+    df.index = pd.Index(np.arange(n) * 3 + 100)
+    return df
+
+
+def test_parallel_clean_matches_serial(monkeypatch):
+    """多进程清洗的结果、列格式和解析错误汇总与单进程相同"""
+    monkeypatch.setattr(parallel, "MIN_PARTITION_ROWS", 500)
+    df = _raw_df()
+
+    serial = DataCleaner()
+    expected = serial.clean(df)
+    cleaner = DataCleaner()
+    result = cleaner.clean(df, workers=2)
+    pd.testing.assert_frame_equal(result, expected)
+    assert [type(v) for v in result["近30天销量"]] == [type(v) for v in expected["近30天销量"]]
+    assert cleaner.column_formats == serial.column_formats
+    assert cleaner.parse_reports == serial.parse_reports
+
+    expected = clean_dataframe(df, url_check=False)
+    pd.testing.assert_frame_equal(clean_dataframe(df, url_check=False, workers=2), expected)
+
+
+def test_parallel_clean_copy(monkeypatch):
+    # 多进程清洗不先复制整个输入；默认结果不与输入共用数据，copy=False 时共用未修改的列
+    monkeypatch.setattr(parallel, "MIN_PARTITION_ROWS", 500)
+    df = _raw_df()
+    copies = []
+    copy = pd.DataFrame.copy
+
+    def record_copy(self, deep=True):
+        copies.append(deep)
+        return copy(self, deep=deep)
+
+    monkeypatch.setattr(pd.DataFrame, "copy", record_copy)
+    result = DataCleaner().clean(df, workers=2)
+    assert True not in copies
+    assert not np.shares_memory(result["价格"].to_numpy(), df["价格"].to_numpy())
+
+    shared = DataCleaner().clean(df, workers=2, copy=False)
+    assert np.shares_memory(shared["价格"].to_numpy(), df["价格"].to_numpy())
+
+
+def test_choose_workers(monkeypatch):
+    # 每个进程至少 MIN_PARTITION_ROWS 行，不超过上限和可用核数
+    monkeypatch.setattr(parallel, "available_cpus", lambda: 4)
+    assert choose_workers(10_000) == 1
+    assert choose_workers(parallel.MIN_PARTITION_ROWS * 3) == 3
+    assert choose_workers(10_000_000) == 4
+    assert choose_workers(10_000_000, max_workers=2) == 2
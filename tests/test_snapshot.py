@@ -0,0 +1,51 @@
+import datetime
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from douyin_ecom_analyzer.snapshot import SnapshotCache
+
+
+def test_snapshot_round_trip(tmp_path):
+    """快照加载结果与保存前一致，数值列为内存映射且可修改"""
+    df = pd.DataFrame({
+        "商品名称": ["A", np.nan, "B", "A"],
+        # 混合类型：True 与 1 不能合并
+        "近30天销量": ["7.5w~10w", 1, True, np.nan],
+        "价格": [12.5, 3.0, np.nan, 1.0],
+        "日期": pd.to_datetime(["2024-05-01", None, "2024-06-01", "2024-06-02"]),
+        "时间": [datetime.time(8, 30), np.nan, datetime.datetime(2024, 1, 1), np.nan],
+        3: [1, 2, 3, 4],
+    })
+    cache = SnapshotCache(tmp_path)
+    assert cache.save("k", df)
+
+    loaded = cache.load("k")
+    pd.testing.assert_frame_equal(loaded, df)
+    assert [type(v) for v in loaded["近30天销量"]] == [str, int, bool, float]
+    loaded.loc[0, "价格"] = 0.0
+    assert cache.load("k").loc[0, "价格"] == 12.5
+    assert cache.load("missing") is None
+
+
+def test_snapshot_evicts_least_recently_used(tmp_path):
+    """超过大小上限时删除最久未使用的快照"""
+    df = pd.DataFrame({"x": np.arange(1000, dtype=np.float64)})
+    cache = SnapshotCache(tmp_path, max_bytes=20_000)
+    cache.save("a", df)
+    cache.save("b", df)
+    # 两个快照都在较早前使用过，再加载 a，b 成为最久未使用
+    old = time.time() - 60
+    os.utime(tmp_path / "a", (old, old))
+    os.utime(tmp_path / "b", (old, old))
+    cache.load("a")
+
+    cache.save("c", df)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a", "c"]
@@ -0,0 +1,73 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from douyin_ecom_analyzer.streaming import (
+    COMMISSION_BINS,
+    COMMISSION_LABELS,
+    SALES_BINS,
+    SALES_LABELS,
+    RunningSummary,
+    StreamAggregator,
+)
+
+
+def _cleaned_df(n=5000):
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({
+        "商品名称": rng.choice(np.array(["端午香囊", "普通T恤", "中秋月饼", "保温杯"]), n),
+        "近30天销量_val": rng.choice([0, 500, 1000, 3000, 20000, 80000, 2e5], n).astype(float),
+        "佣金比例_val": rng.choice([0, 5, 12.5, 20, 30, 45], n).astype(float),
+        "关联达人": rng.integers(0, 100, n),
+    })
+    df.loc[::13, "近30天销量_val"] = np.nan
+    return df
+
+
+def _chunks(df, size):
+    return [df.iloc[i:i + size] for i in range(0, len(df), size)]
+
+
+def test_stream_aggregator_matches_whole_frame():
+    """分块累计的分布、统计摘要、主题分布和 Top-K 与整体计算一致"""
+    df = _cleaned_df()
+    aggregator = StreamAggregator(top_k=20)
+    for chunk in _chunks(df, 700):
+        aggregator.update(chunk)
+    results = aggregator.results()
+
+    sales = pd.cut(df["近30天销量_val"], bins=SALES_BINS, labels=SALES_LABELS)
+    assert results["sales"].tolist() == sales.value_counts().sort_index().tolist()
+    # 佣金按百分点存储，按小数分区间
+    commission = pd.cut(df["佣金比例_val"] / 100, bins=COMMISSION_BINS, labels=COMMISSION_LABELS)
+    assert results["commission"].tolist() == commission.value_counts().sort_index().tolist()
+
+    # 数据量不超过抽样容量时分位数也是精确值
+    numeric = df[["近30天销量_val", "佣金比例_val", "关联达人"]]
+    expected = numeric.describe()
+    pd.testing.assert_frame_equal(results["summary"].loc[expected.index], expected)
+    assert results["summary"].loc["空值数", "近30天销量_val"] == df["近30天销量_val"].isna().sum()
+
+    assert results["theme"]["端午"] == df["商品名称"].eq("端午香囊").sum()
+
+    top = df.sort_values("近30天销量_val", ascending=False, kind="stable").head(20)
+    pd.testing.assert_frame_equal(results["top"], top)
+
+
+def test_running_summary_sampled_quantiles():
+    """超过抽样容量时均值、标准差仍为精确值，分位数为估计值"""
+    values = np.random.default_rng(5).normal(100, 15, 50_000)
+    summary = RunningSummary(sample_size=2000)
+    for part in np.array_split(values, 9):
+        summary.update(pd.DataFrame({"x": part}))
+    result = summary.result()["x"]
+
+    assert result["count"] == len(values)
+    assert np.isclose(result["mean"], values.mean())
+    assert np.isclose(result["std"], values.std(ddof=1))
+    assert abs(result["50%"] - np.median(values)) < 2
@@ -0,0 +1,61 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from douyin_ecom_analyzer.cleaning.themes import ThemeTagger, count_themes, recorded_theme_names
+from douyin_ecom_analyzer.streaming import StreamAggregator
+from ecom_cleaner.cleaning.cleaner import FESTIVAL_KEYWORDS, DataCleaner
+
+
+def test_theme_tagger():
+    # 一个商品可属于多个主题，位掩码、标签和计数一致
+    names = pd.Series(["端午艾草香囊", "库洛米六一礼盒", "T恤", None, 61, "HELLOKITTY杯"])
+    tagger = ThemeTagger()
+    tags = tagger.tag(names)
+
+    assert tags.ids.dtype == np.uint8
+    assert tags.ids.tolist() == [1, 6, 0, 0, 2, 4]
+    assert tags.flags.tolist() == [True, True, False, False, True, True]
+    labels = tagger.labels(tags.ids).tolist()
+    assert labels == ["端午", "儿童节、IP角色", "", "", "儿童节", "IP角色"]
+    assert tagger.counts(tags.ids).to_dict() == {"端午": 1, "儿童节": 2, "IP角色": 2}
+
+    custom = ThemeTagger({f"主题{i}": [f"词{i}"] for i in range(10)})
+    assert custom.tag(pd.Series(["词9", "词0词9"])).ids.tolist() == [512, 513]
+
+
+def test_cleaner_festival_matches_keyword_loop():
+    # 与逐行逐关键词判断的结果相同
+    rng = np.random.default_rng(0)
+    parts = np.array(["端午", "粽", "子", "Hello", "kitty", "六", "一", "6", "1", "T恤", "礼盒"])
+    names = ["".join(rng.choice(parts, 4)) for _ in range(2000)]
+    df = pd.DataFrame({"商品名称": names})
+
+    cleaned = DataCleaner().clean(df)
+    expected = [any(kw.lower() in name.lower() for kw in FESTIVAL_KEYWORDS) for name in names]
+    assert cleaned["is_festival"].tolist() == expected
+    stats = DataCleaner().get_cleaning_stats(cleaned)
+    assert sum(expected) <= sum(stats["themes"].values())
+
+
+def test_custom_theme_ids_decoded_with_recorded_names():
+    # 自定义主题的 theme_id 按清洗时记录的主题名解码，不按默认主题
+    themes = {"中秋": ["月饼"], "端午": ["粽子"]}
+    df = pd.DataFrame({"商品名称": ["五仁月饼", "肉粽子", "月饼粽子", "T恤"]})
+    cleaned = DataCleaner({"themes": themes}).clean(df)
+    names = recorded_theme_names(cleaned[cleaned["is_festival"]])
+    assert names == ["中秋", "端午"]
+    assert count_themes(cleaned["theme_id"], names).to_dict() == {"中秋": 2, "端午": 2}
+
+    # 累计器的主题不同，按商品名称重新标记
+    aggregator = StreamAggregator()
+    aggregator.update(cleaned)
+    assert aggregator.results()["theme"].to_dict() == {"端午": 2, "儿童节": 0, "IP角色": 0}
+    aggregator = StreamAggregator(themes=themes)
+    aggregator.update(cleaned)
+    assert aggregator.results()["theme"].to_dict() == {"中秋": 2, "端午": 2}
@@ -0,0 +1,76 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from cleaning.filter_engine import filter_dataframe
+from cleaning.threshold_index import ThresholdIndex
+
+
+def _sample_df(n=3000):
+    rng = np.random.default_rng(1)
+    names = ["端午文创香囊", "普通T恤", "HelloKitty水杯", "保温杯", None]
+    df = pd.DataFrame({
+        "商品名称": rng.choice(np.array(names, dtype=object), n),
+        "近7天销量值": rng.integers(0, 10000, n).astype(object),
+        "近30天销量值": rng.integers(0, 60000, n).astype(float),
+        "佣金比例值": rng.choice([0, 0.1, 0.2, 0.25], n),
+        "转化率值": rng.random(n) * 0.3,
+        "关联达人": rng.integers(0, 100, n),
+        "price": rng.integers(1, 500, n).astype(float),
+    })
+    df.loc[::7, "近7天销量值"] = "abc"  # 无法转换的值记为 0
+    df.loc[::11, "近30天销量值"] = np.nan
+    return df
+
+
+def test_threshold_index_matches_filter():
+    # 任意阈值下，索引的结果与 filter_dataframe 相同
+    df = _sample_df()
+    index = ThresholdIndex(df)
+    rng = np.random.default_rng(2)
+    for _ in range(20):
+        rules = {
+            "sales": {
+                "last_7d_min": int(rng.integers(0, 10000)),
+                "last_30d_min": int(rng.integers(0, 60000)),
+            },
+            "commission": {
+                "min_rate": float(rng.choice([0.05, 0.2, 0.3])),
+                "zero_rate_conversion_min": float(rng.random() * 0.3),
+            },
+            "conversion": {"min_rate": float(rng.random() * 0.2)},
+            "influencer": {"min_count": int(rng.integers(0, 100))},
+            "categories": {"blacklist": list(rng.choice(["端午文创", "hellokitty", "T恤"], 2))},
+        }
+        expected = filter_dataframe(df, rules)
+        result = index.evaluate(rules)
+        assert int(result.keep.sum()) == len(expected)
+        assert result.pass_counts()["近7天销量"] == int(
+            (pd.to_numeric(df["近7天销量值"], errors="coerce").fillna(0)
+             >= rules["sales"]["last_7d_min"]).sum()
+        )
+
+        # Top50 与按价值分数稳定降序排序的前 50 行相同
+        expected["value_score"] = (
+            expected["近30天销量值"] * expected["佣金比例值"] * expected["price"]
+        )
+        top = index.top(result.keep, 50)
+        pd.testing.assert_frame_equal(
+            top,
+            expected.sort_values("value_score", ascending=False, kind="stable")
+            .head(50)
+            .reset_index(drop=True),
+        )
+
+
+def test_threshold_index_missing_rules():
+    # 规则缺项或缺列时跳过对应条件
+    df = _sample_df(100).drop(columns=["关联达人"])
+    result = ThresholdIndex(df).evaluate({"influencer": {"min_count": 50}, "sales": {}})
+    assert result.masks == {}
+    assert result.keep.all()
@@ -0,0 +1,318 @@
+import asyncio
+import importlib.util
+import json
+import sys
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# 添加项目根目录到路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from douyin_ecom_analyzer.utils import (
+    batch_validate_urls,
+    chunked_url_validation,
+    clean_dataframe,
+    start_url_validation,
+)
+from douyin_ecom_analyzer.validation.adaptive import BREAKER_CONSECUTIVE
+from douyin_ecom_analyzer.validation.canonical import canonicalize_url
+from douyin_ecom_analyzer.validation.journal import journal_path
+from douyin_ecom_analyzer.validation.structural import structural_valid
+from douyin_ecom_analyzer.validation.url_cache import UrlStatusCache
+from douyin_ecom_analyzer.validation.url_checker import (
+    add_valid_columns,
+    check_urls,
+    check_urls_async,
+)
+
+
+def _load_ecom_cleaning():
+    # ecom_cleaner/cleaning.py 与 ecom_cleaner/cleaning 包同名，按文件路径加载
+    path = Path(__file__).parent.parent / "ecom_cleaner" / "cleaning.py"
+    spec = importlib.util.spec_from_file_location("ecom_cleaning", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_validate_url_column_matches_scalar():
+    # 整列版与逐行的 validate_url 结果相同，白名单为空时全部记为默认值
+    cleaning = _load_ecom_cleaning()
+    series = pd.Series(["douyin.com/a", "https://x.chanmama.com/b", "http://other.com", None, ""])
+    for domains in (["douyin.com", "chanmama.com"], []):
+        config = {"cleaning_rules": {"url_validation": {
+            "allowed_domains": domains, "default_value": "",
+        }}}
+        expected = [cleaning.validate_url(url, config) for url in series]
+        assert cleaning.validate_url_column(series, config).tolist() == expected
+    assert expected == [""] * 5
+
+
+def test_check_urls(url_server):
+    # 异步校验：去重、跟随跳转、复用 keep-alive 连接
+    base = url_server.url
+    urls = [f"{base}/ok?id={i}" for i in range(40)]
+    urls += [f"{base}/missing", f"{base}/redirect", f"{base}/ok?id=0", "not-a-url", None]
+    valid, stats = check_urls(urls, limit=8, limit_per_host=4)
+
+    assert all(valid[f"{base}/ok?id={i}"] for i in range(40))
+    assert valid[f"{base}/redirect"] is True
+    assert valid[f"{base}/missing"] is False
+    assert valid["not-a-url"] is False
+    assert stats.total == 44
+    assert stats.requested == 42
+    assert stats.valid == 41
+    assert stats.urls_per_sec > 0
+    # 42 个请求 + 1 次跳转，最多只用 limit_per_host 个连接
+    assert url_server.requests == 43
+    assert url_server.connections <= 4
+
+
+def test_batch_validate_urls(url_server):
+    # 结果写回 _有效 列，空值为 False
+    base = url_server.url
+    df = pd.DataFrame({"商品链接": [f"{base}/ok", f"{base}/missing", None, f"{base}/ok"]})
+    result = batch_validate_urls(df, ["商品链接", "不存在的列"])
+
+    assert result["商品链接_有效"].tolist() == [True, False, False, True]
+    assert url_server.requests == 2
+
+
+def test_canonicalize_url():
+    # 去掉跟踪参数和锚点，域名转小写，同一商品ID的抖音和蝉妈妈链接规范键相同
+    douyin = canonicalize_url(
+        " https://Haohuo.Douyin.com:443/views/product/item2?u_code=abc&id=3512345678#x"
+    )
+    assert douyin.url == "https://haohuo.douyin.com/views/product/item2?id=3512345678"
+    assert douyin.goods_id == "3512345678"
+
+    chanmama = canonicalize_url("https://www.chanmama.com/goods/3512345678?utm_source=wx")
+    assert chanmama.url == "https://www.chanmama.com/goods/3512345678"
+    assert chanmama.key == douyin.key == "goods:3512345678"
+
+    other = canonicalize_url("http://example.com/a?b=2&a=1&spm=x")
+    assert other.key == other.url == "http://example.com/a?a=1&b=2"
+    assert other.goods_id is None
+
+    assert canonicalize_url("haohuo.douyin.com/item?id=1") is None
+    assert canonicalize_url(None) is None
+
+
+def test_structural_valid():
+    # 离线结构校验与规范化提取商品ID的结果一致
+    urls = pd.Series(
+        [
+            "https://haohuo.douyin.com/views/product/item2?id=3512345678&u_code=x",
+            "HTTPS://WWW.Chanmama.COM/Goods/123456.html",
+            "https://example.com/goods/123456",
+            "haohuo.douyin.com/item?id=123456",
+            "https://haohuo.douyin.com/item?id=12345a",
+            "https://douyin.com.evil.com/goods/123456",
+            None,
+            123,
+        ],
+        dtype=object,
+    )
+    valid = structural_valid(urls)
+    assert valid.tolist() == [True, True, False, False, False, False, False, False]
+    assert valid.tolist() == [bool(c and c.goods_id) for c in map(canonicalize_url, urls)]
+    assert structural_valid(urls, require_goods_id=False)[4]
+
+
+def test_clean_dataframe_no_url_check(url_server):
+    # 关闭联网检查时仍生成 _有效 列，且不发任何请求
+    df = pd.DataFrame(
+        {
+            "商品链接": ["https://haohuo.douyin.com/goods/123456", f"{url_server.url}/ok"],
+            "近30天销量": ["1w~2w", "5000"],
+        }
+    )
+    result = clean_dataframe(df, url_check=False)
+
+    assert result["商品链接_有效"].tolist() == [True, False]
+    assert url_server.requests == 0
+
+
+def test_batch_validate_urls_cross_column(url_server):
+    # 多列中只有跟踪参数不同的链接只请求一次
+    base = url_server.url
+    df = pd.DataFrame(
+        {
+            "商品链接": [f"{base}/ok?id=1&u_code=a", f"{base}/missing?from=x"],
+            "蝉妈妈商品链接": [f"{base}/ok?u_code=b&id=1", f"{base}/missing"],
+        }
+    )
+    result = batch_validate_urls(df, ["商品链接", "蝉妈妈商品链接"])
+
+    assert result["商品链接_有效"].tolist() == [True, False]
+    assert result["蝉妈妈商品链接_有效"].tolist() == [True, False]
+    assert url_server.requests == 2
+
+
+def test_background_url_validation(url_server):
+    # 后台校验立即返回，之后按链接值合并到过滤后的子集
+    base = url_server.url
+    url_server.delay = 0.1
+    df = pd.DataFrame(
+        {
+            "商品链接": [f"{base}/ok?id={i}" for i in range(4)] + [f"{base}/missing"],
+            "销量": [1, 2, 3, 4, 5],
+        }
+    )
+    pending = start_url_validation(df, max_workers=1)
+    assert not pending.done()
+
+    subset = df[df["销量"] >= 3]
+    result = pending.join(subset)
+    assert result["商品链接_有效"].tolist() == [True, True, False]
+    assert pending.stats.requested == 5
+
+
+def test_chunked_url_validation(url_server):
+    # 每块加入后即在后台校验，各块依次进行，合并后与整表校验结果相同
+    base = url_server.url
+    url_server.delay = 0.05
+    chunks = [
+        pd.DataFrame({"商品链接": [f"{base}/ok?id={i}" for i in range(3)]}),
+        pd.DataFrame({"商品链接": [f"{base}/ok?id=1", f"{base}/missing", None]}, index=[3, 4, 5]),
+    ]
+    pending = chunked_url_validation(max_workers=1)
+    pending.add(chunks[0])
+    assert not pending.done()
+    pending.add(chunks[1])
+
+    result = pending.join(pd.concat(chunks))
+    assert result["商品链接_有效"].tolist() == [True, True, True, True, False, False]
+    # 第二块开始时第一块已完成，重复的链接命中缓存
+    assert url_server.requests == 4
+    assert pending.stats.cache_hits == 1
+
+
+def test_check_urls_cache(url_server):
+    # 第二次运行只请求新的URL，规范化后相同的URL直接命中缓存
+    base = url_server.url
+    check_urls([f"{base}/ok?id=1", f"{base}/missing"])
+    assert url_server.requests == 2
+
+    valid, stats = check_urls([f"{base}/ok?id=1#top", f"{base}/missing", f"{base}/ok?id=2"])
+    assert url_server.requests == 3
+    assert stats.cache_hits == 2
+    assert valid[f"{base}/ok?id=1#top"] is True
+    assert valid[f"{base}/missing"] is False
+    assert valid[f"{base}/ok?id=2"] is True
+
+
+def test_url_status_cache(tmp_path):
+    # 过期记录视为未命中，暂时性结果不缓存，超出上限淘汰最旧的记录
+    cache = UrlStatusCache(tmp_path / "urls.sqlite3", ttl=3600, max_entries=2)
+    cache.put_many([("a", 200), ("c", None), ("d", 503), ("e", 429)])
+    cache.put("b", 404)
+    assert cache.get_many(["a", "b", "c", "d", "e"]) == {"a": 200, "b": 404}
+
+    cache.put("f", 200)
+    assert cache.get_many(["a", "b", "f"]) == {"b": 404, "f": 200}
+
+    expired = UrlStatusCache(tmp_path / "urls.sqlite3", ttl=-1)
+    assert expired.get("f") is None
+
+
+def test_url_cache_reuses_connection(tmp_path):
+    # 同一线程复用连接，只在首次写入和超过上限时统计条数
+    cache = UrlStatusCache(tmp_path / "urls.sqlite3", ttl=3600, max_entries=10)
+    conn = cache._connect()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    for i in range(9):
+        cache.put(f"u{i}", 200)
+        assert cache.get(f"u{i}") == 200
+    assert cache._connect() is conn
+    assert sum("COUNT(*)" in sql for sql in statements) == 1
+
+    cache.put_many([("u9", 200), ("u10", 200)])
+    assert sum("COUNT(*)" in sql for sql in statements) == 2
+    # 淘汰到上限的 90%
+    assert len(cache.get_many(f"u{i}" for i in range(11))) == 9
+
+
+def test_check_urls_circuit_breaker(make_url_server):
+    # 持续返回 503 的域名熔断，剩余链接记为未知，健康域名不受影响
+    good, bad = make_url_server(), make_url_server()
+    bad.status = 503
+    urls = [f"{bad.url}/ok?id={i}" for i in range(100)]
+    urls += [f"{good.url}/ok?id={i}" for i in range(20)]
+    valid, stats = check_urls(urls, limit=16, limit_per_host=8)
+
+    assert all(valid[f"{good.url}/ok?id={i}"] is True for i in range(20))
+    # 熔断前最多再发出一个窗口的请求
+    assert bad.requests <= BREAKER_CONSECUTIVE + 8
+    assert stats.unknown == 100 - bad.requests
+    assert stats.requested == 20 + bad.requests
+    assert sum(value is None for value in valid.values()) == stats.unknown
+
+    df = pd.DataFrame({"商品链接": [urls[-1], urls[0], urls[99], None]})
+    result = add_valid_columns(df, ["商品链接"], valid)
+    assert result["商品链接_有效"].tolist() == [True, False, pd.NA, False]
+
+
+def test_check_urls_slow_host(make_url_server):
+    # 慢域名不拖慢快域名：慢域名的响应一直挂起，直到快域名的链接全部完成
+    fast, slow = make_url_server(), make_url_server()
+    slow.gate = threading.Event()
+    urls = [f"{slow.url}/ok?id={i}" for i in range(6)]
+    urls += [f"{fast.url}/ok?id={i}" for i in range(200)]
+    finished = []
+    fast_done = []
+
+    def record(key, status):
+        finished.append((key, status))
+        if key.startswith(fast.url):
+            fast_done.append(key)
+            if len(fast_done) == 200:
+                slow.gate.set()
+
+    hosts = asyncio.run(
+        check_urls_async(urls, record, limit=8, limit_per_host=8, timeout=30)
+    )
+
+    assert {status for _, status in finished} == {200}
+    # 快域名的链接全部先于慢域名完成；若被慢域名拖住，慢域名会等到
+    # GATE_TIMEOUT 后先完成
+    order = [key.startswith(fast.url) for key, _ in finished]
+    assert order == [True] * 200 + [False] * 6
+    fast_state = hosts[fast.url.split("//", 1)[1]]
+    slow_state = hosts[slow.url.split("//", 1)[1]]
+    assert (fast_state.requests, fast_state.failures) == (200, 0)
+    assert fast_state.window == 8
+    assert (slow_state.requests, slow_state.failures) == (6, 0)
+    assert not slow_state.open
+
+
+def test_check_urls_resume(url_server):
+    # 中途被终止后重新运行同一批链接，只请求日志中没有的链接
+    base = url_server.url
+    urls = [f"{base}/ok?id={i}" for i in range(30)] + [f"{base}/missing"]
+    done = []
+
+    def interrupt(key, _status):
+        done.append(key)
+        if len(done) == 10:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        check_urls(urls, limit=1, limit_per_host=1, on_result=interrupt)
+    assert len(journal_path(urls).read_text().splitlines()) == 10
+    # 超时等暂时性结果（null）不恢复，重新请求
+    with journal_path(urls).open("a", encoding="utf-8") as f:
+        f.write(json.dumps([done[0], None]) + "\n")
+
+    requests_before = url_server.requests
+    valid, stats = check_urls(urls)
+    assert stats.resumed == 9
+    assert url_server.requests - requests_before == 22
+    assert valid[f"{base}/missing"] is False
+    assert sum(valid.values()) == 30
+    # 完成后日志删除，结果已写入缓存
+    assert not journal_path(urls).exists()